@@ -0,0 +1,276 @@
+"""
+Forecast em lote para todos os tenants, produtos e KPIs
+
+Roda a mesma pilha de previsão da tab de Forecast (prever_cenarios +
+calendário de eventos) fora do navegador, distribuindo os grupos
+(tenant, produto) em um pool de processos, e grava o resultado em um
+store Parquet particionado por tenant e produto.
+
+USO:
+====
+    # Dados do dashboard (meses apurados em config_apuracao.py)
+    python batch_forecast.py
+
+    # Arquivo com várias empresas/produtos (CSV ou Parquet), com colunas
+    # 'tenant', 'produto', 'Mês' e os KPIs
+    python batch_forecast.py --entrada dados.parquet --workers 8 --horizonte 6
+
+O store fica em DIR_ARTEFATOS/forecast (ou em --saida) e pode ser lido com
+pandas.read_parquet(caminho, filters=[('tenant', '==', 'x')]).
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config.settings import DIR_ARTEFATOS
+from config.calendario import get_eventos_forecast
+from utils.forecast import prever_cenarios
+from utils.ajustes import (
+    compilar_matriz_ajustes, proximos_meses, mes_para_ordinal, ordinal_para_mes
+)
+
+
+KPIS_PADRAO = ["Leads", "Clientes Web", "Receita Web", "CAC", "LTV", "ROI (%)", "Total Ads"]
+CENARIOS = ['previsao', 'otimista', 'conservador']
+DIR_SAIDA_PADRAO = os.path.join(DIR_ARTEFATOS, 'forecast')
+
+
+def normalizar_meses(meses):
+    """
+    Converte a coluna 'Mês' para o formato do loader ('Out/25')
+
+    Aceita o próprio formato do loader, datas (datetime do Parquet) ou
+    textos de data ('2025-10-01'). Valores não reconhecidos viram None.
+
+    Args:
+        meses: Series com os meses
+
+    Returns:
+        Series de strings no formato 'Mmm/AA'
+    """
+    if pd.api.types.is_datetime64_any_dtype(meses):
+        no_formato = pd.Series(None, index=meses.index, dtype=object)
+        datas = meses
+    else:
+        def _formato_loader(valor):
+            try:
+                return ordinal_para_mes(mes_para_ordinal(str(valor)))
+            except (ValueError, IndexError):
+                return None
+
+        no_formato = meses.map(_formato_loader).astype(object)
+        datas = pd.to_datetime(meses.where(no_formato.isna()), errors='coerce', format='mixed')
+
+    ordinais = (datas.dt.year % 100) * 12 + datas.dt.month - 1
+    de_datas = ordinais.map(lambda o: None if pd.isna(o) else ordinal_para_mes(o)).astype(object)
+    return no_formato.where(no_formato.notna(), de_datas)
+
+
+def prever_grupo(tarefa):
+    """
+    Gera as previsões de todos os KPIs de um grupo (tenant, produto)
+
+    Executada nos processos do pool; recebe e devolve apenas objetos simples.
+    Erros de um grupo são registrados e o grupo é ignorado, sem interromper
+    os demais.
+
+    Args:
+        tarefa: Dict com 'tenant', 'produto', 'dados' (DataFrame do grupo)
+            e 'opcoes' (parâmetros da linha de comando)
+
+    Returns:
+        Lista de dicts, uma linha por (KPI, horizonte)
+    """
+    try:
+        return _prever_grupo(tarefa)
+    except Exception as e:
+        print(f"Erro no grupo ({tarefa['tenant']}, {tarefa['produto']}), ignorado: {e}")
+        return []
+
+
+def _prever_grupo(tarefa):
+    opcoes = tarefa['opcoes']
+    dados = tarefa['dados']
+
+    # Série em ordem cronológica: o ajuste e o último mês dependem disso
+    if 'Mês' in dados.columns:
+        dados = dados[dados['Mês'].notna()]
+        ordem = dados['Mês'].map(mes_para_ordinal).to_numpy().argsort(kind='stable')
+        dados = dados.iloc[ordem]
+
+    horizonte = opcoes['horizonte']
+    kpis = [k for k in opcoes['kpis'] if k in dados.columns]
+
+    meses_futuros = None
+    matriz = None
+    if opcoes['calendario'] and 'Mês' in dados.columns and len(dados):
+        try:
+            meses_futuros = proximos_meses(dados['Mês'].iloc[-1], horizonte)
+            contexto = {}
+            if 'Ticket Médio' in dados.columns:
+                contexto['ticket_medio_atual'] = dados['Ticket Médio'].iloc[-1]
+            matriz = compilar_matriz_ajustes(opcoes['eventos'], meses_futuros, kpis, contexto)
+        except ValueError:
+            meses_futuros = None
+
+    linhas = []
+    for i, kpi in enumerate(kpis):
+        resultado = prever_cenarios(
+            dados, kpi,
+            num_previsoes=horizonte,
+            metodo_intervalo=opcoes['metodo_intervalo'],
+            n_simulacoes=opcoes['simulacoes'],
+            seed=opcoes['seed']
+        )
+        if resultado is None:
+            continue
+
+        valores = np.array([resultado[c].values for c in CENARIOS])
+        if matriz is not None:
+            valores = valores * matriz[i]
+
+        metricas = resultado['metricas']
+        for h in range(horizonte):
+            linhas.append({
+                'tenant': tarefa['tenant'],
+                'produto': tarefa['produto'],
+                'kpi': kpi,
+                'horizonte': h + 1,
+                'mes': meses_futuros[h] if meses_futuros else None,
+                'previsao': valores[0, h],
+                'otimista': valores[1, h],
+                'conservador': valores[2, h],
+                'r2': metricas['R²'],
+                'mape': metricas['MAPE'],
+                'tau': metricas['Tendência (tau)'],
+                'p_valor_tendencia': metricas['P-valor tendência'],
+                'metodo_intervalo': opcoes['metodo_intervalo']
+            })
+
+    return linhas
+
+
+def carregar_entrada(caminho, coluna_tenant, coluna_produto):
+    """
+    Lê o arquivo de entrada ou, sem arquivo, os dados apurados do dashboard
+
+    Returns:
+        DataFrame com colunas 'tenant' e 'produto'
+    """
+    if caminho is None:
+        from data.loader import load_data
+        from config.config_apuracao import get_meses_apurados
+
+        df = load_data()
+        df = df[df['Mês'].isin(get_meses_apurados())].copy()
+        df['tenant'] = 'principal'
+        df['produto'] = 'erp'
+        return df
+
+    if caminho.lower().endswith('.parquet') or os.path.isdir(caminho):
+        df = pd.read_parquet(caminho)
+    else:
+        df = pd.read_csv(caminho)
+
+    df = df.rename(columns={coluna_tenant: 'tenant', coluna_produto: 'produto'})
+    if 'Mês' in df.columns:
+        df['Mês'] = normalizar_meses(df['Mês'])
+    return df
+
+
+def gravar_parquet(linhas, saida):
+    """
+    Grava as previsões particionadas por tenant e produto
+
+    Partições reprocessadas são substituídas; as demais são mantidas.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = pd.DataFrame(linhas)
+    df['gerado_em'] = pd.Timestamp(datetime.now())
+
+    pq.write_to_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        root_path=saida,
+        partition_cols=['tenant', 'produto'],
+        existing_data_behavior='delete_matching'
+    )
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast em lote por tenant, produto e KPI")
+    parser.add_argument('--entrada', help="CSV/Parquet com tenant, produto, Mês e KPIs (padrão: dados do dashboard)")
+    parser.add_argument('--saida', default=DIR_SAIDA_PADRAO, help="Diretório do store Parquet")
+    parser.add_argument('--coluna-tenant', default='tenant')
+    parser.add_argument('--coluna-produto', default='produto')
+    parser.add_argument('--kpis', nargs='+', default=KPIS_PADRAO)
+    parser.add_argument('--horizonte', type=int, default=3)
+    parser.add_argument('--metodo-intervalo', choices=['gaussiano', 'bootstrap'], default='gaussiano')
+    parser.add_argument('--simulacoes', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sem-calendario', action='store_true',
+                        help="Não aplica os eventos de config/calendario.py")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Grupos enviados por vez a cada processo (padrão: automático)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    df = carregar_entrada(args.entrada, args.coluna_tenant, args.coluna_produto)
+
+    opcoes = {
+        'kpis': args.kpis,
+        'horizonte': args.horizonte,
+        'metodo_intervalo': args.metodo_intervalo,
+        'simulacoes': args.simulacoes,
+        'seed': args.seed,
+        'calendario': not args.sem_calendario,
+        'eventos': get_eventos_forecast()
+    }
+    colunas = [c for c in ['Mês', 'Ticket Médio'] + args.kpis if c in df.columns]
+    tarefas = [
+        {'tenant': tenant, 'produto': produto, 'dados': grupo[colunas], 'opcoes': opcoes}
+        for (tenant, produto), grupo in df.groupby(['tenant', 'produto'], sort=False)
+    ]
+
+    if not tarefas:
+        print("Nenhum grupo (tenant, produto) encontrado na entrada.")
+        return 1
+
+    # Lotes grandes o bastante para diluir o custo de comunicação entre processos
+    chunksize = args.chunksize or max(1, len(tarefas) // (args.workers * 4))
+
+    linhas = []
+    if args.workers > 1 and len(tarefas) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for resultado in pool.map(prever_grupo, tarefas, chunksize=chunksize):
+                linhas.extend(resultado)
+    else:
+        for tarefa in tarefas:
+            linhas.extend(prever_grupo(tarefa))
+
+    if not linhas:
+        print("Nenhuma previsão gerada (dados insuficientes em todos os grupos).")
+        return 1
+
+    df_saida = gravar_parquet(linhas, args.saida)
+    duracao = time.perf_counter() - inicio
+
+    n_series = df_saida.groupby(['tenant', 'produto', 'kpi']).ngroups
+    print(
+        f"{len(tarefas)} grupos, {n_series} séries, {len(df_saida)} linhas "
+        f"em {duracao:.1f}s ({args.workers} workers, chunksize {chunksize}) -> {args.saida}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,14 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 
+from data.loader import load_data
+from config.config_apuracao import get_meses_apurados
+from utils.anomalias import detectar_anomalias_recentes
+from utils.tendencia import mann_kendall_lote, matriz_series
+
+# Séries monitoradas pelo detector de anomalias (último período)
+SERIES_ANOMALIAS = ['Custo Google', 'Custo Meta', 'Total Ads', 'CAC', 'Leads', 'Receita Web']
+
 def analyze_trend(series):
     """
     Analisa a tendência de uma série temporal
@@ -36,6 +44,15 @@ def analyze_trend(series):
     
     return tendencia, percentual, valor_inicial, valor_final
 
+def _significancia(testes, coluna):
+    """
+    Texto complementar quando o Mann-Kendall confirma a tendência
+    """
+    teste = testes.get(coluna)
+    if teste is None or teste['tendencia'] == 0:
+        return ''
+    return f" · tendência significativa (Mann-Kendall p={teste['p_valor']:.3f})"
+
 def calculate_metrics_health(df):
     """
     Calcula a saúde geral das métricas e identifica pontos de atenção
@@ -48,13 +65,22 @@ def calculate_metrics_health(df):
     
     alerts = []
     
+    # Teste de tendência de todas as séries monitoradas em uma passada
+    colunas_teste = [c for c in ['CAC', 'ROI (%)', 'CAC:LTV', 'TC Leads (%)', 'TC Usuários (%)',
+                                 'Total Ads', 'Ticket Médio'] if c in df_valid.columns]
+    resultado_teste = mann_kendall_lote(matriz_series(df_valid, colunas_teste))
+    testes = {
+        coluna: {chave: valores[i] for chave, valores in resultado_teste.items()}
+        for i, coluna in enumerate(colunas_teste)
+    }
+    
     # 1. Análise de CAC
     cac_trend, cac_var, cac_inicial, cac_final = analyze_trend(df_valid['CAC'])
     if cac_trend == "crescente" and abs(cac_var) > 10:
         alerts.append({
             'icon': '📈',
             'title': 'CAC crescente',
-            'message': f'Aumentou {abs(cac_var):.1f}% no período (R$ {cac_inicial:.0f} → R$ {cac_final:.0f})',
+            'message': f'Aumentou {abs(cac_var):.1f}% no período (R$ {cac_inicial:.0f} → R$ {cac_final:.0f})' + _significancia(testes, 'CAC'),
             'severity': 'high'
         })
     
@@ -64,7 +90,7 @@ def calculate_metrics_health(df):
         alerts.append({
             'icon': '📉',
             'title': 'ROI em queda',
-            'message': f'Redução de {abs(roi_var):.1f}% no período ({roi_inicial:.0f}% → {roi_final:.0f}%)',
+            'message': f'Redução de {abs(roi_var):.1f}% no período ({roi_inicial:.0f}% → {roi_final:.0f}%)' + _significancia(testes, 'ROI (%)'),
             'severity': 'high'
         })
     
@@ -74,7 +100,7 @@ def calculate_metrics_health(df):
         alerts.append({
             'icon': '⚠️',
             'title': 'Relação CAC:LTV em declínio',
-            'message': f'Caiu de {cac_ltv_inicial:.1f}:1 para {cac_ltv_final:.1f}:1',
+            'message': f'Caiu de {cac_ltv_inicial:.1f}:1 para {cac_ltv_final:.1f}:1' + _significancia(testes, 'CAC:LTV'),
             'severity': 'medium'
         })
     elif cac_ltv_final < 3:
@@ -91,7 +117,7 @@ def calculate_metrics_health(df):
         alerts.append({
             'icon': '📊',
             'title': 'TC Leads em queda',
-            'message': f'Tendência de queda ({tc_leads_inicial:.2f}% → {tc_leads_final:.2f}%)',
+            'message': f'Tendência de queda ({tc_leads_inicial:.2f}% → {tc_leads_final:.2f}%)' + _significancia(testes, 'TC Leads (%)'),
             'severity': 'medium'
         })
     elif tc_leads_final < 3:
@@ -108,7 +134,7 @@ def calculate_metrics_health(df):
         alerts.append({
             'icon': '👥',
             'title': 'TC Usuários em declínio',
-            'message': f'Redução de {abs(tc_users_var):.1f}% ({tc_users_inicial:.2f}% → {tc_users_final:.2f}%)',
+            'message': f'Redução de {abs(tc_users_var):.1f}% ({tc_users_inicial:.2f}% → {tc_users_final:.2f}%)' + _significancia(testes, 'TC Usuários (%)'),
             'severity': 'medium'
         })
     
@@ -118,7 +144,7 @@ def calculate_metrics_health(df):
         alerts.append({
             'icon': '💰',
             'title': 'Custo de Ads crescendo rapidamente',
-            'message': f'Aumento de {abs(custo_var):.1f}% (R$ {custo_inicial:.0f} → R$ {custo_final:.0f})',
+            'message': f'Aumento de {abs(custo_var):.1f}% (R$ {custo_inicial:.0f} → R$ {custo_final:.0f})' + _significancia(testes, 'Total Ads'),
             'severity': 'medium'
         })
     
@@ -141,10 +167,35 @@ def calculate_metrics_health(df):
         alerts.append({
             'icon': '🎫',
             'title': 'Ticket Médio em queda',
-            'message': f'Redução de {abs(ticket_var):.1f}% (R$ {ticket_inicial:.2f} → R$ {ticket_final:.2f})',
+            'message': f'Redução de {abs(ticket_var):.1f}% (R$ {ticket_inicial:.2f} → R$ {ticket_final:.2f})' + _significancia(testes, 'Ticket Médio'),
             'severity': 'low'
         })
     
+    # 9. Anomalias no período mais recente (mediana/MAD da janela anterior)
+    # O detector salvo é compartilhado: sincroniza só com meses apurados
+    # (um mês em andamento ficaria no buffer com valor parcial) e consulta o
+    # último mês apurado do filtro
+    anomalias_recentes = []
+    meses_apurados = get_meses_apurados()
+    meses_fechados = df_valid.loc[df_valid['Mês'].isin(meses_apurados), 'Mês']
+    if len(meses_fechados) > 0:
+        df_completo = load_data()
+        df_completo = df_completo[df_completo['Mês'].isin(meses_apurados)]
+        anomalias_recentes = detectar_anomalias_recentes(
+            df_completo, SERIES_ANOMALIAS, periodo=meses_fechados.iloc[-1]
+        )
+    for anomalia in anomalias_recentes:
+        direcao = "acima" if anomalia['escore'] > 0 else "abaixo"
+        alerts.append({
+            'icon': '🔺' if anomalia['escore'] > 0 else '🔻',
+            'title': f"{anomalia['serie']} fora do padrão em {anomalia['periodo']}",
+            'message': (
+                f"{anomalia['valor']:,.2f} está {direcao} da mediana recente "
+                f"({anomalia['mediana']:,.2f}), {abs(anomalia['escore']):.1f} desvios robustos"
+            ),
+            'severity': 'high' if abs(anomalia['escore']) > 7 else 'medium'
+        })
+    
     return alerts
 
 def render_main_alerts(df):
@@ -5,8 +5,10 @@ Módulo de configuração do Dashboard Marketing SaaS ERP
 from .settings import (
     BENCHMARKS,
     PLANOS,
+    RETENCAO_PLANOS,
     EXTENSOES,
     CUSTOS_LEAD,
+    HIERARQUIAS,
     PAGE_CONFIG
 )
 
@@ -15,8 +17,10 @@ from .styles import get_custom_css
 __all__ = [
     'BENCHMARKS',
     'PLANOS',
+    'RETENCAO_PLANOS',
     'EXTENSOES',
     'CUSTOS_LEAD',
+    'HIERARQUIAS',
     'PAGE_CONFIG',
     'get_custom_css'
 ]
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Calendário de Campanhas e Ajustes de Preço do Forecast
+
+IMPORTANTE: Este arquivo controla os ajustes aplicados sobre as previsões
+da tab de Forecast. Nenhum mês ou multiplicador fica fixo no código.
+
+COMO CADASTRAR UM EVENTO:
+=========================
+Cada evento é um dict na lista EVENTOS_FORECAST:
+
+- nome: Nome exibido na tab
+- tipo: 'campanha' ou 'preco'
+- inicio / fim: Meses no formato do loader (ex: 'Out/25'). Sem 'fim', o
+  evento vale para todos os meses seguintes
+- efeitos (campanha): lista de {'kpis': [...], 'multiplicadores': [...]},
+  com um multiplicador por mês do período (ou 'multiplicador' único)
+- ticket_alvo / rampa (preco): ticket médio após o reajuste e fração de
+  clientes migrados em cada mês do início; depois da rampa, 100% migrados
+- descricao: linhas exibidas na seção "Eventos Considerados"
+- base_estimativa (opcional, campanha): nome de um evento passado cujos
+  efeitos, estimados pela análise de intervenção, substituem os
+  multiplicadores quando a opção "usar efeitos estimados" estiver ativa
+
+Exemplo (Black Friday do próximo ano):
+    {
+        'nome': 'Black Friday 2026',
+        'tipo': 'campanha',
+        'inicio': 'Out/26',
+        'fim': 'Dez/26',
+        'base_estimativa': 'Campanha Black Friday 2025',
+        'efeitos': [
+            {'kpis': ['Leads', 'Sessões'], 'multiplicadores': [1.15, 1.45, 0.85]},
+        ],
+    }
+"""
+
+# ============================================================================
+# EVENTOS CONSIDERADOS NO FORECAST - ATUALIZE AQUI
+# ============================================================================
+
+EVENTOS_FORECAST = [
+    {
+        'nome': 'Aumento de Preços dos Planos',
+        'tipo': 'preco',
+        'inicio': 'Out/25',
+        'kpis': ['Receita Web', 'LTV'],
+        # Ticket médio ponderado dos novos planos (considerando distribuição de clientes)
+        'ticket_alvo': 146.56,
+        # Out/25: 20% dos clientes no novo preço, Nov/25: metade, Dez/25: maioria
+        'rampa': [0.20, 0.50, 0.80],
+        'descricao': [
+            'MEI: R$ 84,90',
+            'Simples Nacional: R$ 154,90',
+            'Lucro Real/Presumido: R$ 199,90',
+        ],
+    },
+    {
+        'nome': 'Campanha Black Friday 2025',
+        'tipo': 'campanha',
+        'inicio': 'Out/25',
+        'fim': 'Dez/25',
+        'efeitos': [
+            # Aumento de tráfego e conversões
+            {
+                'kpis': ['Leads', 'Sessões', 'Primeira Visita', 'Clientes Web'],
+                'multiplicadores': [1.15, 1.45, 0.85],
+            },
+            # Receita considerando desconto de até 50% nos 4 primeiros meses
+            {
+                'kpis': ['Receita Web'],
+                'multiplicadores': [1.10, 1.25, 0.75],
+            },
+            # CAC tende a subir em campanhas agressivas (competição aumenta CPC)
+            {
+                'kpis': ['CAC'],
+                'multiplicadores': [1.10, 1.20, 0.90],
+            },
+            # Aumento de investimento em ads
+            {
+                'kpis': ['Total Ads', 'Custo Meta', 'Custo Google'],
+                'multiplicadores': [1.20, 1.50, 0.60],
+            },
+        ],
+        'descricao': [
+            '🔥 **Última semana de Out/25:** Esquenta Black (aumento moderado)',
+            '🚀 **Nov/25 completo:** Black Friday principal (até 50% OFF nos 4 primeiros meses)',
+            '📉 **Até 12/Dez:** Extensão da campanha',
+            '🛑 **Pós 12/Dez:** Parada operacional de fim de ano',
+        ],
+    },
+]
+
+
+def get_eventos_forecast():
+    """
+    Retorna a lista de eventos do forecast
+
+    Returns:
+        list: Cópia da lista de eventos cadastrados
+    """
+    return [dict(evento) for evento in EVENTOS_FORECAST]
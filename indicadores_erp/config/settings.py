@@ -1,14 +1,25 @@
 """
 Configurações centralizadas do projeto
 """
+import os
 
+# Diretório para artefatos gerados (estados de modelos, caches, modelos treinados)
+DIR_ARTEFATOS = os.environ.get(
+    'DIR_ARTEFATOS',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.artefatos')
+)
+
+# Núcleos usados no treino de modelos (evita ocupar todos os núcleos do servidor)
+N_JOBS_MODELOS = int(os.environ.get('N_JOBS_MODELOS', 2))
+
+# maior_melhor: False para métricas em que ficar abaixo da faixa é bom (ex: CAC)
 BENCHMARKS = {
-    'TC Usuários (%)': {'min': 8, 'max': 15, 'ideal': 10.5},
-    'TC Leads (%)': {'min': 4.5, 'max': 6, 'ideal': 5.25},
-    'CAC': {'min': 250, 'max': 500, 'ideal': 350},
-    'CAC:LTV': {'min': 3, 'max': 7, 'ideal': 4, 'critico': 3},
-    'ROI (%)': {'min': 300, 'max': 500, 'ideal': 400},
-    'Ticket Médio': {'min': 120, 'max': 200, 'ideal': 150}
+    'TC Usuários (%)': {'min': 8, 'max': 15, 'ideal': 10.5, 'maior_melhor': True},
+    'TC Leads (%)': {'min': 4.5, 'max': 6, 'ideal': 5.25, 'maior_melhor': True},
+    'CAC': {'min': 250, 'max': 500, 'ideal': 350, 'maior_melhor': False},
+    'CAC:LTV': {'min': 3, 'max': 7, 'ideal': 4, 'critico': 3, 'maior_melhor': True},
+    'ROI (%)': {'min': 300, 'max': 500, 'ideal': 400, 'maior_melhor': True},
+    'Ticket Médio': {'min': 120, 'max': 200, 'ideal': 150, 'maior_melhor': True}
 }
 
 PLANOS = {
@@ -17,6 +28,16 @@ PLANOS = {
     'Lucro Real/Presumido': 199.90
 }
 
+# Retenção mensal de cada plano, usada na economia de coortes (utils.retencao).
+# Curva de sobrevivência: S(t) = (1 - churn_mensal) ** (t ** forma), t em meses
+# após o 1º mês; forma < 1 = churn maior no início, que cai com o tempo.
+# participacao: fatia da receita nova de cada coorte vinda do plano
+RETENCAO_PLANOS = {
+    'MEI': {'churn_mensal': 0.06, 'forma': 0.85, 'participacao': 0.40},
+    'Simples Nacional': {'churn_mensal': 0.035, 'forma': 0.85, 'participacao': 0.45},
+    'Lucro Real/Presumido': {'churn_mensal': 0.02, 'forma': 0.85, 'participacao': 0.15}
+}
+
 EXTENSOES = {
     'Controle de Estoque': 15.99,
     'Controle Financeiro': 15.99,
@@ -27,6 +48,11 @@ EXTENSOES = {
     'Força de Vendas': 39.90
 }
 
+# Séries agregadas e suas componentes (usado na reconciliação do forecast)
+HIERARQUIAS = {
+    'Total Ads': ['Custo Meta', 'Custo Google']
+}
+
 CUSTOS_LEAD = {
     'min': 25,
     'max': 50,
@@ -0,0 +1,441 @@
+"""
+Leitura em streaming das planilhas de ROI em Receita (Excel/CSV)
+
+A planilha nunca é carregada inteira: as primeiras linhas são usadas para
+localizar o cabeçalho (a linha que contém Mês, Receita web e Total Ads) e
+o restante é lido em lotes, já convertido para os tipos usados na análise
+(data do período e valores numéricos). Cada lote guarda apenas as colunas
+necessárias, então a memória depende do tamanho do lote e não do arquivo.
+
+Vários arquivos (ex: um arquivo por linha de produto, uma aba por ano) são
+lidos em paralelo, um arquivo por processo com todas as suas abas, e
+consolidados em uma única base com a origem de cada linha. O pool é criado
+uma vez por servidor, com processos iniciados por spawn (fork dentro do
+servidor do Streamlit copiaria threads e locks em uso).
+"""
+import io
+import os
+import csv
+import time
+import threading
+import multiprocessing
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from utils.numeros import converter_numero_br
+
+
+COL_MES = "Mês"
+COL_RECEITA = "Receita web"
+COL_ADS = "Total Ads"
+COLUNAS_OBRIGATORIAS = [COL_MES, COL_RECEITA, COL_ADS]
+
+LINHAS_BUSCA_CABECALHO = 20
+SEPARADORES_CSV = (",", ";", "\t")
+TAMANHO_LOTE_PADRAO = 50_000
+PROCESSOS_LEITURA = os.cpu_count() or 1
+
+_pool = None
+_trava_pool = threading.Lock()
+
+
+def _normalizar_nome(valor, posicao):
+    """Nome de coluna sem espaços nas pontas; vazios viram col_<posição>"""
+    nome = "" if valor is None else str(valor).strip()
+    if nome == "" or nome.lower() in ("nan", "none"):
+        return f"col_{posicao}"
+    return nome
+
+
+def detectar_cabecalho(linhas, obrigatorias=COLUNAS_OBRIGATORIAS):
+    """
+    Localiza a linha de cabeçalho entre as primeiras linhas do arquivo
+
+    Args:
+        linhas: Lista de linhas (sequências de células)
+        obrigatorias: Colunas que precisam estar presentes no cabeçalho
+
+    Returns:
+        Tuple (índice da linha, lista de nomes normalizados)
+
+    Raises:
+        ValueError: Se nenhuma linha contém todas as colunas obrigatórias
+    """
+    for indice, linha in enumerate(linhas):
+        nomes = [_normalizar_nome(c, i) for i, c in enumerate(linha)]
+        if all(col in nomes for col in obrigatorias):
+            return indice, nomes
+
+    raise ValueError(
+        "Cabeçalho não encontrado nas primeiras linhas. "
+        "A planilha precisa ter as colunas: " + ", ".join(obrigatorias)
+    )
+
+
+def preparar_lote(df, colunas_extras=None):
+    """
+    Converte um lote bruto para os tipos usados na análise
+
+    Args:
+        df: DataFrame com as colunas obrigatórias (valores brutos)
+        colunas_extras: Outras colunas a manter como estão
+
+    Returns:
+        DataFrame com periodo, mes_ano_str, receita_web, total_ads (e extras),
+        sem linhas com data ou valores inválidos
+    """
+    lote = pd.DataFrame({
+        "periodo": pd.to_datetime(df[COL_MES], errors="coerce"),
+        "receita_web": converter_numero_br(df[COL_RECEITA]),
+        "total_ads": converter_numero_br(df[COL_ADS]),
+    }, index=df.index)
+
+    for col in colunas_extras or []:
+        if col in df.columns:
+            lote[col] = df[col].values
+
+    lote = lote.dropna(subset=["periodo", "receita_web", "total_ads"])
+    lote["mes_ano_str"] = _mes_ano_str(lote["periodo"])
+    return lote.reset_index(drop=True)
+
+
+def _mes_ano_str(periodo):
+    """Equivalente a dt.strftime("%Y-%m"), sem formatar linha a linha"""
+    return np.datetime_as_string(
+        periodo.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]"), unit="M"
+    )
+
+
+def somar_por_dia(df):
+    """
+    Soma receita e investimento por dia, a menor granularidade das coortes
+
+    Returns:
+        DataFrame com periodo (dia), receita_web, total_ads e mes_ano_str
+    """
+    dias = (
+        df.groupby(df["periodo"].dt.normalize(), sort=True)[["receita_web", "total_ads"]]
+        .sum()
+        .reset_index()
+    )
+    dias["mes_ano_str"] = _mes_ano_str(dias["periodo"])
+    return dias
+
+
+def _lotes_excel(arquivo, tamanho_lote, aba=None):
+    """Linhas do Excel via openpyxl em modo read_only (sem carregar a planilha)"""
+    from openpyxl import load_workbook
+
+    livro = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        planilha = livro[aba] if aba else livro.worksheets[0]
+        linhas = (
+            linha for linha in planilha.iter_rows(values_only=True)
+            if any(c is not None and str(c).strip() != "" for c in linha)
+        )
+
+        inicio = list(islice(linhas, LINHAS_BUSCA_CABECALHO))
+        indice, nomes = detectar_cabecalho(inicio)
+        posicoes = {nome: i for i, nome in reversed(list(enumerate(nomes)))}
+
+        def _montar(bloco):
+            return pd.DataFrame(
+                {nome: [l[i] if i < len(l) else None for l in bloco] for nome, i in posicoes.items()}
+            )
+
+        pendentes = inicio[indice + 1:]
+        while True:
+            pendentes.extend(islice(linhas, tamanho_lote - len(pendentes)))
+            if not pendentes:
+                break
+            yield _montar(pendentes)
+            pendentes = []
+    finally:
+        livro.close()
+
+
+def _detectar_separador(linhas):
+    """
+    Separador com o qual o cabeçalho é encontrado nas primeiras linhas
+
+    Cada candidato é testado com detectar_cabecalho, começando pelo mais
+    frequente; contar separadores em uma linha de dados não basta (no CSV
+    pt-BR com ";" as vírgulas decimais empatam ou superam os ";").
+
+    Args:
+        linhas: Primeiras linhas não vazias do arquivo (texto)
+
+    Returns:
+        Tuple (separador, índice da linha de cabeçalho, nomes normalizados)
+
+    Raises:
+        ValueError: Se nenhum separador leva ao cabeçalho
+    """
+    amostra = "".join(linhas)
+    erro = None
+    for separador in sorted(SEPARADORES_CSV, key=amostra.count, reverse=True):
+        celulas = [next(csv.reader([l], delimiter=separador)) for l in linhas]
+        try:
+            indice, nomes = detectar_cabecalho(celulas)
+        except ValueError as e:
+            erro = e
+            continue
+        return separador, indice, nomes
+    raise erro
+
+
+def _lotes_csv(arquivo, tamanho_lote):
+    """Lotes do CSV com pandas (chunksize), pulando as linhas antes do cabeçalho"""
+    binario = arquivo if hasattr(arquivo, "read") else open(arquivo, "rb")
+    binario.seek(0)
+    # Decodifica sob demanda, sem copiar o arquivo inteiro para uma string
+    texto = io.TextIOWrapper(binario, encoding="utf-8-sig", errors="replace", newline="")
+
+    inicio = list(islice(texto, LINHAS_BUSCA_CABECALHO))
+    linhas_nao_vazias = [l for l in inicio if l.strip()]
+    separador, indice, nomes = _detectar_separador(linhas_nao_vazias)
+
+    # Posição da linha de cabeçalho no arquivo original (contando linhas vazias)
+    linha_cabecalho = [i for i, l in enumerate(inicio) if l.strip()][indice]
+    texto.seek(0)
+
+    # Só as colunas obrigatórias (primeira ocorrência de cada uma)
+    posicoes = sorted(nomes.index(col) for col in COLUNAS_OBRIGATORIAS)
+    leitor = pd.read_csv(
+        texto,
+        sep=separador,
+        header=None,
+        skiprows=linha_cabecalho + 1,
+        usecols=posicoes,
+        dtype=str,
+        skip_blank_lines=True,
+        chunksize=tamanho_lote,
+    )
+    try:
+        for lote in leitor:
+            yield lote.rename(columns={i: nomes[i] for i in posicoes})
+    finally:
+        # Devolve o arquivo original sem fechá-lo (o Streamlit ainda o usa)
+        texto.detach()
+
+
+def ler_planilha_em_lotes(arquivo, nome=None, tamanho_lote=TAMANHO_LOTE_PADRAO, aba=None):
+    """
+    Lê a planilha de ROI em lotes já tipados
+
+    Args:
+        arquivo: Caminho ou arquivo aberto (ex: UploadedFile do Streamlit)
+        nome: Nome do arquivo (para identificar o formato; padrão: arquivo.name)
+        tamanho_lote: Linhas por lote
+        aba: Aba do Excel (padrão: a primeira)
+
+    Yields:
+        DataFrames no formato de preparar_lote
+
+    Raises:
+        ValueError: Se o cabeçalho não for encontrado
+    """
+    nome = (nome or getattr(arquivo, "name", str(arquivo))).lower()
+
+    if nome.endswith(".xlsx"):
+        lotes = _lotes_excel(arquivo, tamanho_lote, aba)
+    elif nome.endswith(".xls"):
+        # Formato antigo (xlrd): sem leitura em streaming, lê a aba inteira
+        bruto = pd.read_excel(arquivo, header=None, sheet_name=aba or 0, dtype=object)
+        bruto = bruto.dropna(how="all")
+        indice, nomes = detectar_cabecalho(bruto.head(LINHAS_BUSCA_CABECALHO).values.tolist())
+        dados = bruto.iloc[indice + 1:]
+        dados.columns = nomes
+        lotes = [dados.loc[:, ~dados.columns.duplicated()]]
+    else:
+        lotes = _lotes_csv(arquivo, tamanho_lote)
+
+    for lote in lotes:
+        tipado = preparar_lote(lote)
+        if not tipado.empty:
+            yield tipado
+
+
+def listar_abas(arquivo, nome=None):
+    """
+    Abas de uma planilha Excel (CSV tem uma única "aba", None)
+
+    Returns:
+        Lista de nomes de abas
+    """
+    nome = (nome or getattr(arquivo, "name", str(arquivo))).lower()
+
+    if nome.endswith(".xlsx"):
+        from openpyxl import load_workbook
+        livro = load_workbook(arquivo, read_only=True)
+        try:
+            return list(livro.sheetnames)
+        finally:
+            livro.close()
+    if nome.endswith(".xls"):
+        return list(pd.ExcelFile(arquivo).sheet_names)
+    return [None]
+
+
+def _ler_arquivo(tarefa):
+    """
+    Lê todas as abas de um arquivo (executada no processo de trabalho)
+
+    Os bytes do arquivo chegam ao processo uma única vez; erros de cada aba
+    vão para o relatório.
+
+    Returns:
+        Lista de tuples (nome, aba, DataFrame ou None, segundos, erro)
+    """
+    nome, conteudo = tarefa
+    try:
+        abas = listar_abas(io.BytesIO(conteudo), nome)
+    except Exception as e:
+        print(f"Erro ao listar abas de {nome}: {e}")
+        abas = [None]
+
+    resultados = []
+    for aba in abas:
+        inicio = time.perf_counter()
+        try:
+            df = ler_planilha_roi(io.BytesIO(conteudo), nome, aba=aba)
+            erro = None
+        except Exception as e:
+            df, erro = None, str(e)
+        resultados.append((nome, aba, df, time.perf_counter() - inicio, erro))
+    return resultados
+
+
+def _pool_leitura():
+    """Pool de processos (spawn) compartilhado, criado no primeiro uso"""
+    global _pool
+    with _trava_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=PROCESSOS_LEITURA,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _descartar_pool():
+    """Descarta um pool quebrado (processo de trabalho morto); o próximo uso recria"""
+    global _pool
+    with _trava_pool:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def ler_planilhas_roi(arquivos, max_workers=None):
+    """
+    Lê vários arquivos (todas as abas) em paralelo e consolida em uma base
+
+    Cada arquivo é uma tarefa do pool de processos compartilhado. Abas sem o
+    cabeçalho esperado (ex: resumo, gráficos) são ignoradas e aparecem no
+    relatório.
+
+    Args:
+        arquivos: Lista de tuples (nome do arquivo, bytes)
+        max_workers: Limite de processos (padrão: PROCESSOS_LEITURA); com um
+                     único arquivo ou limite 1 a leitura é feita no processo atual
+
+    Returns:
+        Dict com:
+        - 'dados': DataFrame no formato de ler_planilha_roi mais as colunas
+          origem (nome do arquivo sem extensão) e aba
+        - 'relatorio': DataFrame por aba (arquivo, aba, linhas, segundos, status)
+    """
+    inicio = time.perf_counter()
+    tarefas = list(arquivos)
+
+    workers = min(len(tarefas), max_workers or PROCESSOS_LEITURA, PROCESSOS_LEITURA)
+    if workers > 1:
+        try:
+            por_arquivo = list(_pool_leitura().map(_ler_arquivo, tarefas))
+        except BrokenProcessPool as e:
+            print(f"Pool de leitura indisponível, lendo no processo atual: {e}")
+            _descartar_pool()
+            workers = 1
+    if workers <= 1:
+        por_arquivo = [_ler_arquivo(t) for t in tarefas]
+
+    partes, relatorio = [], []
+    for nome, aba, df, segundos, erro in (r for resultados in por_arquivo for r in resultados):
+        if erro is None and not df.empty:
+            df = df.assign(origem=os.path.splitext(nome)[0], aba=aba or "")
+            partes.append(df)
+        relatorio.append({
+            "arquivo": nome,
+            "aba": aba or "",
+            "linhas": 0 if df is None else len(df),
+            "segundos": round(segundos, 3),
+            "status": erro or ("ok" if len(df) else "sem linhas válidas"),
+        })
+
+    if partes:
+        dados = pd.concat(partes, ignore_index=True)
+    else:
+        dados = pd.DataFrame(columns=["periodo", "receita_web", "total_ads", "mes_ano_str", "origem", "aba"])
+
+    return {
+        "dados": dados,
+        "relatorio": pd.DataFrame(relatorio),
+        "segundos": time.perf_counter() - inicio,
+        "workers": workers,
+    }
+
+
+def ler_tabela_retencao(arquivo, nome=None):
+    """
+    Lê uma tabela de retenção observada (coortes x meses relativos)
+
+    Cada linha é uma coorte e cada coluna numérica um mês relativo (1º mês,
+    2º mês, ...), com clientes ativos ou receita. Colunas sem nenhum número
+    (ex: rótulo da coorte) são descartadas; células vazias ficam NaN.
+
+    Args:
+        arquivo: Caminho ou arquivo aberto
+        nome: Nome do arquivo (para identificar o formato; padrão: arquivo.name)
+
+    Returns:
+        np.ndarray float coortes x meses
+    """
+    nome = (nome or getattr(arquivo, "name", str(arquivo))).lower()
+
+    if nome.endswith((".xlsx", ".xls")):
+        bruto = pd.read_excel(arquivo, dtype=object)
+    else:
+        bruto = pd.read_csv(arquivo, sep=None, engine="python", dtype=str)
+
+    colunas = [converter_numero_br(bruto[col]) for col in bruto.columns]
+    colunas = [c for c in colunas if c.notna().any()]
+    if not colunas:
+        return np.empty((0, 0))
+    return np.column_stack([c.to_numpy() for c in colunas])
+
+
+def ler_planilha_roi(arquivo, nome=None, tamanho_lote=TAMANHO_LOTE_PADRAO, aba=None):
+    """
+    Lê a planilha inteira em lotes, reduzindo cada lote a totais diários
+
+    Cada lote é somado por dia assim que é lido e incorporado ao acumulado,
+    então a memória depende do número de dias distintos e do tamanho do
+    lote, não do número de linhas do arquivo.
+
+    Returns:
+        DataFrame com uma linha por dia: periodo, receita_web, total_ads
+        e mes_ano_str
+    """
+    acumulado = None
+    for lote in ler_planilha_em_lotes(arquivo, nome, tamanho_lote, aba):
+        dias = somar_por_dia(lote)
+        acumulado = dias if acumulado is None else somar_por_dia(pd.concat([acumulado, dias]))
+
+    if acumulado is None:
+        return pd.DataFrame(columns=["periodo", "receita_web", "total_ads", "mes_ano_str"])
+    return acumulado
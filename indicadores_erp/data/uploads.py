@@ -0,0 +1,128 @@
+"""
+Cache compartilhado de uploads, indexado pelo conteúdo do arquivo
+
+O resultado do processamento de um upload (planilha lida + análise) fica
+guardado pela impressão digital (sha256) dos bytes enviados. Reruns da
+mesma sessão e outros usuários que enviarem o mesmo arquivo reaproveitam
+o resultado sem reler a planilha. O cache vive no processo do servidor e
+guarda os MAX_UPLOADS_EM_CACHE resultados usados mais recentemente.
+"""
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+MAX_UPLOADS_EM_CACHE = 16
+
+_cache = OrderedDict()
+_trava = threading.Lock()
+
+
+def impressao_conteudo(conteudo, nome=""):
+    """
+    Impressão digital de um upload
+
+    A extensão entra na impressão porque define como os bytes são lidos
+    (o mesmo conteúdo como .csv ou .xlsx não dá o mesmo resultado).
+
+    Args:
+        conteudo: Bytes do arquivo
+        nome: Nome do arquivo enviado
+
+    Returns:
+        String hexadecimal (sha256)
+    """
+    hasher = hashlib.sha256(conteudo)
+    hasher.update(os.path.splitext(nome)[1].lower().encode())
+    return hasher.hexdigest()
+
+
+def obter_resultado(impressao):
+    """
+    Resultado já processado de um upload
+
+    Returns:
+        O resultado guardado ou None se não estiver no cache
+    """
+    if impressao is None:
+        return None
+
+    with _trava:
+        resultado = _cache.get(impressao)
+        if resultado is not None:
+            _cache.move_to_end(impressao)
+        return resultado
+
+
+def guardar_resultado(impressao, resultado):
+    """Guarda um resultado, descartando os menos usados acima do limite"""
+    with _trava:
+        _cache[impressao] = resultado
+        _cache.move_to_end(impressao)
+        while len(_cache) > MAX_UPLOADS_EM_CACHE:
+            _cache.popitem(last=False)
+
+
+def obter_ou_calcular(chave, calcular):
+    """
+    Resultado em cache para a chave ou, se ausente, calcula e guarda
+
+    Args:
+        chave: Chave do resultado (ex: impressão do upload + parâmetros)
+        calcular: Função sem argumentos que produz o resultado
+
+    Returns:
+        O resultado
+    """
+    resultado = obter_resultado(chave)
+    if resultado is None:
+        resultado = calcular()
+        guardar_resultado(chave, resultado)
+    return resultado
+
+
+def processar_uploads(arquivos, processar):
+    """
+    Processa um conjunto de uploads uma única vez por conteúdo
+
+    A impressão do conjunto combina as impressões de cada arquivo (em ordem
+    de nome), então a ordem de envio não altera a chave.
+
+    Args:
+        arquivos: Lista de arquivos enviados
+        processar: Função (lista de tuples (nome, bytes)) -> resultado
+
+    Returns:
+        Tuple (impressão do conjunto, resultado)
+    """
+    entradas = sorted(
+        ((getattr(arquivo, "name", ""), arquivo.getvalue()) for arquivo in arquivos),
+        key=lambda entrada: entrada[0],
+    )
+    impressoes = [impressao_conteudo(conteudo, nome) for nome, conteudo in entradas]
+    impressao = hashlib.sha256(":".join(impressoes).encode()).hexdigest()
+
+    resultado = obter_ou_calcular(impressao, lambda: processar(entradas))
+    return impressao, resultado
+
+
+def processar_upload(arquivo, processar):
+    """
+    Processa um upload uma única vez por conteúdo
+
+    Args:
+        arquivo: Arquivo enviado (ex: UploadedFile do Streamlit)
+        processar: Função (arquivo em memória, nome) -> resultado; só é
+                   chamada quando o conteúdo ainda não está no cache
+
+    Returns:
+        Tuple (impressão do conteúdo, resultado)
+    """
+    conteudo = arquivo.getvalue()
+    nome = getattr(arquivo, "name", "")
+    impressao = impressao_conteudo(conteudo, nome)
+
+    resultado = obter_ou_calcular(impressao, lambda: processar(io.BytesIO(conteudo), nome))
+    return impressao, resultado
@@ -0,0 +1,54 @@
+"""
+Ingestão da base anonimizada de pares no índice de benchmark
+
+Lê a base em lotes, resume cada (segmento, métrica) em sketches de quantis
+e mescla no índice existente (DIR_ARTEFATOS/benchmark_pares.json). Rodar de
+novo com dados novos só acrescenta; use --recriar para começar do zero.
+
+USO:
+====
+    python ingestao_pares.py pares_2025.csv --segmentos porte regiao
+    python ingestao_pares.py pares_dez.parquet --segmentos porte
+"""
+import sys
+import time
+import argparse
+
+from utils.benchmark_pares import (
+    ARQUIVO_INDICE_PARES, METRICAS_PARES, COMPRESSAO_PADRAO,
+    ingerir_pares, carregar_indice, salvar_indice
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestão da base de pares em sketches de quantis")
+    parser.add_argument('arquivos', nargs='+', help="CSV ou Parquet com os KPIs dos pares")
+    parser.add_argument('--segmentos', nargs='*', default=[], help="Colunas que definem o segmento")
+    parser.add_argument('--metricas', nargs='+', default=METRICAS_PARES)
+    parser.add_argument('--indice', default=ARQUIVO_INDICE_PARES)
+    parser.add_argument('--compressao', type=int, default=COMPRESSAO_PADRAO)
+    parser.add_argument('--tamanho-lote', type=int, default=200_000)
+    parser.add_argument('--recriar', action='store_true', help="Ignora o índice existente")
+    args = parser.parse_args(argv)
+
+    indice = {} if args.recriar else carregar_indice(args.indice)
+
+    inicio = time.perf_counter()
+    for arquivo in args.arquivos:
+        indice = ingerir_pares(
+            arquivo, args.segmentos, args.metricas, indice,
+            tamanho_lote=args.tamanho_lote, compressao=args.compressao
+        )
+
+    salvar_indice(indice, args.indice)
+
+    n_pares = max((s['n'] for s in indice.get('Todos', {}).values()), default=0)
+    print(
+        f"{len(indice)} segmentos, {int(n_pares):,} observações no segmento 'Todos' "
+        f"em {time.perf_counter() - inicio:.1f}s -> {args.indice}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,23 @@
 """
 Tab 4: Comparação com Benchmarks + Análise Preditiva
 """
+import os
+import json
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
 
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import r2_score, mean_absolute_error
+from utils.calculations import avaliar_benchmarks_matriz, ROTULOS_STATUS
+from utils.modelos import obter_modelo_roi, impressao_dados, melhor_configuracao
+from utils.explicabilidade import obter_explicacao
+from utils.benchmark_pares import (
+    ARQUIVO_INDICE_PARES, SEGMENTO_TODOS, carregar_indice, percentil, quantil
+)
+from utils.sensibilidade import construir_eixos, prever_grade, fatia_2d, tornado
+from data.uploads import obter_resultado
+from tabs.tab_roi_receita import CHAVE_SESSAO_UPLOAD
 
 
 def _safe_mean(df: pd.DataFrame, col: str):
@@ -81,6 +90,37 @@ def _parse_caclvt_mean(df: pd.DataFrame, col: str = "CAC:LTV"):
     return vals.mean()
 
 
+@st.cache_resource(show_spinner="Carregando modelo de ROI...", max_entries=8)
+def _modelo_roi(impressao: str, features: tuple, configuracao: str,
+                _X: pd.DataFrame, _y: pd.Series):
+    """
+    Modelo de ROI compartilhado entre sessões e reruns.
+
+    O cache é indexado pela impressão digital dos dados, pelas variáveis e
+    pela configuração registrada no tuning; em um processo novo o modelo
+    vem do store em disco (utils.modelos).
+    """
+    return obter_modelo_roi(_X, _y)
+
+
+@st.cache_data(show_spinner="Pontuando a grade de cenários...", max_entries=4)
+def _varredura_roi(chave_modelo: str, limites: tuple, pontos_por_eixo: int, _model):
+    """
+    Grade de sensibilidade pontuada uma vez por (modelo, limites, resolução).
+
+    Trocar eixos, valores fixos ou tipo de gráfico apenas fatia o resultado.
+    """
+    eixos = construir_eixos(dict(limites), pontos_por_eixo)
+    features = [f for f, _ in limites]
+    return {"eixos": eixos, "features": features, "grade": prever_grade(_model, eixos, features)}
+
+
+@st.cache_data(show_spinner=False)
+def _indice_pares(modificado_em: float):
+    """Índice de pares recarregado só quando o arquivo muda."""
+    return carregar_indice()
+
+
 def render_tab_benchmarks(df_filtered: pd.DataFrame, benchmarks: dict):
     """
     Renderiza a tab de benchmarks + análise preditiva.
@@ -98,8 +138,10 @@ def render_tab_benchmarks(df_filtered: pd.DataFrame, benchmarks: dict):
     # --------------------------
     # Integração com ROI Receita
     # --------------------------
-    df_roi = st.session_state.get("df_roi_receita")
-    resumo_roi = st.session_state.get("resumo_roi_receita")
+    # Resultado em cache do último upload desta sessão (pela impressão do arquivo)
+    analise_roi = obter_resultado(st.session_state.get(CHAVE_SESSAO_UPLOAD)) or {}
+    df_roi = analise_roi.get("coortes")
+    resumo_roi = analise_roi.get("resumo")
 
     if resumo_roi is not None:
         with st.expander("Resumo de ROI em Receita (planilha importada)", expanded=False):
@@ -226,12 +268,102 @@ def render_tab_benchmarks(df_filtered: pd.DataFrame, benchmarks: dict):
     st.markdown("#### Visão Geral vs Benchmarks")
     st.dataframe(benchmark_data, use_container_width=True, hide_index=True)
 
+    # ================================
+    # Posição entre pares (percentis)
+    # ================================
+    indice_pares = {}
+    if os.path.exists(ARQUIVO_INDICE_PARES):
+        indice_pares = _indice_pares(os.path.getmtime(ARQUIVO_INDICE_PARES))
+
+    if indice_pares:
+        st.markdown("#### Posição entre Pares")
+        segmentos = sorted(indice_pares, key=lambda seg: (seg != SEGMENTO_TODOS, seg))
+        segmento = st.selectbox("Segmento de comparação", segmentos, key="segmento_pares")
+        sketches = indice_pares[segmento]
+
+        suas_medias = {
+            "TC Usuários (%)": tc_usuarios,
+            "TC Leads (%)": tc_leads,
+            "CAC": cac,
+            "ROI (%)": roi,
+            "Ticket Médio": ticket,
+        }
+        linhas_pares = []
+        for metrica, valor in suas_medias.items():
+            sketch = sketches.get(metrica)
+            if sketch is None or np.isnan(valor):
+                continue
+            pct = percentil(sketch, valor)
+            melhor_que = pct if bench[metrica]["maior_melhor"] else 100 - pct
+            p25, p50, p75 = quantil(sketch, [0.25, 0.5, 0.75])
+            linhas_pares.append({
+                "Métrica": metrica,
+                "Sua Média": valor,
+                "Percentil": pct,
+                "Melhor que (% dos pares)": melhor_que,
+                "P25 pares": p25,
+                "Mediana pares": p50,
+                "P75 pares": p75,
+                "Pares": int(sketch["n"]),
+            })
+
+        if linhas_pares:
+            st.dataframe(
+                pd.DataFrame(linhas_pares).style.format({
+                    "Sua Média": "{:,.2f}", "Percentil": "{:.0f}",
+                    "Melhor que (% dos pares)": "{:.0f}%", "P25 pares": "{:,.2f}",
+                    "Mediana pares": "{:,.2f}", "P75 pares": "{:,.2f}", "Pares": "{:,}",
+                }),
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            st.info("O segmento escolhido não tem dados para as métricas disponíveis.")
+
     # ==============================
     # 3. Série temporal vs benchmarks
     # ==============================
     st.markdown("---")
     st.markdown("#### Evolução no Tempo vs Benchmarks")
 
+    # Mapa de status: todas as métricas x todos os meses em uma passada
+    matriz_bench = avaliar_benchmarks_matriz(df_filtered, benchmarks)
+    if matriz_bench["metricas"]:
+        textos = np.vectorize(ROTULOS_STATUS.get)(matriz_bench["status"])
+        hover = np.char.add(
+            np.char.add(textos.astype(str), "<br>Valor: "),
+            np.char.mod("%.2f", matriz_bench["valores"]),
+        )
+        hover = np.char.add(
+            np.char.add(hover, "<br>Distância da faixa: "),
+            np.char.mod("%+.2f", np.nan_to_num(matriz_bench["distancia"])),
+        )
+
+        fig_status = go.Figure(go.Heatmap(
+            z=matriz_bench["status"],
+            x=matriz_bench["periodos"],
+            y=matriz_bench["metricas"],
+            text=hover,
+            hovertemplate="%{y} | %{x}<br>%{text}<extra></extra>",
+            zmin=-1,
+            zmax=2,
+            colorscale=[
+                [0.0, "#d1d5db"], [0.25, "#d1d5db"],
+                [0.25, "#ef4444"], [0.5, "#ef4444"],
+                [0.5, "#86efac"], [0.75, "#86efac"],
+                [0.75, "#16a34a"], [1.0, "#16a34a"],
+            ],
+            showscale=False,
+            xgap=2,
+            ygap=2,
+        ))
+        fig_status.update_layout(
+            title="Status de cada métrica por mês (vermelho = pior que o benchmark, "
+                  "verde escuro = melhor, cinza = sem dados)",
+            height=60 * len(matriz_bench["metricas"]) + 120,
+        )
+        st.plotly_chart(fig_status, use_container_width=True)
+
     # tentar descobrir a coluna de data/mês
     col_data = "Mês" if "Mês" in df_filtered.columns else ("Data" if "Data" in df_filtered.columns else None)
     if col_data is not None:
@@ -300,7 +432,7 @@ def render_tab_benchmarks(df_filtered: pd.DataFrame, benchmarks: dict):
     st.markdown("#### Análise Preditiva (scikit-learn)")
 
     st.write(
-        "Aqui usamos um modelo de regressão (RandomForest) para estimar o **ROI (%)** "
+        "Aqui usamos um modelo de regressão (RandomForest ou o vencedor do tuning) para estimar o **ROI (%)** "
         "com base em variáveis como CAC, taxas de conversão e ticket médio. "
         "Isso NÃO substitui benchmarks, mas ajuda a entender para onde você está indo "
         "se mantiver o comportamento atual."
@@ -338,46 +470,89 @@ def render_tab_benchmarks(df_filtered: pd.DataFrame, benchmarks: dict):
     X = df_ml[feature_cols]
     y = df_ml[target_col]
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.25, random_state=42
-    )
-
-    model = RandomForestRegressor(
-        n_estimators=200,
-        random_state=42,
-        max_depth=6,
-        n_jobs=-1,
+    # Treina só quando dados ou variáveis mudam; senão reutiliza o modelo salvo
+    configuracao = melhor_configuracao(feature_cols)
+    artefato = _modelo_roi(
+        impressao_dados(X, y),
+        tuple(feature_cols),
+        json.dumps(configuracao, sort_keys=True, default=str),
+        X, y
     )
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
+    model = artefato["modelo"]
 
-    r2 = r2_score(y_test, y_pred)
-    mae = mean_absolute_error(y_test, y_pred)
+    r2 = artefato["metricas"]["R²"]
+    mae = artefato["metricas"]["MAE"]
 
     col_m1, col_m2 = st.columns(2)
     col_m1.metric("R² (explicação do modelo)", f"{r2:.2f}")
     col_m2.metric("Erro Absoluto Médio (p.p. de ROI)", f"{mae:.1f}")
 
+    st.caption(
+        f"Modelo {artefato.get('tipo', 'random_forest')} ({artefato['chave']}) treinado em {artefato['treinado_em']} "
+        f"({'carregado do store' if artefato['origem'] == 'disco' else 'treinado agora'})."
+    )
+
     st.write(
         "Valores típicos: R² próximo de 1 indica que o modelo explica bem a variação do ROI. "
-        "Um MAE baixo (por ex. < 30 p.p.) indica boa precisão prática."
+        "Um MAE baixo (por ex. < 30 p.p.) indica boa precisão prática. "
+        "As métricas são medidas nos meses mais recentes (teste fora da amostra)."
     )
 
-    # Importância das variáveis
-    importances = pd.DataFrame({
-        "feature": feature_cols,
-        "importance": model.feature_importances_,
-    }).sort_values("importance", ascending=False)
-
+    # Importância das variáveis: por permutação (calculada em segundo plano)
     st.markdown("##### Variáveis que mais explicam o ROI (%)")
-    fig_imp = px.bar(
-        importances,
-        x="feature",
-        y="importance",
-        labels={"feature": "Variável", "importance": "Importância relativa"},
-        title="Importância das variáveis no modelo de ROI (%)",
-    )
-    st.plotly_chart(fig_imp, use_container_width=True)
+    explicacao = obter_explicacao(artefato, X, y)
+
+    if explicacao["status"] == "pronto":
+        fig_imp = px.bar(
+            explicacao["importancia"],
+            x="variavel",
+            y="importancia",
+            error_y="desvio",
+            labels={"variavel": "Variável", "importancia": "Aumento do erro (p.p. de ROI)"},
+            title="Importância por permutação no modelo de ROI (%)",
+        )
+        st.plotly_chart(fig_imp, use_container_width=True)
+        st.caption(
+            "Quanto o erro médio do modelo nos meses mais recentes aumenta quando os "
+            "valores da variável são embaralhados."
+        )
+
+        with st.expander("Dependência parcial (efeito isolado de cada variável)", expanded=False):
+            feat_dep = st.selectbox(
+                "Variável", list(explicacao["dependencia"]), key="dependencia_parcial_roi"
+            )
+            curva = explicacao["dependencia"][feat_dep]
+            fig_dep = px.line(
+                x=curva["valores"],
+                y=curva["media"],
+                labels={"x": feat_dep, "y": "ROI (%) médio previsto"},
+                title=f"Dependência parcial do ROI (%) em {feat_dep}",
+            )
+            st.plotly_chart(fig_dep, use_container_width=True)
+    else:
+        if explicacao["status"] == "erro":
+            st.warning("Não foi possível calcular a importância por permutação para este modelo.")
+        else:
+            st.info(
+                "Importância por permutação e dependência parcial sendo calculadas em "
+                "segundo plano. Elas aparecem aqui na próxima atualização da página."
+            )
+            st.button("Atualizar", key="atualizar_explicacao_roi")
+
+        if hasattr(model, "feature_importances_"):
+            importances = pd.DataFrame({
+                "feature": feature_cols,
+                "importance": model.feature_importances_,
+            }).sort_values("importance", ascending=False)
+
+            fig_imp = px.bar(
+                importances,
+                x="feature",
+                y="importance",
+                labels={"feature": "Variável", "importance": "Importância relativa"},
+                title="Importância das variáveis no modelo de ROI (%) (por impureza, provisória)",
+            )
+            st.plotly_chart(fig_imp, use_container_width=True)
 
     # =======================================
     # 5. Simulador preditivo (cenário futuro)
@@ -409,7 +584,7 @@ def render_tab_benchmarks(df_filtered: pd.DataFrame, benchmarks: dict):
         submitted = st.form_submit_button("Prever ROI (%)")
 
     if submitted:
-        X_new = pd.DataFrame([valores_input])
+        X_new = pd.DataFrame([valores_input])[artefato["features"]]
         roi_prev = float(model.predict(X_new)[0])
 
         st.success(f"ROI previsto para o cenário simulado: **{roi_prev:,.1f}%**")
@@ -422,4 +597,93 @@ def render_tab_benchmarks(df_filtered: pd.DataFrame, benchmarks: dict):
             info_bench_roi["max"],
             info_bench_roi["maior_melhor"],
         )
-        st.write(f"Status em relação ao benchmark de ROI: {status_previsto}")
\ No newline at end of file
+        st.write(f"Status em relação ao benchmark de ROI: {status_previsto}")
+
+    # =======================================
+    # 6. Sensibilidade (varredura em grade)
+    # =======================================
+    st.markdown("##### Sensibilidade do ROI (%) às variáveis")
+    st.caption(
+        "O modelo é avaliado em todas as combinações de valores dentro da faixa histórica "
+        "de cada variável. A grade é calculada uma vez por modelo; mudar os eixos ou os "
+        "valores fixos só recorta o resultado."
+    )
+
+    col_s1, col_s2 = st.columns([1, 2])
+    pontos_por_eixo = col_s1.select_slider(
+        "Pontos por variável",
+        options=[8, 12, 16, 24, 32],
+        value=16,
+        help="Total de cenários = pontos ^ número de variáveis",
+    )
+    tipo_grafico = col_s2.radio(
+        "Visualização",
+        ["Mapa de calor", "Curvas de nível", "Tornado"],
+        horizontal=True,
+    )
+
+    limites = tuple(
+        (feat, (float(df_ml[feat].min()), float(df_ml[feat].max())))
+        for feat in artefato["features"]
+    )
+    varredura = _varredura_roi(artefato["chave"], limites, pontos_por_eixo, model)
+    eixos = varredura["eixos"]
+    features_grade = varredura["features"]
+    st.caption(f"{varredura['grade'].size:,} cenários avaliados.".replace(",", "."))
+
+    if tipo_grafico == "Tornado":
+        base = {feat: float(df_ml[feat].mean()) for feat in features_grade}
+        df_tornado = tornado(varredura["grade"], eixos, features_grade, base)
+        roi_base = df_tornado["roi_base"].iloc[0]
+
+        fig_sens = go.Figure()
+        fig_sens.add_trace(go.Bar(
+            y=df_tornado["variavel"], x=df_tornado["roi_minimo"] - roi_base,
+            base=roi_base, orientation="h", name="No mínimo da faixa",
+            marker_color="#ef4444",
+        ))
+        fig_sens.add_trace(go.Bar(
+            y=df_tornado["variavel"], x=df_tornado["roi_maximo"] - roi_base,
+            base=roi_base, orientation="h", name="No máximo da faixa",
+            marker_color="#10b981",
+        ))
+        fig_sens.update_layout(
+            barmode="overlay",
+            title=f"ROI (%) ao variar cada item (cenário médio: {roi_base:,.1f}%)",
+            xaxis_title="ROI (%) previsto",
+            height=350,
+        )
+    elif len(features_grade) < 2:
+        st.info("É necessário ao menos duas variáveis para o mapa de sensibilidade.")
+        fig_sens = None
+    else:
+        col_x, col_y = st.columns(2)
+        eixo_x = col_x.selectbox("Eixo horizontal", features_grade, index=0)
+        opcoes_y = [f for f in features_grade if f != eixo_x]
+        eixo_y = col_y.selectbox("Eixo vertical", opcoes_y, index=0)
+
+        fixos = {}
+        outras = [f for f in features_grade if f not in (eixo_x, eixo_y)]
+        if outras:
+            cols_fixas = st.columns(len(outras))
+            for col_f, feat in zip(cols_fixas, outras):
+                valores = [round(float(v), 2) for v in eixos[feat]]
+                fixos[feat] = col_f.select_slider(
+                    f"{feat} (fixo)", options=valores, value=valores[len(valores) // 2]
+                )
+
+        z = fatia_2d(varredura["grade"], eixos, features_grade, eixo_x, eixo_y, fixos)
+        trace = go.Heatmap if tipo_grafico == "Mapa de calor" else go.Contour
+        fig_sens = go.Figure(trace(
+            x=eixos[eixo_x], y=eixos[eixo_y], z=z,
+            colorscale="RdYlGn", colorbar=dict(title="ROI (%)"),
+        ))
+        fig_sens.update_layout(
+            title=f"ROI (%) previsto: {eixo_x} x {eixo_y}",
+            xaxis_title=eixo_x,
+            yaxis_title=eixo_y,
+            height=450,
+        )
+
+    if fig_sens is not None:
+        st.plotly_chart(fig_sens, use_container_width=True)
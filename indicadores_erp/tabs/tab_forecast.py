@@ -8,6 +8,7 @@ Os dados são apurados no PRIMEIRO DIA ÚTIL do mês seguinte.
 Para atualizar meses apurados, edite o arquivo: config_apuracao.py
 """
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -18,6 +19,27 @@ from utils.forecast import (
     interpretar_tendencia
 )
 from utils.charts import criar_grafico_projecao
+from utils.simulacao import (
+    ajustar_distribuicoes_funil,
+    simular_funil,
+    probabilidade_conjunta
+)
+from utils.ajustes import (
+    compilar_matriz_ajustes,
+    aplicar_matriz_ajustes,
+    eventos_no_periodo
+)
+from utils.intervencao import (
+    estimar_efeitos_eventos,
+    calendario_com_estimativas
+)
+from utils.hierarquia import matriz_agregacao, reconciliar_previsoes
+from utils.tendencia import mann_kendall_lote, matriz_series
+from utils.correlacao import correlacao_cruzada_fft
+from utils.incremental import atualizar_estado_serie, prever_com_estado
+from config.settings import BENCHMARKS, HIERARQUIAS
+from data.loader import load_data
+from config.calendario import get_eventos_forecast
 
 # Tenta importar a configuração de apuração
 try:
@@ -29,6 +51,20 @@ except ImportError:
     # IMPORTANTE: Set/25 está incluído - é o último mês apurado
     MESES_APURADOS_FALLBACK = ['Mai/25', 'Jun/25', 'Jul/25', 'Ago/25', 'Set/25']
 
+# Semente fixa para que o intervalo bootstrap não mude a cada interação
+SEED_BOOTSTRAP = 42
+
+# Correlação defasada: séries que antecedem (custos) e séries afetadas (funil)
+ORIGENS_LAG = ['Custo Meta', 'Custo Google', 'Total Ads']
+DESTINOS_LAG = ['Sessões', 'Leads', 'Clientes Web', 'Receita Web']
+MAX_LAG_MESES = 3
+
+# Cenários retornados por prever_cenarios, na ordem usada pela matriz de ajustes
+CENARIOS = ['previsao', 'otimista', 'conservador']
+
+# Trajetórias por cenário no simulador de funil (~0,5 s)
+N_SIMULACOES_FUNIL = 1_000_000
+
 
 def get_ultimo_mes_apurado(df):
     """
@@ -70,96 +106,6 @@ def get_meses_forecast(ultimo_mes_apurado, df):
     return meses_forecast
 
 
-def aplicar_ajustes_precos(previsao_base, mes, ticket_medio_atual):
-    """
-    Aplica ajustes de preços dos novos planos
-    
-    Novos preços:
-    - MEI: R$ 84,90
-    - Simples Nacional: R$ 154,90
-    - Lucro Real/Presumido: R$ 199,90
-    
-    Ticket Médio estimado: R$ 146,56 (considerando distribuição de clientes)
-    """
-    # Novo ticket médio ponderado (estimativa)
-    novo_ticket_medio = 146.56
-    
-    # Aumento percentual
-    aumento_percentual = (novo_ticket_medio / ticket_medio_atual) - 1
-    
-    # Aplica gradualmente a partir de Out/25
-    if mes == 'Out/25':
-        # Início gradual (20% dos clientes no novo preço)
-        fator = 1 + (aumento_percentual * 0.20)
-    elif mes == 'Nov/25':
-        # Metade dos clientes migrados
-        fator = 1 + (aumento_percentual * 0.50)
-    elif mes == 'Dez/25':
-        # Maioria dos clientes no novo preço
-        fator = 1 + (aumento_percentual * 0.80)
-    else:
-        # Totalmente migrado
-        fator = 1 + aumento_percentual
-    
-    return previsao_base * fator
-
-
-def aplicar_campanha_black_friday(previsao_base, mes, metrica):
-    """
-    Aplica efeito da campanha Black Friday
-    
-    Campanha:
-    - Última semana de Out/25: Esquenta Black (pequeno aumento)
-    - Nov/25 completo: Black Friday principal (grande aumento)
-    - Até 12/Dez: Extensão (redução gradual)
-    - Pós 12/Dez: Parada operacional (forte redução)
-    """
-    
-    if metrica in ['Leads', 'Sessões', 'Primeira Visita', 'Clientes Web']:
-        # Aumento de tráfego e conversões
-        if mes == 'Out/25':
-            # Esquenta Black (última semana representa ~25% do mês)
-            return previsao_base * 1.15  # +15% no mês
-        elif mes == 'Nov/25':
-            # Black Friday mês completo
-            return previsao_base * 1.45  # +45% no mês
-        elif mes == 'Dez/25':
-            # Até dia 12 (40% do mês) + parada depois
-            return previsao_base * 0.85  # -15% (média do mês)
-    
-    elif metrica in ['Receita Web']:
-        # Receita considerando desconto de até 50% nos 4 primeiros meses
-        if mes == 'Out/25':
-            # Esquenta com desconto menor
-            return previsao_base * 1.10  # +10% (mais clientes, desconto moderado)
-        elif mes == 'Nov/25':
-            # Black Friday com desconto maior, mas muito mais volume
-            return previsao_base * 1.25  # +25% (desconto compensado por volume)
-        elif mes == 'Dez/25':
-            # Redução por parada
-            return previsao_base * 0.75  # -25%
-    
-    elif metrica in ['CAC']:
-        # CAC tende a subir em campanhas agressivas
-        if mes == 'Out/25':
-            return previsao_base * 1.10
-        elif mes == 'Nov/25':
-            return previsao_base * 1.20  # Competição aumenta CPC
-        elif mes == 'Dez/25':
-            return previsao_base * 0.90  # Redução de investimento
-    
-    elif metrica in ['Total Ads', 'Custo Meta', 'Custo Google']:
-        # Aumento de investimento em ads
-        if mes == 'Out/25':
-            return previsao_base * 1.20
-        elif mes == 'Nov/25':
-            return previsao_base * 1.50  # Investimento máximo
-        elif mes == 'Dez/25':
-            return previsao_base * 0.60  # Redução significativa
-    
-    return previsao_base
-
-
 def render_tab_forecast(df):
     """
     Renderiza a tab de forecast com lógica de apuração
@@ -256,25 +202,16 @@ def render_tab_forecast(df):
         """)
     
     
-    # Info sobre campanhas
-    if 'Out/25' in meses_forecast or 'Nov/25' in meses_forecast or 'Dez/25' in meses_forecast:
-        st.markdown("""
-        ---
-        ### 🎯 Eventos Considerados no Forecast
-        
-        **Aumento de Preços dos Planos:**
-        - MEI: R$ 84,90
-        - Simples Nacional: R$ 154,90
-        - Lucro Real/Presumido: R$ 199,90
-        
-        **Campanha Black Friday 2025:**
-        - 🔥 **Última semana de Out/25:** Esquenta Black (aumento moderado)
-        - 🚀 **Nov/25 completo:** Black Friday principal (até 50% OFF nos 4 primeiros meses)
-        - 📉 **Até 12/Dez:** Extensão da campanha
-        - 🛑 **Pós 12/Dez:** Parada operacional de fim de ano
-        
-        ---
-        """)
+    # Info sobre campanhas (cadastradas em config/calendario.py)
+    eventos = get_eventos_forecast()
+    eventos_periodo = eventos_no_periodo(eventos, meses_forecast)
+    if eventos_periodo:
+        texto_eventos = "---\n### 🎯 Eventos Considerados no Forecast\n"
+        for evento in eventos_periodo:
+            texto_eventos += f"\n**{evento['nome']}:**\n"
+            for linha in evento.get('descricao', []):
+                texto_eventos += f"- {linha}\n"
+        st.markdown(texto_eventos + "\n---")
     
     try:
         # Filtra apenas dados apurados (usando a lista oficial de meses apurados)
@@ -301,10 +238,131 @@ def render_tab_forecast(df):
         # Ticket médio atual para cálculo de ajuste
         ticket_medio_atual = df_historico['Ticket Médio'].iloc[-1]
         
+        # Método do intervalo de previsão
+        opcao_intervalo = st.radio(
+            "Intervalo de previsão:",
+            ["Gaussiano (±1,96σ)", "Bootstrap de resíduos"],
+            horizontal=True,
+            help=(
+                "O bootstrap reamostra os resíduos do histórico e respeita "
+                "assimetrias (ex: salto do CAC em Out/25), em vez de assumir "
+                "uma faixa simétrica."
+            )
+        )
+        metodo_intervalo = 'bootstrap' if opcao_intervalo.startswith("Bootstrap") else 'gaussiano'
+        
+        # Reconciliação das séries hierárquicas (ex: Total Ads = Meta + Google)
+        opcoes_reconciliacao = {
+            "Nenhuma": None,
+            "Bottom-up": 'bottom_up',
+            "Top-down": 'top_down',
+            "MinT (covariância encolhida)": 'mint'
+        }
+        opcao_reconciliacao = st.selectbox(
+            "Reconciliação hierárquica de Ads (Total Ads = Custo Meta + Custo Google):",
+            list(opcoes_reconciliacao.keys()),
+            index=3
+        )
+        metodo_reconciliacao = opcoes_reconciliacao[opcao_reconciliacao]
+        
+        S_hierarquia, series_hierarquia, folhas_hierarquia = matriz_agregacao(HIERARQUIAS)
+        series_previsao = kpis + [s for s in series_hierarquia if s not in kpis]
+        
         # Calcular previsões
         resultados = {}
-        for kpi in kpis:
-            resultados[kpi] = prever_cenarios(df_historico, kpi, num_previsoes=len(meses_forecast))
+        for kpi in series_previsao:
+            resultados[kpi] = prever_cenarios(
+                df_historico, kpi,
+                num_previsoes=len(meses_forecast),
+                metodo_intervalo=metodo_intervalo,
+                seed=SEED_BOOTSTRAP
+            )
+        
+        # Efeitos das campanhas passadas estimados a partir do histórico
+        estimativas = estimar_efeitos_eventos(
+            df_historico,
+            kpis + ['Sessões', 'Primeira Visita', 'Custo Meta', 'Custo Google'],
+            eventos
+        )
+        eventos_ajuste = eventos
+        
+        if estimativas is not None:
+            with st.expander("📐 Efeito estimado das campanhas (análise de intervenção)"):
+                st.caption(
+                    "Regressão com nível, tendência e regressores de pulso (campanhas) "
+                    "e degrau (preços), em escala log (ROI em nível), usando os meses "
+                    "válidos de cada KPI. Regressores que se confundem com outros no "
+                    "histórico aparecem como não identificáveis."
+                )
+                st.dataframe(
+                    estimativas.drop(columns=['Efeito', 'Erro padrão']).round(3),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            
+            usar_estimativas = st.checkbox(
+                "Usar efeitos estimados no lugar dos multiplicadores configurados",
+                value=False
+            )
+            if usar_estimativas:
+                eventos_ajuste = calendario_com_estimativas(eventos, estimativas)
+        
+        # Aplica campanhas e ajustes de preço do calendário em um único passo
+        # (KPIs x cenários x meses) * (KPIs x meses)
+        kpis_previstos = [kpi for kpi in series_previsao if resultados[kpi]]
+        matriz_ajustes = compilar_matriz_ajustes(
+            eventos_ajuste, meses_forecast, kpis_previstos,
+            contexto={'ticket_medio_atual': ticket_medio_atual}
+        )
+        previsoes_base = np.array([
+            [resultados[kpi][cenario].values for cenario in CENARIOS]
+            for kpi in kpis_previstos
+        ]).reshape(len(kpis_previstos), len(CENARIOS), len(meses_forecast))
+        previsoes_ajustadas = aplicar_matriz_ajustes(previsoes_base, matriz_ajustes)
+        ajustadas = {
+            kpi: dict(zip(CENARIOS, previsoes_ajustadas[i]))
+            for i, kpi in enumerate(kpis_previstos)
+        }
+        
+        # Reconciliação depois dos ajustes do calendário, para que campanhas
+        # em um canal não quebrem a soma; só a previsão pontual é reconciliada
+        # (as faixas não são aditivas entre séries) e cada faixa é deslocada
+        # pelo mesmo ajuste, para continuar centrada na previsão reconciliada
+        if metodo_reconciliacao and all(s in ajustadas for s in series_hierarquia):
+            base_hierarquia = np.array([ajustadas[serie]['previsao'] for serie in series_hierarquia])
+            n_residuos = min(len(resultados[s]['residuos']) for s in series_hierarquia)
+            residuos_hierarquia = np.column_stack([
+                resultados[serie]['residuos'][-n_residuos:] for serie in series_hierarquia
+            ])
+            totais = df_historico[folhas_hierarquia].sum()
+            reconciliadas = reconciliar_previsoes(
+                base_hierarquia,
+                S_hierarquia,
+                metodo=metodo_reconciliacao,
+                residuos=residuos_hierarquia,
+                proporcoes=(totais / totais.sum()).values
+            )
+            for i, serie in enumerate(series_hierarquia):
+                delta = reconciliadas[i] - base_hierarquia[i]
+                ajustadas[serie]['previsao'] = reconciliadas[i]
+                ajustadas[serie]['otimista'] = ajustadas[serie]['otimista'] + delta
+                ajustadas[serie]['conservador'] = np.maximum(ajustadas[serie]['conservador'] + delta, 0)
+        
+        # Teste de tendência de todos os KPIs em uma única passada
+        teste_tendencia = mann_kendall_lote(matriz_series(df_historico, kpis))
+        with st.expander("📈 Teste de tendência (Mann-Kendall) para todos os KPIs"):
+            direcoes = {1: "📈 Crescente", -1: "📉 Decrescente", 0: "➖ Estável"}
+            st.dataframe(
+                pd.DataFrame({
+                    'KPI': kpis,
+                    'Tau': teste_tendencia['tau'],
+                    'P-valor': teste_tendencia['p_valor'],
+                    'Inclinação de Sen (por mês)': teste_tendencia['sen'],
+                    'Tendência (5%)': [direcoes[t] for t in teste_tendencia['tendencia']]
+                }).round(3),
+                use_container_width=True,
+                hide_index=True
+            )
         
         # Exibir resultados
         st.markdown("### Previsões com Validação Estatística")
@@ -316,39 +374,14 @@ def render_tab_forecast(df):
                 col1, col2 = st.columns([2, 1])
                 
                 with col1:
-                    # Aplica ajustes nas previsões
-                    previsoes_ajustadas = []
-                    otimista_ajustado = []
-                    conservador_ajustado = []
-                    
-                    for i, mes in enumerate(meses_forecast):
-                        prev_base = resultados[kpi]['previsao'].iloc[i]
-                        otim_base = resultados[kpi]['otimista'].iloc[i]
-                        cons_base = resultados[kpi]['conservador'].iloc[i]
-                        
-                        # Aplica campanha Black Friday
-                        prev_base = aplicar_campanha_black_friday(prev_base, mes, kpi)
-                        otim_base = aplicar_campanha_black_friday(otim_base, mes, kpi)
-                        cons_base = aplicar_campanha_black_friday(cons_base, mes, kpi)
-                        
-                        # Aplica ajuste de preços (apenas para Receita Web e LTV)
-                        if kpi in ['Receita Web', 'LTV']:
-                            prev_base = aplicar_ajustes_precos(prev_base, mes, ticket_medio_atual)
-                            otim_base = aplicar_ajustes_precos(otim_base, mes, ticket_medio_atual)
-                            cons_base = aplicar_ajustes_precos(cons_base, mes, ticket_medio_atual)
-                        
-                        previsoes_ajustadas.append(prev_base)
-                        otimista_ajustado.append(otim_base)
-                        conservador_ajustado.append(cons_base)
-                    
                     # Gráfico com previsões ajustadas
                     fig = criar_grafico_projecao(
                         meses_historico=meses_historico,
                         valores_historico=df_historico[kpi].tolist(),
                         meses_previsao=meses_forecast,
-                        valores_previsao=previsoes_ajustadas,
-                        valores_otimista=otimista_ajustado,
-                        valores_conservador=conservador_ajustado,
+                        valores_previsao=ajustadas[kpi]['previsao'].tolist(),
+                        valores_otimista=ajustadas[kpi]['otimista'].tolist(),
+                        valores_conservador=ajustadas[kpi]['conservador'].tolist(),
                         title=f"Previsão: {kpi} (com ajustes de campanha)",
                         height=400
                     )
@@ -391,6 +424,116 @@ def render_tab_forecast(df):
                 
                 st.markdown("---")
         
+        # Previsão hierárquica de investimento em Ads
+        if all(s in ajustadas for s in series_hierarquia):
+            with st.expander("🧩 Previsão hierárquica de Ads (por canal)"):
+                df_hierarquia = pd.DataFrame(
+                    {serie: ajustadas[serie]['previsao'] for serie in series_hierarquia},
+                    index=meses_forecast
+                )
+                st.dataframe(
+                    df_hierarquia.style.format("R$ {:,.2f}"),
+                    use_container_width=True
+                )
+                if metodo_reconciliacao:
+                    st.caption(
+                        f"Reconciliação: {opcao_reconciliacao}. "
+                        "Na previsão pontual o total é exatamente a soma dos canais; "
+                        "as faixas otimista/conservador de cada série não são somáveis."
+                    )
+                else:
+                    st.caption("Sem reconciliação: cada série foi prevista de forma independente.")
+            st.markdown("---")
+        
+        # Estados incrementais (RLS / Holt) persistidos por série
+        with st.expander("⚡ Modelos incrementais (RLS e Holt)"):
+            st.caption(
+                "Cada KPI guarda seu estado ajustado em disco. Quando um novo mês é "
+                "apurado, apenas ele é incorporado ao estado, sem reajustar o histórico."
+            )
+            try:
+                # O estado é compartilhado por todos os usuários: usa o histórico
+                # apurado completo, nunca o recorte dos filtros da sidebar
+                df_estados = load_data()
+                df_estados = df_estados[df_estados['Mês'].isin(meses_apurados_lista)]
+
+                linhas_estado = []
+                for kpi in kpis:
+                    estado = atualizar_estado_serie(df_estados, kpi)
+                    if estado is None:
+                        continue
+                    prev_rls = prever_com_estado(estado, len(meses_forecast), 'tendencia')
+                    prev_holt = prever_com_estado(estado, len(meses_forecast), 'holt')
+                    linhas_estado.append({
+                        'KPI': kpi,
+                        'Último mês incorporado': estado['ultimo_periodo'],
+                        'Pontos': estado['tendencia']['n'],
+                        f'RLS ({meses_forecast[0]})': prev_rls['previsao'].iloc[0],
+                        f'Holt ({meses_forecast[0]})': prev_holt['previsao'].iloc[0]
+                    })
+                st.dataframe(
+                    pd.DataFrame(linhas_estado).round(2),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            except OSError as e:
+                st.warning(f"Não foi possível acessar o diretório de estados: {e}")
+        
+        # Simulação Monte Carlo do funil
+        st.markdown("### 🎲 Simulação do Funil (Monte Carlo)")
+        st.caption(
+            "Sorteia sessões, taxas de conversão, ticket e investimento a partir do "
+            "histórico apurado e propaga cada trajetória pelo funil, mantendo "
+            "Leads, Clientes, Receita, CAC e ROI coerentes entre si."
+        )
+        
+        parametros_funil = ajustar_distribuicoes_funil(df_historico)
+        
+        if parametros_funil:
+            col_s1, col_s2, col_s3, col_s4 = st.columns(4)
+            var_sessoes = col_s1.slider("Sessões (%)", -50, 100, 0, step=5)
+            var_invest = col_s2.slider("Investimento em Ads (%)", -50, 100, 0, step=5)
+            var_ticket = col_s3.slider("Ticket Médio (%)", -30, 50, 0, step=5)
+            var_tc = col_s4.slider("Taxas de conversão (%)", -50, 50, 0, step=5)
+            
+            simulacao = simular_funil(
+                parametros_funil,
+                n_simulacoes=N_SIMULACOES_FUNIL,
+                variacoes={
+                    'sessoes': 1 + var_sessoes / 100,
+                    'investimento': 1 + var_invest / 100,
+                    'ticket': 1 + var_ticket / 100,
+                    'tc_usuarios': 1 + var_tc / 100,
+                    'tc_leads': 1 + var_tc / 100
+                },
+                seed=SEED_BOOTSTRAP
+            )
+            
+            tabela_quantis = simulacao['quantis'].rename(
+                columns=lambda q: f"P{q * 100:.0f}"
+            )
+            st.dataframe(tabela_quantis.style.format("{:,.1f}"), use_container_width=True)
+            
+            prob_benchmark = probabilidade_conjunta(
+                simulacao,
+                cac_max=BENCHMARKS['CAC']['max'],
+                roi_min=BENCHMARKS['ROI (%)']['min']
+            )
+            
+            col_p1, col_p2 = st.columns(2)
+            col_p1.metric(
+                "Prob. de CAC e ROI dentro do benchmark",
+                f"{prob_benchmark * 100:.1f}%"
+            )
+            col_p2.metric(
+                "Prob. de ROI negativo",
+                f"{simulacao['prob_roi_negativo'] * 100:.1f}%"
+            )
+        else:
+            st.info("Histórico insuficiente para ajustar as distribuições do funil.")
+        
+        st.markdown("---")
+        
         # Análise de correlação
         st.markdown("### Análise de Correlação entre KPIs")
         corr_matrix = df_historico[kpis].corr()
@@ -407,6 +550,54 @@ def render_tab_forecast(df):
         )
         st.plotly_chart(fig_corr, use_container_width=True)
         
+        # Correlação defasada: investimento no mês t x funil no mês t + lag
+        st.markdown("### ⏱️ Correlação Defasada: Investimento → Funil")
+        
+        origens_lag = [c for c in ORIGENS_LAG if c in df_historico.columns]
+        destinos_lag = [c for c in DESTINOS_LAG if c in df_historico.columns]
+        max_lag = min(MAX_LAG_MESES, len(df_historico) - 3)
+        
+        if origens_lag and destinos_lag and max_lag >= 1:
+            lag_analise = correlacao_cruzada_fft(
+                df_historico[origens_lag].values,
+                df_historico[destinos_lag].values,
+                max_lag=max_lag
+            )
+            positivos = lag_analise['lags'] >= 0
+            lags_exibidos = lag_analise['lags'][positivos]
+            # (lags x origens x destinos) -> (pares x lags)
+            valores_lag = lag_analise['correlacao'][positivos].reshape(len(lags_exibidos), -1).T
+            limites = lag_analise['limite'][positivos]
+            
+            rotulos_pares = [f"{o} → {d}" for o in origens_lag for d in destinos_lag]
+            textos = [
+                [f"{v:.2f}{'*' if abs(v) > lim else ''}" for v, lim in zip(linha, limites)]
+                for linha in valores_lag
+            ]
+            
+            fig_lag = go.Figure(go.Heatmap(
+                z=valores_lag,
+                x=[f"+{lag} {'mês' if lag == 1 else 'meses'}" if lag else "Mesmo mês" for lag in lags_exibidos],
+                y=rotulos_pares,
+                text=textos,
+                texttemplate="%{text}",
+                colorscale="RdBu",
+                zmin=-1,
+                zmax=1,
+                colorbar=dict(title="Correlação")
+            ))
+            fig_lag.update_layout(
+                title="Correlação entre investimento no mês t e resultados em t + lag",
+                height=max(400, 28 * len(rotulos_pares))
+            )
+            st.plotly_chart(fig_lag, use_container_width=True)
+            st.caption(
+                "\\* Correlação fora da banda de significância (±1,96/√(n − lag)). "
+                "Com poucos meses apurados, a banda é larga e os valores são indicativos."
+            )
+        else:
+            st.info("Histórico insuficiente para analisar correlações defasadas.")
+        
         # Insights
         st.markdown("### 💡 Insights e Recomendações")
         
@@ -1,10 +1,24 @@
 """
-Tab: Análise Inteligente de ROI em Receita (12 meses diluídos)
+Tab: Análise Inteligente de ROI em Receita (12 a 36 meses diluídos)
 """
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from utils.calculations import calcular_roi
+from config.settings import PLANOS, RETENCAO_PLANOS
+from utils.numeros import converter_numero_br
+from utils.charts import AGRUPAMENTOS_HEATMAP, agregar_coortes_heatmap, criar_heatmap_coortes
+from utils.coortes import (
+    HORIZONTES_COORTE, FREQUENCIAS_COORTE, MARCOS_ROI, calcular_coortes
+)
+from utils.retencao import (
+    curvas_retencao, mistura_retencao, ajustar_retencao, economia_coortes, ltv_planos
+)
+from data.planilhas import ler_planilhas_roi, ler_tabela_retencao
+from data.uploads import processar_upload, processar_uploads, obter_ou_calcular
+
+# Chave da sessão com a impressão do último upload (lida também em tab_benchmarks)
+CHAVE_SESSAO_UPLOAD = "roi_receita_upload"
 
 
 def clean_numeric_column(series: pd.Series) -> pd.Series:
@@ -18,71 +32,11 @@ def clean_numeric_column(series: pd.Series) -> pd.Series:
     - '2.114,56'      -> 2114.56
     - '2114,56'       -> 2114.56
     - '2114.56'       -> 2114.56 (já em formato US)
-    """
-    s = series.astype(str).str.strip()
-
-    # Remove símbolo de moeda e espaços
-    s = s.str.replace(r"[R$\s]", "", regex=True)
-
-    def _parse_one(x: str) -> float | None:
-        if x == "" or x.lower() in ("nan", "none"):
-            return None
-
-        # 1) Caso híbrido tipo '56,308.18' (vírgula como milhar + ponto decimal)
-        #    Vamos remover vírgula e manter ponto como decimal => '56308.18'
-        if "," in x and "." in x:
-            # se a parte depois do último ponto tiver 2 casas, assumimos decimal US
-            parte_dec = x.split(".")[-1]
-            if len(parte_dec) in (1, 2):
-                x_norm = x.replace(",", "")  # '56,308.18' -> '56308.18'
-                try:
-                    return float(x_norm)
-                except ValueError:
-                    pass  # se não der, cai nos outros tratamentos
-
-        # 2) Formato BR clássico com vírgula decimal, ex: '56.308,18' ou '2.114,56'
-        if "," in x and (x.rfind(",") > x.rfind(".")):
-            # remove pontos (milhar) e troca vírgula por ponto
-            x_norm = x.replace(".", "").replace(",", ".")
-            # '56.308,18' -> '56308.18', '2.114,56' -> '2114.56'
-            try:
-                return float(x_norm)
-            except ValueError:
-                return None
-
-        # 3) Formato US simples: apenas ponto decimal, ex: '2114.56'
-        if "." in x and "," not in x:
-            try:
-                return float(x)
-            except ValueError:
-                return None
-
-        # 4) Inteiros sem separador
-        if x.isdigit():
-            try:
-                return float(x)
-            except ValueError:
-                return None
-
-        # Se nada funcionar, retorna None
-        return None
-
-    parsed = s.apply(_parse_one)
-    return pd.to_numeric(parsed, errors="coerce")
-
 
-def encontrar_payback(row: pd.Series, n_meses: int = 12) -> float | None:
+    A conversão é vetorizada (coluna inteira de uma vez) em
+    utils.numeros.converter_numero_br.
     """
-    Retorna o primeiro mês relativo em que o retorno acumulado fica >= 0.
-    Usa as colunas roi_1m_valor, roi_2m_valor, ..., roi_Nm_valor.
-    """
-    for i in range(1, n_meses + 1):
-        col = f"roi_{i}m_valor"
-        if col in row.index:
-            val = row[col]
-            if pd.notnull(val) and val >= 0:
-                return i
-    return None
+    return converter_numero_br(series)
 
 
 def gerar_insights_executivos_saas(resumo: dict) -> list[str]:
@@ -196,6 +150,194 @@ def gerar_insights_executivos_saas(resumo: dict) -> list[str]:
     return insights
 
 
+def analisar_roi_receita(df: pd.DataFrame, horizonte: int = 12, frequencia: str = "M") -> dict:
+    """
+    Calcula o ROI diluído (1 a N meses) e o payback de cada coorte.
+
+    Args:
+        df: DataFrame da planilha (periodo, mes_ano_str, receita_web, total_ads)
+        horizonte: Meses relativos analisados (12, 24, 36...)
+        frequencia: Granularidade das coortes ('D', 'W' ou 'M')
+
+    Returns:
+        Dict de utils.coortes.calcular_coortes (coortes, horizontes, valor,
+        pct) com payback_meses nas coortes, mais:
+        - 'resumo': Totais e payback agregados (None se não houver linhas)
+    """
+    if df.empty:
+        return {"coortes": df, "resumo": None}
+
+    # Matriz de ROI e payback de todas as coortes (utils.coortes)
+    analise = calcular_coortes(df, horizonte, frequencia)
+    df = analise["coortes"]
+    valor = analise["valor"]
+
+    # --- RESUMO GLOBAL PARA VISÃO EXECUTIVA ---
+    invest_total = df["total_ads"].sum()
+    receita_mes0_total = df["receita_web"].sum()
+
+    resumo = {
+        "invest_total": invest_total,
+        "receita_mes0_total": receita_mes0_total,
+        "horizonte": horizonte,
+    }
+
+    for marco in MARCOS_ROI:
+        if marco > horizonte:
+            continue
+        resumo[f"retorno_{marco}m_total"] = valor[:, marco - 1].sum()
+        if invest_total > 0:
+            resumo[f"roi_{marco}m_pct_total"] = (resumo[f"retorno_{marco}m_total"] / invest_total) * 100
+        else:
+            resumo[f"roi_{marco}m_pct_total"] = None
+
+    # Payback agregado
+    paybacks_validos = df["payback_meses"].dropna()
+
+    if not paybacks_validos.empty:
+        resumo["payback_medio"] = paybacks_validos.mean()
+        resumo["payback_mediano"] = paybacks_validos.median()
+        resumo["pct_payback_ate_6"] = (paybacks_validos <= 6).mean() * 100
+        resumo["payback_medio_interpolado"] = df["payback_meses_interpolado"].mean()
+    else:
+        resumo["payback_medio"] = None
+        resumo["payback_mediano"] = None
+        resumo["pct_payback_ate_6"] = None
+        resumo["payback_medio_interpolado"] = None
+
+    analise["resumo"] = resumo
+    return analise
+
+
+def _render_economia_retencao(df_ordered: pd.DataFrame, resumo: dict, horizonte: int):
+    """
+    Seção de economia de coortes com retenção (churn por plano ou ajustado).
+
+    Recalculada a cada movimento de slider: todas as curvas, coortes e
+    horizontes saem de uma avaliação vetorizada (utils.retencao).
+    """
+    st.markdown("---")
+    st.subheader(f"Economia de Coortes com Retenção ({horizonte} meses)")
+    st.caption(
+        "O ROI diluído acima supõe que a receita do 1º mês se repete todo mês. "
+        "Aqui a receita de cada mês relativo é reduzida pela curva de retenção da carteira."
+    )
+
+    fonte = st.radio(
+        "Curva de retenção",
+        ["Por plano (configuração)", "Ajustada de dados observados"],
+        horizontal=True,
+        key="fonte_retencao",
+    )
+
+    curvas, nomes_curvas, participacao, ajuste = None, None, None, None
+    if fonte == "Ajustada de dados observados":
+        arquivo_retencao = st.file_uploader(
+            "Tabela de retenção (coortes nas linhas, meses relativos nas colunas; clientes ativos ou receita)",
+            type=["xlsx", "xls", "csv"],
+            key="upload_retencao",
+        )
+        if arquivo_retencao:
+            try:
+                _, tabela = processar_upload(arquivo_retencao, ler_tabela_retencao)
+                ajuste = ajustar_retencao(tabela)
+            except Exception as e:
+                st.error(f"Erro ao ler a tabela de retenção: {e}")
+            if ajuste is None:
+                st.warning("Não foi possível ajustar a curva (são necessários ao menos 3 meses relativos com churn).")
+            else:
+                curvas = curvas_retencao(ajuste["churn_mensal"], ajuste["forma"], horizonte)
+                nomes_curvas = ["Ajustada"]
+                st.caption(
+                    f"Curva ajustada: churn de {ajuste['churn_mensal'] * 100:.2f}% no 2º mês, "
+                    f"forma {ajuste['forma']:.2f}"
+                )
+        if curvas is None:
+            st.info("Usando a retenção por plano da configuração até que uma tabela válida seja enviada.")
+
+    if curvas is None:
+        planos = list(RETENCAO_PLANOS)
+        churns, participacao = [], []
+        for col, plano in zip(st.columns(len(planos)), planos):
+            cfg = RETENCAO_PLANOS[plano]
+            churns.append(col.slider(
+                f"Churn mensal {plano} (%)", 0.0, 20.0, cfg["churn_mensal"] * 100, 0.5,
+                key=f"churn_{plano}",
+            ) / 100)
+            participacao.append(col.slider(
+                f"Participação {plano} (%)", 0, 100, int(round(cfg["participacao"] * 100)), 5,
+                key=f"participacao_{plano}",
+            ))
+
+        forma_padrao = float(np.mean([cfg["forma"] for cfg in RETENCAO_PLANOS.values()]))
+        forma = st.slider(
+            "Forma da curva (1 = churn constante; abaixo de 1 = churn concentrado nos primeiros meses)",
+            0.3, 1.5, round(forma_padrao, 2), 0.05,
+            key="forma_retencao",
+        )
+        curvas = curvas_retencao(churns, [forma] * len(planos), horizonte)
+        nomes_curvas = planos
+
+    retencao = curvas[0] if participacao is None else mistura_retencao(curvas, participacao)
+
+    economia = economia_coortes(
+        df_ordered["receita_web"].to_numpy(), df_ordered["total_ads"].to_numpy(), retencao, horizonte
+    )
+
+    invest_total = resumo["invest_total"]
+    retorno_total = economia["valor"][:, -1].sum()
+    paybacks = economia["payback_interpolado"]
+
+    col_e1, col_e2, col_e3, col_e4 = st.columns(4)
+    if invest_total > 0:
+        roi_retencao = retorno_total / invest_total * 100
+        roi_sem = resumo.get(f"roi_{horizonte}m_pct_total")
+        col_e1.metric(
+            f"ROI {horizonte}m com retenção",
+            f"{roi_retencao:,.1f}%",
+            delta=f"{roi_retencao - roi_sem:,.1f} p.p. vs sem churn" if roi_sem is not None else None,
+        )
+    col_e2.metric(f"LTV médio por coorte ({horizonte}m)", f"R$ {economia['ltv'][:, -1].mean():,.2f}")
+    if not np.isnan(paybacks).all():
+        col_e3.metric("Payback médio com retenção", f"{np.nanmean(paybacks):.1f} meses")
+    col_e4.metric("% Coortes sem payback", f"{np.isnan(paybacks).mean() * 100:.0f}%")
+
+    df_curvas = pd.DataFrame(curvas.T * 100, columns=nomes_curvas)
+    if participacao is not None and len(nomes_curvas) > 1:
+        df_curvas["Carteira (mistura)"] = np.asarray(retencao) * 100
+    df_curvas["Mês relativo"] = np.arange(1, horizonte + 1)
+
+    fig_retencao = px.line(
+        df_curvas.melt(id_vars="Mês relativo", var_name="Curva", value_name="Retenção (%)"),
+        x="Mês relativo",
+        y="Retenção (%)",
+        color="Curva",
+        title="Receita retida por mês relativo (% do 1º mês)",
+    )
+    if ajuste is not None:
+        observado = ajuste["observado"][:horizonte]
+        fig_retencao.add_scatter(
+            x=np.arange(1, observado.size + 1), y=observado * 100,
+            mode="markers", name="Observado",
+        )
+    st.plotly_chart(fig_retencao, use_container_width=True)
+
+    if participacao is not None:
+        mensalidades = [PLANOS.get(plano, np.nan) for plano in nomes_curvas]
+        ltv, vida = ltv_planos(mensalidades, curvas)
+        st.dataframe(
+            pd.DataFrame({
+                "Plano": nomes_curvas,
+                "Mensalidade (R$)": mensalidades,
+                "Vida média no horizonte (meses)": vida.round(1),
+                f"LTV {horizonte}m com retenção (R$)": ltv.round(2),
+                "LTV 12x mensalidade (R$)": np.asarray(mensalidades) * 12,
+            }),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
 def render_tab_roi_receita(df_principal=None):
     """
     Aba de análise inteligente de ROI em Receita.
@@ -203,7 +345,7 @@ def render_tab_roi_receita(df_principal=None):
     df_principal: DataFrame principal do app (opcional),
                   usado para enriquecer os insights com LTV, Ticket Médio, etc.
     """
-    st.header("Análise Inteligente de Receita, Investimento e ROI (12 meses)")
+    st.header("Análise Inteligente de Receita, Investimento e ROI (12 a 36 meses)")
     st.write(
         "Envie a planilha de ROI diluído com a estrutura:\n\n"
         "- Mês\n"
@@ -215,150 +357,98 @@ def render_tab_roi_receita(df_principal=None):
         "  - ROI_n = ROI_{n-1} + Receita\n"
     )
 
-    uploaded_file = st.file_uploader(
-        "Selecione sua planilha de ROI em Receita", type=["xlsx", "xls", "csv"]
+    uploaded_files = st.file_uploader(
+        "Selecione suas planilhas de ROI em Receita (um ou mais arquivos; todas as abas são lidas)",
+        type=["xlsx", "xls", "csv"],
+        accept_multiple_files=True,
     )
 
-    if not uploaded_file:
+    if not uploaded_files:
         return
 
-    # --- LEITURA E PREPARAÇÃO DO DATAFRAME ---
-    try:
-        if uploaded_file.name.lower().endswith((".xlsx", ".xls")):
-            df_raw = pd.read_excel(uploaded_file, engine="openpyxl", header=None)
-        else:
-            df_raw = pd.read_csv(uploaded_file, header=None)
-
-        # Remove linhas/colunas totalmente vazias
-        df_raw.dropna(axis="rows", how="all", inplace=True)
-        df_raw.dropna(axis="columns", how="all", inplace=True)
-
-        # Na sua planilha, a 1ª linha é decorativa ("CÁLCULO ROI DILUÍDO ...")
-        # e a 2ª linha (índice 1) é o cabeçalho real: Mês, Receita web, Total Ads
-        if len(df_raw) < 2:
-            raise ValueError("Planilha não tem linhas suficientes para identificar o cabeçalho.")
-
-        header_row = df_raw.iloc[1]
-        df = df_raw.iloc[2:].copy()  # dados começam depois da linha de cabeçalho real
-        df.columns = header_row
-
-        # Remover colunas com nomes duplicados
-        df = df.loc[:, ~df.columns.astype(str).duplicated()].copy()
-
-        # Normalizar nomes de colunas: remover espaços, tratar NaN/vazios
-        novas_cols = []
-        for i, c in enumerate(df.columns):
-            nome = str(c).strip()
-            if nome == "" or nome.lower() in ("nan", "none"):
-                nome = f"col_{i}"  # nome genérico para colunas sem título
-            novas_cols.append(nome)
-        df.columns = novas_cols
+    col_h, col_f = st.columns(2)
+    horizonte = col_h.selectbox("Horizonte da análise (meses)", HORIZONTES_COORTE, index=0)
+    frequencia = col_f.radio(
+        "Coortes",
+        list(FREQUENCIAS_COORTE),
+        format_func=FREQUENCIAS_COORTE.get,
+        index=list(FREQUENCIAS_COORTE).index("M"),
+        horizontal=True,
+    )
 
+    # --- LEITURA EM LOTES (JÁ TIPADOS) + COORTES, EM CACHE PELO CONTEÚDO ---
+    # O cabeçalho (Mês, Receita web, Total Ads) é localizado nas primeiras
+    # linhas; a 1ª linha decorativa ("CÁLCULO ROI DILUÍDO ...") é ignorada.
+    # Cada aba de cada arquivo é lida em paralelo e consolidada com a origem.
+    # Reruns e uploads dos mesmos arquivos reaproveitam o resultado.
+    try:
+        impressao, leitura = processar_uploads(uploaded_files, ler_planilhas_roi)
     except Exception as e:
         st.error(f"Erro ao ler a planilha: {e}")
-        st.warning(
-            "Confirme que a segunda linha da planilha contém os cabeçalhos: "
-            "Mês, Receita web, Total Ads."
-        )
         return
 
-    if df.empty:
-        st.warning("A planilha está vazia ou não foi possível extrair dados.")
-        return
-
-    with st.expander("Pré-visualização dos dados carregados", expanded=False):
-        st.dataframe(df.head())
-
-    # --- VALIDAÇÃO DAS COLUNAS ESPERADAS ---
-    col_mes = "Mês"
-    col_receita = "Receita web"
-    col_ads = "Total Ads"
-
-    missing = [c for c in [col_mes, col_receita, col_ads] if c not in df.columns]
-    if missing:
-        st.error(
-            "A planilha não contém as colunas obrigatórias: "
-            + ", ".join(missing)
+    relatorio = leitura["relatorio"]
+    df_planilha = leitura["dados"]
+
+    with st.expander(
+        f"Arquivos processados ({len(relatorio)} abas em {leitura['segundos']:.1f}s, "
+        f"{leitura['workers']} processo(s))",
+        expanded=False,
+    ):
+        st.dataframe(
+            relatorio.rename(columns={
+                "arquivo": "Arquivo", "aba": "Aba", "linhas": "Linhas",
+                "segundos": "Tempo (s)", "status": "Status",
+            }),
+            use_container_width=True,
+            hide_index=True,
         )
-        return
-
-    # --- LIMPEZA E CÁLCULO DAS MÉTRICAS BÁSICAS ---
-    df["periodo"] = pd.to_datetime(df[col_mes], errors="coerce")
-    df.dropna(subset=["periodo"], inplace=True)
+        if not df_planilha.empty:
+            st.dataframe(
+                df_planilha.groupby("origem")[["receita_web", "total_ads"]].sum()
+                .rename(columns={"receita_web": "Receita web", "total_ads": "Total Ads"}),
+                use_container_width=True,
+            )
 
-    if df.empty:
-        st.error("Nenhum valor de data válido na coluna Mês.")
+    if df_planilha.empty:
+        erros = relatorio.loc[relatorio["status"] != "ok", "status"]
+        st.error(f"Erro ao ler a planilha: {erros.iloc[0]}" if not erros.empty else "Planilha vazia.")
+        st.warning(
+            "Confirme que a planilha contém uma linha de cabeçalho com as colunas: "
+            "Mês, Receita web, Total Ads."
+        )
         return
 
-    df["mes_ano_str"] = df["periodo"].dt.strftime("%Y-%m")
-
-    # Numéricos de receita e investimento
-    df["receita_web"] = clean_numeric_column(df[col_receita])
-    df["total_ads"] = clean_numeric_column(df[col_ads])
-    df.dropna(subset=["receita_web", "total_ads"], inplace=True)
-
-    if df.empty:
-        st.error("Sem dados numéricos válidos em Receita web e Total Ads.")
-        return
+    origens = sorted(df_planilha["origem"].unique())
+    selecionadas = origens
+    if len(origens) > 1:
+        selecionadas = st.multiselect("Origens consolidadas na análise", origens, default=origens)
+        if not selecionadas:
+            st.info("Selecione ao menos uma origem.")
+            return
+
+    if len(selecionadas) < len(origens):
+        df_planilha = df_planilha[df_planilha["origem"].isin(selecionadas)]
+        chave_origens = "|".join(selecionadas)
+    else:
+        chave_origens = "todas"
 
-    # ROI simples por mês
-    df["roi_simples_pct"] = df.apply(
-        lambda row: calcular_roi(row["receita_web"], row["total_ads"]), axis=1
+    chave_analise = f"{impressao}:{frequencia}:{horizonte}:{chave_origens}"
+    analise = obter_ou_calcular(
+        chave_analise, lambda: analisar_roi_receita(df_planilha, horizonte, frequencia)
     )
 
-    # --- RECALCULAR ROI DILUÍDO DE 1 A 12 MESES (SEGUINDO SUA FÓRMULA) ---
-    # ROI_1 = Receita - Investimento
-    # ROI_n = ROI_{n-1} + Receita
-    for n in range(1, 13):
-        if n == 1:
-            df[f"roi_{n}m_valor"] = df["receita_web"] - df["total_ads"]
-        else:
-            df[f"roi_{n}m_valor"] = df[f"roi_{n-1}m_valor"] + df["receita_web"]
-
-    # ROI em % por coorte
-    for n in range(1, 13):
-        df[f"roi_{n}m_pct"] = (
-            df[f"roi_{n}m_valor"] / df["total_ads"].replace(0, pd.NA)
-        ) * 100
-
-    # Payback por coorte
-    df["payback_meses"] = df.apply(lambda row: encontrar_payback(row, 12), axis=1)
-
-    # --- RESUMO GLOBAL PARA VISÃO EXECUTIVA ---
-    invest_total = df["total_ads"].sum()
-    receita_mes0_total = df["receita_web"].sum()
-
-    resumo = {
-        "invest_total": invest_total,
-        "receita_mes0_total": receita_mes0_total,
-        "retorno_3m_total": df["roi_3m_valor"].sum(),
-        "retorno_6m_total": df["roi_6m_valor"].sum(),
-        "retorno_12m_total": df["roi_12m_valor"].sum(),
-    }
+    if analise["resumo"] is None:
+        st.error("Nenhuma linha com data válida em Mês e valores numéricos em Receita web e Total Ads.")
+        return
 
-    if invest_total > 0:
-        resumo["roi_3m_pct_total"] = (resumo["retorno_3m_total"] / invest_total) * 100
-        resumo["roi_6m_pct_total"] = (resumo["retorno_6m_total"] / invest_total) * 100
-        resumo["roi_12m_pct_total"] = (resumo["retorno_12m_total"] / invest_total) * 100
-    else:
-        resumo["roi_3m_pct_total"] = None
-        resumo["roi_6m_pct_total"] = None
-        resumo["roi_12m_pct_total"] = None
+    st.session_state[CHAVE_SESSAO_UPLOAD] = chave_analise
+    df_ordered = analise["coortes"]
+    # Cópia: o resumo em cache é compartilhado entre sessões
+    resumo = dict(analise["resumo"])
 
-    # Payback agregado
-    if "payback_meses" in df.columns:
-        paybacks_validos = df["payback_meses"].dropna()
-    else:
-        paybacks_validos = pd.Series([], dtype='float64')
-
-    if not paybacks_validos.empty:
-        resumo["payback_medio"] = paybacks_validos.mean()
-        resumo["payback_mediano"] = paybacks_validos.median()
-        resumo["pct_payback_ate_6"] = (paybacks_validos <= 6).mean() * 100
-    else:
-        resumo["payback_medio"] = None
-        resumo["payback_mediano"] = None
-        resumo["pct_payback_ate_6"] = None
+    with st.expander("Pré-visualização dos dados carregados", expanded=False):
+        st.dataframe(df_planilha.head())
 
     # Integra com df_principal (LTV / Ticket Médio), se disponível
     if df_principal is not None and not df_principal.empty:
@@ -380,8 +470,8 @@ def render_tab_roi_receita(df_principal=None):
     st.subheader("Visão Geral do Período (nível CEO / CFO)")
 
     col_k1, col_k2, col_k3, col_k4 = st.columns(4)
-    col_k1.metric("Investimento Total em Ads", f"R$ {invest_total:,.2f}")
-    col_k2.metric("Receita Web (Mês 0)", f"R$ {receita_mes0_total:,.2f}")
+    col_k1.metric("Investimento Total em Ads", f"R$ {resumo['invest_total']:,.2f}")
+    col_k2.metric("Receita Web (Mês 0)", f"R$ {resumo['receita_mes0_total']:,.2f}")
     col_k3.metric("Retorno Líquido em 12m", f"R$ {resumo['retorno_12m_total']:,.2f}")
     if resumo["roi_12m_pct_total"] is not None:
         col_k4.metric("ROI 12m (acumulado)", f"{resumo['roi_12m_pct_total']:,.1f}%")
@@ -390,8 +480,6 @@ def render_tab_roi_receita(df_principal=None):
     st.markdown("---")
     st.subheader("ROI Simples por Mês (Receita web x Total Ads)")
 
-    df_ordered = df.sort_values("periodo")
-
     fig_roi_mensal = px.line(
         df_ordered,
         x="mes_ano_str",
@@ -416,22 +504,21 @@ def render_tab_roi_receita(df_principal=None):
     )
     st.plotly_chart(fig_bar_receita_ads, use_container_width=True)
 
-    # --- ROI DILUÍDO POR COORTE (3m, 6m, 12m) ---
+    # --- ROI DILUÍDO POR COORTE (3m, 6m, 12m, ...) ---
+    marcos = [m for m in MARCOS_ROI if m <= horizonte]
+    rotulo_marcos = ", ".join(str(m) for m in marcos[:-1]) + f" e {marcos[-1]}"
+
     st.markdown("---")
-    st.subheader("ROI Diluído por Coorte (3, 6 e 12 meses)")
+    st.subheader(f"ROI Diluído por Coorte ({rotulo_marcos} meses)")
 
-    df_coorte = df_ordered[["mes_ano_str", "roi_3m_pct", "roi_6m_pct", "roi_12m_pct"]].copy()
+    df_coorte = df_ordered[["mes_ano_str"] + [f"roi_{m}m_pct" for m in marcos]].copy()
     df_coorte = df_coorte.melt(
         id_vars="mes_ano_str",
         var_name="horizonte",
         value_name="roi_pct",
     )
     df_coorte["horizonte"] = df_coorte["horizonte"].map(
-        {
-            "roi_3m_pct": "3 meses",
-            "roi_6m_pct": "6 meses",
-            "roi_12m_pct": "12 meses",
-        }
+        {f"roi_{m}m_pct": f"{m} meses" for m in marcos}
     )
 
     fig_roi_coorte = px.line(
@@ -445,7 +532,7 @@ def render_tab_roi_receita(df_principal=None):
             "roi_pct": "ROI (%)",
             "horizonte": "Horizonte",
         },
-        title="ROI por Coorte e Horizonte (3m / 6m / 12m)",
+        title="ROI por Coorte e Horizonte (" + " / ".join(f"{m}m" for m in marcos) + ")",
     )
     st.plotly_chart(fig_roi_coorte, use_container_width=True)
 
@@ -453,7 +540,7 @@ def render_tab_roi_receita(df_principal=None):
     st.markdown("---")
     st.subheader("Payback por Coorte (em meses relativos)")
 
-    if not paybacks_validos.empty:
+    if resumo["payback_medio"] is not None:
         col_p1, col_p2, col_p3 = st.columns(3)
         col_p1.metric("Payback Médio", f"{resumo['payback_medio']:.1f} meses")
         col_p2.metric("Payback Mediano", f"{resumo['payback_mediano']:.1f} meses")
@@ -462,12 +549,18 @@ def render_tab_roi_receita(df_principal=None):
             f"{resumo['pct_payback_ate_6']:.0f}%",
         )
 
+        st.caption(
+            f"Payback médio interpolado (fração do mês em que o acumulado cruza zero): "
+            f"{resumo['payback_medio_interpolado']:.2f} meses"
+        )
+
         with st.expander("Distribuição de Payback por coorte"):
             st.dataframe(
-                df_ordered[["mes_ano_str", "payback_meses"]].rename(
+                df_ordered[["mes_ano_str", "payback_meses", "payback_meses_interpolado"]].rename(
                     columns={
                         "mes_ano_str": "Mês de investimento",
                         "payback_meses": "Payback (meses)",
+                        "payback_meses_interpolado": "Payback interpolado (meses)",
                     }
                 )
             )
@@ -478,23 +571,50 @@ def render_tab_roi_receita(df_principal=None):
     st.markdown("---")
     st.subheader("Mapa de Calor: ROI (%) por Coorte x Mês Relativo")
 
-    cols_roi_heat = [f"roi_{n}m_pct" for n in range(1, 13)]
-    heat_matrix = df_ordered.set_index("mes_ano_str")[cols_roi_heat]
+    # Muitas coortes (diárias/semanais) são agrupadas para manter o gráfico leve
+    heat = agregar_coortes_heatmap(
+        df_ordered["periodo"], df_ordered["mes_ano_str"], analise["valor"], df_ordered["total_ads"]
+    )
 
-    fig_heat = px.imshow(
-        heat_matrix,
-        aspect="auto",
-        color_continuous_scale="RdYlGn",
-        origin="lower",
-        labels={
-            "x": "Mês relativo (1º, 2º, ...)",
-            "y": "Mês de investimento (coorte)",
-            "color": "ROI (%)",
-        },
+    if heat["frequencia"] is not None:
+        nome_bucket = AGRUPAMENTOS_HEATMAP.get(heat["frequencia"], "bloco de coortes")
+        st.caption(
+            f"{len(df_ordered):,} coortes agrupadas por {nome_bucket.lower()} "
+            f"({len(heat['rotulos'])} linhas); ROI ponderado pelo investimento de cada grupo."
+        )
+
+    fig_heat = criar_heatmap_coortes(
+        heat["rotulos"], heat["pct"], analise["horizontes"],
         title="ROI (%) por Coorte e Mês Relativo",
     )
     st.plotly_chart(fig_heat, use_container_width=True)
 
+    if heat["frequencia"] is not None:
+        detalhe = st.selectbox(
+            "Detalhar um período do mapa de calor",
+            [None] + list(range(len(heat["rotulos"]))),
+            format_func=lambda i: "—" if i is None else heat["rotulos"][i],
+            key="detalhe_heatmap_roi",
+        )
+        if detalhe is not None:
+            # Só as coortes do período escolhido são montadas (sob demanda)
+            linhas = heat["grupo"] == detalhe
+            coortes_detalhe = df_ordered.loc[linhas]
+            heat_detalhe = agregar_coortes_heatmap(
+                coortes_detalhe["periodo"], coortes_detalhe["mes_ano_str"],
+                analise["valor"][linhas], coortes_detalhe["total_ads"],
+            )
+            st.plotly_chart(
+                criar_heatmap_coortes(
+                    heat_detalhe["rotulos"], heat_detalhe["pct"], analise["horizontes"],
+                    title=f"ROI (%) das coortes de {heat['rotulos'][detalhe]}",
+                ),
+                use_container_width=True,
+            )
+
+    # --- ECONOMIA DE COORTES COM RETENÇÃO ---
+    _render_economia_retencao(df_ordered, resumo, horizonte)
+
     # --- RESUMO EXECUTIVO EM TEXTO ---
     st.markdown("---")
     st.subheader("Resumo Executivo (SaaS ERP)")
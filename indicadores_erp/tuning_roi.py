@@ -0,0 +1,255 @@
+"""
+Busca de hiperparâmetros do modelo de ROI (execução offline)
+
+Avalia uma grade de modelos (RandomForest, HistGradientBoosting e Ridge)
+com validação cruzada temporal (TimeSeriesSplit): cada fold treina só com
+meses anteriores aos de teste. As combinações (configuração x fold) são
+distribuídas em um pool de processos, o resultado de cada fold fica em
+cache (joblib.Memory) e a melhor configuração é registrada no store de
+modelos, onde a tab de Benchmarks passa a usá-la.
+
+USO:
+====
+    # Dados do dashboard
+    python tuning_roi.py
+
+    # Base maior (ex: vários tenants), CSV ou Parquet
+    python tuning_roi.py --entrada historico.parquet --tenant empresa_x --workers 8
+"""
+import os
+import sys
+import time
+import argparse
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from joblib import Memory
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.metrics import r2_score, mean_absolute_error
+
+from config.settings import DIR_ARTEFATOS
+from utils.ajustes import mes_para_ordinal
+from utils.modelos import (
+    construir_estimador, impressao_dados, registrar_melhor_configuracao, ESCOPO_PADRAO
+)
+
+
+FEATURES_ROI = ["CAC", "TC Usuários (%)", "TC Leads (%)", "Ticket Médio"]
+ALVO_ROI = "ROI (%)"
+DIR_CACHE_TUNING = os.path.join(DIR_ARTEFATOS, 'cache_tuning')
+
+GRADE_MODELOS = {
+    'random_forest': {
+        'n_estimators': [100, 200, 400],
+        'max_depth': [4, 6, None],
+        'min_samples_leaf': [1, 3],
+        'random_state': [42]
+    },
+    'hist_gradient_boosting': {
+        'learning_rate': [0.05, 0.1],
+        'max_depth': [3, None],
+        'max_iter': [100, 300],
+        'min_samples_leaf': [5, 20],
+        'random_state': [42]
+    },
+    'ridge': {
+        'alpha': [0.1, 1.0, 10.0, 100.0]
+    }
+}
+
+memoria = Memory(DIR_CACHE_TUNING, verbose=0)
+
+
+def expandir_grade(grade):
+    """
+    Lista todas as configurações (tipo, parâmetros) de uma grade
+
+    Returns:
+        Lista de tuplas (tipo, dict de parâmetros)
+    """
+    configuracoes = []
+    for tipo, espaco in grade.items():
+        nomes = list(espaco)
+        for valores in product(*(espaco[n] for n in nomes)):
+            configuracoes.append((tipo, dict(zip(nomes, valores))))
+    return configuracoes
+
+
+@memoria.cache
+def avaliar_fold(tipo, parametros, X_treino, y_treino, X_teste, y_teste):
+    """
+    Treina uma configuração em um fold e mede o erro no período de teste
+
+    O resultado fica em cache em disco: a mesma configuração sobre os mesmos
+    dados não é treinada de novo em execuções seguintes.
+
+    Returns:
+        Dict com 'MAE', 'R²' e 'segundos'
+    """
+    inicio = time.perf_counter()
+    # Um núcleo por tarefa: o paralelismo vem do pool de processos
+    modelo = construir_estimador(tipo, parametros, n_jobs=1)
+    modelo.fit(X_treino, y_treino)
+    previsto = modelo.predict(X_teste)
+
+    return {
+        'MAE': mean_absolute_error(y_teste, previsto),
+        'R²': r2_score(y_teste, previsto) if len(y_teste) > 1 else np.nan,
+        'segundos': time.perf_counter() - inicio
+    }
+
+
+def _executar_tarefa(tarefa):
+    """Executada nos processos do pool"""
+    tipo, parametros, indice_config, indice_fold, X, y, treino, teste = tarefa
+    resultado = avaliar_fold(tipo, parametros, X[treino], y[treino], X[teste], y[teste])
+    return {'config': indice_config, 'fold': indice_fold, **resultado}
+
+
+def buscar_hiperparametros(X, y, grade=GRADE_MODELOS, n_folds=5, workers=None, chunksize=None):
+    """
+    Avalia toda a grade com TimeSeriesSplit em um pool de processos
+
+    Args:
+        X: DataFrame de variáveis explicativas em ordem cronológica
+        y: Series com o alvo
+        grade: Dict {tipo: {parâmetro: lista de valores}}
+        n_folds: Quantidade de folds temporais (reduzida em históricos curtos)
+        workers: Processos do pool (padrão: todos os núcleos)
+        chunksize: Tarefas enviadas por vez a cada processo
+
+    Returns:
+        DataFrame com uma linha por configuração, ordenado pelo MAE médio
+    """
+    configuracoes = expandir_grade(grade)
+    n_folds = min(n_folds, len(X) - 1)
+    if n_folds < 2:
+        raise ValueError("Histórico insuficiente para validação temporal (mínimo 3 linhas)")
+
+    folds = list(TimeSeriesSplit(n_splits=n_folds).split(X))
+    X_valores = X.to_numpy(dtype=float)
+    y_valores = y.to_numpy(dtype=float)
+
+    tarefas = [
+        (tipo, parametros, i, f, X_valores, y_valores, treino, teste)
+        for i, (tipo, parametros) in enumerate(configuracoes)
+        for f, (treino, teste) in enumerate(folds)
+    ]
+
+    workers = workers or os.cpu_count()
+    chunksize = chunksize or max(1, len(tarefas) // (workers * 4))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultados = list(pool.map(_executar_tarefa, tarefas, chunksize=chunksize))
+    else:
+        resultados = [_executar_tarefa(t) for t in tarefas]
+
+    por_fold = pd.DataFrame(resultados)
+    resumo = por_fold.groupby('config').agg(
+        MAE=('MAE', 'mean'),
+        MAE_desvio=('MAE', 'std'),
+        R2=('R²', 'mean'),
+        segundos=('segundos', 'sum')
+    )
+    resumo['tipo'] = [configuracoes[i][0] for i in resumo.index]
+    resumo['parametros'] = [configuracoes[i][1] for i in resumo.index]
+
+    return resumo.sort_values('MAE').reset_index(drop=True)
+
+
+def carregar_base(caminho=None, tenant=None, coluna_tenant='tenant'):
+    """
+    Base de treino em ordem cronológica, só com linhas completas
+
+    Meses ainda não fechados (sem investimento em Ads, como o último mês
+    zerado da planilha) ficam de fora.
+
+    Returns:
+        Tuple (X, y)
+    """
+    if caminho is None:
+        from data.loader import load_data
+        df = load_data()
+    elif caminho.lower().endswith('.parquet') or os.path.isdir(caminho):
+        df = pd.read_parquet(caminho)
+    else:
+        df = pd.read_csv(caminho)
+
+    if tenant is not None:
+        df = df[df[coluna_tenant] == tenant]
+
+    if 'Total Ads' in df.columns:
+        df = df[df['Total Ads'] > 0]
+
+    if 'Mês' in df.columns:
+        ordem = df['Mês'].map(mes_para_ordinal)
+        df = df.assign(_ordem=ordem).sort_values('_ordem', kind='stable')
+
+    features = [c for c in FEATURES_ROI if c in df.columns]
+    df = df[features + [ALVO_ROI]].dropna()
+    return df[features], df[ALVO_ROI]
+
+
+def escopo_registro(caminho=None, tenant=None):
+    """
+    Escopo sob o qual a melhor configuração é registrada
+
+    Só o tuning sobre os dados do dashboard usa ESCOPO_PADRAO; uma base
+    externa ou um tenant ficam em escopos próprios.
+    """
+    partes = []
+    if caminho is not None:
+        partes.append(os.path.splitext(os.path.basename(os.path.normpath(caminho)))[0])
+    if tenant is not None:
+        partes.append(str(tenant))
+    return '/'.join(partes) or ESCOPO_PADRAO
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tuning do modelo de ROI com validação temporal")
+    parser.add_argument('--entrada', help="CSV/Parquet com as variáveis e o ROI (padrão: dados do dashboard)")
+    parser.add_argument('--tenant', help="Filtra um tenant da base de entrada")
+    parser.add_argument('--coluna-tenant', default='tenant')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunksize', type=int, default=None)
+    parser.add_argument('--top', type=int, default=10, help="Configurações exibidas no resumo")
+    parser.add_argument('--nao-registrar', action='store_true',
+                        help="Não grava a melhor configuração no store de modelos")
+    args = parser.parse_args(argv)
+
+    X, y = carregar_base(args.entrada, args.tenant, args.coluna_tenant)
+    print(f"Base: {len(X)} linhas, variáveis {list(X.columns)}")
+
+    inicio = time.perf_counter()
+    try:
+        resumo = buscar_hiperparametros(
+            X, y, n_folds=args.folds, workers=args.workers, chunksize=args.chunksize
+        )
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return 1
+
+    print(f"{len(resumo)} configurações avaliadas em {time.perf_counter() - inicio:.1f}s\n")
+    print(resumo.head(args.top).to_string())
+
+    melhor = resumo.iloc[0]
+    if not args.nao_registrar:
+        escopo = escopo_registro(args.entrada, args.tenant)
+        registrar_melhor_configuracao(list(X.columns), {
+            'tipo': melhor['tipo'],
+            'parametros': melhor['parametros'],
+            'metricas': {'MAE': float(melhor['MAE']), 'R²': float(melhor['R2'])},
+            'n_folds': min(args.folds, len(X) - 1),
+            'impressao': impressao_dados(X, y)
+        }, escopo=escopo)
+        print(f"\nMelhor configuração registrada ({escopo}): {melhor['tipo']} {melhor['parametros']}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
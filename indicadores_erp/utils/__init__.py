@@ -6,7 +6,8 @@ from .calculations import (
     calcular_comissao,
     calcular_cac_ltv_ratio,
     calcular_roi,
-    avaliar_metrica
+    avaliar_metrica,
+    avaliar_benchmarks_matriz
 )
 
 from .charts import (
@@ -27,6 +28,7 @@ __all__ = [
     'calcular_cac_ltv_ratio',
     'calcular_roi',
     'avaliar_metrica',
+    'avaliar_benchmarks_matriz',
     'criar_grafico_linha',
     'criar_grafico_barras',
     'criar_grafico_funil',
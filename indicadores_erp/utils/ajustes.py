@@ -0,0 +1,162 @@
+"""
+Motor de ajustes do forecast a partir do calendário de eventos
+"""
+import numpy as np
+
+
+MESES_ABREV = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun',
+               'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+
+def mes_para_ordinal(mes):
+    """
+    Converte um mês no formato do loader em um número sequencial
+
+    Args:
+        mes: String do mês (ex: 'Out/25')
+
+    Returns:
+        int: Meses desde o ano 2000 (ex: 'Out/25' -> 309)
+    """
+    abrev, ano = mes.split('/')
+    return int(ano) * 12 + MESES_ABREV.index(abrev.capitalize())
+
+
+def ordinal_para_mes(ordinal):
+    """
+    Converte um número sequencial de volta para o formato do loader
+
+    Args:
+        ordinal: Valor retornado por mes_para_ordinal
+
+    Returns:
+        str: Mês no formato 'Out/25'
+    """
+    ano, mes = divmod(int(ordinal), 12)
+    return f"{MESES_ABREV[mes]}/{ano:02d}"
+
+
+def proximos_meses(ultimo_mes, quantidade):
+    """
+    Lista os meses seguintes a um mês de referência
+
+    Args:
+        ultimo_mes: Último mês conhecido (ex: 'Nov/25')
+        quantidade: Quantidade de meses a gerar
+
+    Returns:
+        list: Ex: proximos_meses('Nov/25', 2) -> ['Dez/25', 'Jan/26']
+    """
+    inicio = mes_para_ordinal(ultimo_mes) + 1
+    return [ordinal_para_mes(o) for o in range(inicio, inicio + quantidade)]
+
+
+def _fatores_evento(evento, ordinais, contexto):
+    """
+    Calcula os fatores de um evento para cada KPI afetado
+
+    Returns:
+        Lista de (kpis, array de fatores por mês)
+    """
+    inicio = mes_para_ordinal(evento['inicio'])
+    fim = mes_para_ordinal(evento['fim']) if evento.get('fim') else None
+
+    # Posição de cada mês dentro do evento (-1 = fora do período)
+    posicao = ordinais - inicio
+    ativo = posicao >= 0
+    if fim is not None:
+        ativo &= ordinais <= fim
+    posicao = np.where(ativo, posicao, -1)
+
+    if evento['tipo'] == 'preco':
+        ticket_atual = contexto.get('ticket_medio_atual')
+        if not ticket_atual:
+            return []
+        aumento = evento['ticket_alvo'] / ticket_atual - 1
+
+        # Fração de clientes migrados: rampa no início, 100% depois
+        rampa = np.append(np.asarray(evento.get('rampa', []), dtype=float), 1.0)
+        fracao = rampa[np.clip(posicao, 0, len(rampa) - 1)]
+        fatores = np.where(ativo, 1 + aumento * fracao, 1.0)
+        return [(evento['kpis'], fatores)]
+
+    if evento['tipo'] == 'campanha':
+        resultado = []
+        for efeito in evento['efeitos']:
+            if 'multiplicadores' in efeito:
+                mult = np.asarray(efeito['multiplicadores'], dtype=float)
+            else:
+                mult = np.array([efeito['multiplicador']], dtype=float)
+            # Meses além da lista repetem o último multiplicador informado
+            fatores = np.where(ativo, mult[np.clip(posicao, 0, len(mult) - 1)], 1.0)
+            resultado.append((efeito['kpis'], fatores))
+        return resultado
+
+    raise ValueError(f"Tipo de evento desconhecido: {evento['tipo']}")
+
+
+def compilar_matriz_ajustes(eventos, meses, kpis, contexto=None):
+    """
+    Compila os eventos do calendário em uma matriz de multiplicadores
+
+    Args:
+        eventos: Lista de eventos (ver config/calendario.py)
+        meses: Lista de meses previstos (ex: ['Out/25', 'Nov/25'])
+        kpis: Lista de KPIs previstos
+        contexto: Dict com valores de referência (ex: 'ticket_medio_atual')
+
+    Returns:
+        np.ndarray (KPIs x meses) com o fator acumulado de todos os eventos
+    """
+    contexto = contexto or {}
+    ordinais = np.array([mes_para_ordinal(m) for m in meses])
+    indice_kpi = {kpi: i for i, kpi in enumerate(kpis)}
+
+    matriz = np.ones((len(kpis), len(meses)))
+    for evento in eventos:
+        for kpis_evento, fatores in _fatores_evento(evento, ordinais, contexto):
+            linhas = [indice_kpi[k] for k in kpis_evento if k in indice_kpi]
+            matriz[linhas] *= fatores
+
+    return matriz
+
+
+def aplicar_matriz_ajustes(previsoes, matriz):
+    """
+    Aplica a matriz de ajustes a todas as previsões e cenários de uma vez
+
+    Args:
+        previsoes: Array (KPIs x cenários x meses)
+        matriz: Array (KPIs x meses) de compilar_matriz_ajustes
+
+    Returns:
+        np.ndarray com as previsões ajustadas
+    """
+    return np.asarray(previsoes, dtype=float) * matriz[:, None, :]
+
+
+def eventos_no_periodo(eventos, meses):
+    """
+    Filtra os eventos que afetam algum dos meses informados
+
+    Args:
+        eventos: Lista de eventos
+        meses: Lista de meses previstos
+
+    Returns:
+        list: Eventos com pelo menos um mês dentro do período
+    """
+    if not meses:
+        return []
+
+    ordinais = [mes_para_ordinal(m) for m in meses]
+    primeiro, ultimo = min(ordinais), max(ordinais)
+
+    selecionados = []
+    for evento in eventos:
+        inicio = mes_para_ordinal(evento['inicio'])
+        fim = mes_para_ordinal(evento['fim']) if evento.get('fim') else None
+        if inicio <= ultimo and (fim is None or fim >= primeiro):
+            selecionados.append(evento)
+
+    return selecionados
@@ -0,0 +1,275 @@
+"""
+Detecção online de anomalias em séries de KPIs e custos
+
+O detector mantém, para cada série, um buffer circular com os últimos
+pontos e compara cada novo ponto com a mediana e o MAD (desvio absoluto
+mediano) desse buffer. O custo por ponto depende só do tamanho da janela,
+nunca do histórico, e todas as séries são atualizadas juntas.
+
+O estado fica salvo em disco (DIR_ARTEFATOS/detectores) com o último
+período processado; a cada execução só os períodos novos entram no
+detector, sem reprocessar o histórico.
+"""
+import os
+import tempfile
+import warnings
+import numpy as np
+
+from config.settings import DIR_ARTEFATOS
+from utils.ajustes import mes_para_ordinal
+
+
+DIR_DETECTORES = os.path.join(DIR_ARTEFATOS, 'detectores')
+
+# Fator que torna o MAD comparável ao desvio padrão em dados normais
+FATOR_MAD = 1.4826
+
+
+def criar_detector(series, janela=28, limiar=3.5, min_observacoes=7):
+    """
+    Cria o estado de um detector para um conjunto de séries
+
+    Args:
+        series: Lista com os nomes das séries
+        janela: Quantidade de pontos recentes usados como referência
+        limiar: Escore robusto (em desvios) acima do qual o ponto é anômalo
+        min_observacoes: Pontos válidos necessários antes de emitir alertas
+
+    Returns:
+        Dict com o estado do detector
+    """
+    return {
+        'series': list(series),
+        'buffer': np.full((len(series), janela), np.nan),
+        'posicao': 0,
+        'contagem': np.zeros(len(series), dtype=int),
+        'limiar': float(limiar),
+        'min_observacoes': int(min_observacoes),
+        # Períodos já processados e o resultado de cada um
+        'periodos': [],
+        'escores': np.empty((0, len(series))),
+        'medianas': np.empty((0, len(series))),
+        'anomalias': np.empty((0, len(series)), dtype=bool)
+    }
+
+
+def atualizar_detector(estado, valores):
+    """
+    Processa um ponto (ou um micro-lote de pontos) de todas as séries
+
+    Cada ponto é avaliado contra a janela anterior a ele e só depois entra
+    no buffer. Valores ausentes (NaN) não são avaliados nem armazenados.
+    Valores negativos e zeros são aceitos normalmente.
+
+    Args:
+        estado: Dict retornado por criar_detector (atualizado no lugar)
+        valores: Array (séries,) com um ponto ou (pontos, séries) com um lote
+
+    Returns:
+        Dict com arrays (pontos x séries): 'escore', 'anomalia' e 'mediana'
+    """
+    lote = np.atleast_2d(np.asarray(valores, dtype=float))
+    buffer = estado['buffer']
+    janela = buffer.shape[1]
+    linhas = np.arange(buffer.shape[0])
+
+    escores = np.full(lote.shape, np.nan)
+    medianas = np.full(lote.shape, np.nan)
+    anomalias = np.zeros(lote.shape, dtype=bool)
+
+    with warnings.catch_warnings():
+        # Séries ainda sem histórico geram fatias só com NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for i, ponto in enumerate(lote):
+            mediana = np.nanmedian(buffer, axis=1)
+            mad = np.nanmedian(np.abs(buffer - mediana[:, None]), axis=1)
+
+            # Janela sem dispersão: usa 1% da mediana como escala mínima
+            escala = FATOR_MAD * mad
+            escala = np.where(escala > 0, escala, np.maximum(np.abs(mediana) * 0.01, 1e-9))
+
+            escore = (ponto - mediana) / escala
+            valido = ~np.isnan(ponto)
+            pronto = estado['contagem'] >= estado['min_observacoes']
+
+            escores[i] = escore
+            medianas[i] = mediana
+            anomalias[i] = valido & pronto & (np.abs(escore) > estado['limiar'])
+
+            # Armazena o ponto no buffer circular (só séries com valor)
+            coluna = estado['posicao'] % janela
+            buffer[linhas[valido], coluna] = ponto[valido]
+            buffer[linhas[~valido], coluna] = np.nan
+            estado['contagem'] = estado['contagem'] + valido
+            estado['posicao'] += 1
+
+    return {
+        'escore': escores,
+        'anomalia': anomalias,
+        'mediana': medianas
+    }
+
+
+def salvar_detector(estado, nome, diretorio=DIR_DETECTORES):
+    """
+    Grava o estado do detector em disco (formato .npz)
+
+    A escrita é atômica (arquivo temporário + rename): outra sessão nunca
+    lê um arquivo pela metade.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            np.savez_compressed(
+                arquivo,
+                series=np.array(estado['series']),
+                buffer=estado['buffer'],
+                posicao=estado['posicao'],
+                contagem=estado['contagem'],
+                limiar=estado['limiar'],
+                min_observacoes=estado['min_observacoes'],
+                periodos=np.array(estado['periodos'], dtype=str),
+                escores=estado['escores'],
+                medianas=estado['medianas'],
+                anomalias=estado['anomalias']
+            )
+        os.replace(temporario, os.path.join(diretorio, f"{nome}.npz"))
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def carregar_detector(nome, diretorio=DIR_DETECTORES):
+    """
+    Carrega um detector salvo
+
+    Returns:
+        Dict com o estado ou None se não existir / estiver corrompido
+    """
+    caminho = os.path.join(diretorio, f"{nome}.npz")
+    if not os.path.exists(caminho):
+        return None
+
+    try:
+        with np.load(caminho) as dados:
+            return {
+                'series': dados['series'].tolist(),
+                'buffer': dados['buffer'],
+                'posicao': int(dados['posicao']),
+                'contagem': dados['contagem'],
+                'limiar': float(dados['limiar']),
+                'min_observacoes': int(dados['min_observacoes']),
+                'periodos': dados['periodos'].tolist(),
+                'escores': dados['escores'],
+                'medianas': dados['medianas'],
+                'anomalias': dados['anomalias']
+            }
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Detector {nome} ilegível, será recriado: {e}")
+        return None
+
+
+def sincronizar_detector(df, colunas, nome, coluna_periodo='Mês', janela=6,
+                         limiar=3.5, min_observacoes=3, diretorio=DIR_DETECTORES):
+    """
+    Atualiza o detector salvo apenas com os períodos ainda não processados
+
+    Carrega o estado, passa pelo detector só os períodos posteriores ao
+    último já visto e grava o estado de volta. Se não houver estado (ou se
+    as séries e parâmetros mudaram), o detector é criado com o histórico.
+    Valores já processados que forem revisados depois não são reavaliados.
+
+    Args:
+        df: DataFrame com o histórico completo (um período por linha)
+        colunas: Colunas a monitorar
+        nome: Nome do detector no store
+        coluna_periodo: Coluna com o rótulo do período (formato 'Out/25')
+        janela: Janela de referência do detector
+        limiar: Escore robusto para considerar anomalia
+        min_observacoes: Pontos válidos necessários antes de alertar
+        diretorio: Diretório do store
+
+    Returns:
+        Dict com o estado atualizado
+    """
+    estado = carregar_detector(nome, diretorio)
+    if (
+        estado is None
+        or estado['series'] != list(colunas)
+        or estado['buffer'].shape[1] != janela
+        or estado['limiar'] != float(limiar)
+        or estado['min_observacoes'] != int(min_observacoes)
+    ):
+        estado = criar_detector(colunas, janela=janela, limiar=limiar,
+                                min_observacoes=min_observacoes)
+
+    ordinais = df[coluna_periodo].map(mes_para_ordinal).to_numpy()
+    if estado['periodos']:
+        novos = ordinais > mes_para_ordinal(estado['periodos'][-1])
+    else:
+        novos = np.ones(len(df), dtype=bool)
+
+    if not novos.any():
+        return estado
+
+    lote = df.loc[novos].iloc[np.argsort(ordinais[novos], kind='stable')]
+    resultado = atualizar_detector(estado, lote[colunas].values)
+
+    estado['periodos'] = estado['periodos'] + lote[coluna_periodo].tolist()
+    estado['escores'] = np.vstack([estado['escores'], resultado['escore']])
+    estado['medianas'] = np.vstack([estado['medianas'], resultado['mediana']])
+    estado['anomalias'] = np.vstack([estado['anomalias'], resultado['anomalia']])
+
+    salvar_detector(estado, nome, diretorio)
+    return estado
+
+
+def detectar_anomalias_recentes(df, colunas, periodo=None, nome='kpis_mensais',
+                                coluna_periodo='Mês', janela=6, limiar=3.5,
+                                min_observacoes=3, diretorio=DIR_DETECTORES):
+    """
+    Anomalias de um período, a partir do detector salvo
+
+    O detector é sincronizado com df (só os períodos novos são processados)
+    e o resultado guardado para o período pedido é consultado.
+
+    Args:
+        df: DataFrame com o histórico completo, um período por linha
+        colunas: Colunas a monitorar
+        periodo: Período a consultar (padrão: o último de df)
+        nome: Nome do detector no store
+        coluna_periodo: Coluna com o rótulo do período
+        janela: Janela de referência do detector
+        limiar: Escore robusto para considerar anomalia
+        min_observacoes: Pontos válidos necessários antes de alertar
+        diretorio: Diretório do store
+
+    Returns:
+        Lista de dicts com série, período, valor, mediana e escore
+    """
+    colunas = [c for c in colunas if c in df.columns]
+    if df.empty or not colunas:
+        return []
+
+    estado = sincronizar_detector(df, colunas, nome, coluna_periodo, janela,
+                                  limiar, min_observacoes, diretorio)
+
+    periodo = df[coluna_periodo].iloc[-1] if periodo is None else periodo
+    if periodo not in estado['periodos']:
+        return []
+    i = estado['periodos'].index(periodo)
+    linha = df[df[coluna_periodo] == periodo].iloc[-1]
+
+    anomalias = []
+    for j, serie in enumerate(colunas):
+        if estado['anomalias'][i, j]:
+            anomalias.append({
+                'serie': serie,
+                'periodo': periodo,
+                'valor': float(linha[serie]),
+                'mediana': float(estado['medianas'][i, j]),
+                'escore': float(estado['escores'][i, j])
+            })
+
+    return anomalias
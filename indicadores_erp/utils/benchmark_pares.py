@@ -0,0 +1,251 @@
+"""
+Benchmark contra pares com sketches de quantis (estilo t-digest)
+
+Cada sketch resume uma distribuição em no máximo ~compressao centróides
+(média, peso), mais finos nas caudas, onde a precisão de percentil mais
+importa. Sketches são mescláveis: dados novos entram criando um sketch do
+lote e mesclando com o existente, então a memória não cresce com o
+tamanho da base de pares.
+
+O índice é um dict {segmento: {métrica: sketch}} persistido em JSON.
+"""
+import os
+import json
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from config.settings import DIR_ARTEFATOS
+
+
+ARQUIVO_INDICE_PARES = os.path.join(DIR_ARTEFATOS, 'benchmark_pares.json')
+
+METRICAS_PARES = ["TC Usuários (%)", "TC Leads (%)", "CAC", "ROI (%)", "Ticket Médio"]
+SEGMENTO_TODOS = 'Todos'
+COMPRESSAO_PADRAO = 200
+
+
+def _escala_k(q, compressao):
+    """Função de escala k1 do t-digest: centróides menores perto de q=0 e q=1"""
+    return compressao / (2 * np.pi) * np.arcsin(2 * q - 1)
+
+
+def _finalizar(medias, pesos, minimo, maximo, compressao):
+    """Monta o dict do sketch com a CDF pré-calculada para consultas rápidas"""
+    total = float(pesos.sum())
+    acumulado = np.cumsum(pesos)
+    cdf = (acumulado - pesos / 2) / total
+
+    return {
+        'medias': medias,
+        'pesos': pesos,
+        'minimo': float(minimo),
+        'maximo': float(maximo),
+        'n': total,
+        'compressao': compressao,
+        # Pontos de interpolação: extremos + centro de cada centróide
+        '_x': np.concatenate([[minimo], medias, [maximo]]),
+        '_cdf': np.concatenate([[0.0], cdf, [1.0]])
+    }
+
+
+def _comprimir(medias, pesos, minimo, maximo, compressao):
+    """
+    Agrupa centróides ordenados em faixas de largura 1 na escala k
+
+    Totalmente vetorizado: cada ponto recebe o índice floor(k(q)) do seu
+    quantil central e os grupos são somados com np.bincount.
+    """
+    ordem = np.argsort(medias, kind='stable')
+    medias, pesos = medias[ordem], pesos[ordem]
+
+    total = pesos.sum()
+    q = (np.cumsum(pesos) - pesos / 2) / total
+    k = _escala_k(q, compressao)
+    grupo = np.floor(k - k.min()).astype(np.int64)
+    _, grupo = np.unique(grupo, return_inverse=True)
+
+    pesos_grupo = np.bincount(grupo, weights=pesos)
+    medias_grupo = np.bincount(grupo, weights=medias * pesos) / pesos_grupo
+
+    return _finalizar(medias_grupo, pesos_grupo, minimo, maximo, compressao)
+
+
+def criar_sketch(valores, compressao=COMPRESSAO_PADRAO):
+    """
+    Cria um sketch a partir de valores brutos
+
+    Args:
+        valores: Array-like; NaN e infinitos são ignorados
+        compressao: Controla o número de centróides (e a precisão)
+
+    Returns:
+        Dict do sketch ou None se não houver valores válidos
+    """
+    valores = np.asarray(valores, dtype=float)
+    valores = valores[np.isfinite(valores)]
+    if valores.size == 0:
+        return None
+
+    return _comprimir(
+        valores, np.ones_like(valores),
+        valores.min(), valores.max(), compressao
+    )
+
+
+def mesclar_sketches(a, b):
+    """
+    Mescla dois sketches (associativo; a ordem não altera o resultado de forma relevante)
+
+    Returns:
+        Novo dict do sketch
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+
+    return _comprimir(
+        np.concatenate([a['medias'], b['medias']]),
+        np.concatenate([a['pesos'], b['pesos']]),
+        min(a['minimo'], b['minimo']),
+        max(a['maximo'], b['maximo']),
+        max(a['compressao'], b['compressao'])
+    )
+
+
+def percentil(sketch, valor):
+    """
+    Percentil (0-100) de um valor na distribuição dos pares
+
+    Interpolação linear entre os centróides: O(log centróides).
+    """
+    return float(np.interp(valor, sketch['_x'], sketch['_cdf']) * 100)
+
+
+def quantil(sketch, q):
+    """
+    Valor correspondente a um quantil (0-1) ou lista de quantis
+
+    Returns:
+        float ou np.ndarray
+    """
+    return np.interp(q, sketch['_cdf'], sketch['_x'])
+
+
+def _chave_segmento(valores):
+    return ' | '.join(str(v) for v in valores)
+
+
+def ingerir_pares(dados, colunas_segmento, metricas=None, indice=None,
+                  tamanho_lote=200_000, compressao=COMPRESSAO_PADRAO):
+    """
+    Ingere uma base de pares no índice, lote a lote
+
+    Cada lote vira um sketch por (segmento, métrica) e é mesclado no
+    índice, então só um lote fica em memória por vez. Todas as linhas
+    também entram no segmento 'Todos'.
+
+    Args:
+        dados: Caminho de CSV/Parquet ou DataFrame
+        colunas_segmento: Colunas que definem o segmento (ex: ['porte', 'regiao'])
+        metricas: Colunas de KPIs a indexar (padrão: METRICAS_PARES presentes)
+        indice: Índice existente a atualizar (padrão: novo)
+        tamanho_lote: Linhas lidas por lote (CSV)
+        compressao: Compressão dos sketches
+
+    Returns:
+        Dict {segmento: {métrica: sketch}}
+    """
+    indice = indice if indice is not None else {}
+
+    if isinstance(dados, pd.DataFrame):
+        lotes = [dados]
+    elif str(dados).lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+        arquivo = pq.ParquetFile(dados)
+        lotes = (b.to_pandas() for b in arquivo.iter_batches(batch_size=tamanho_lote))
+    else:
+        lotes = pd.read_csv(dados, chunksize=tamanho_lote)
+
+    for lote in lotes:
+        presentes = [m for m in (metricas or METRICAS_PARES) if m in lote.columns]
+        if not presentes:
+            continue
+
+        grupos = [(SEGMENTO_TODOS, lote)]
+        if colunas_segmento:
+            grupos += [
+                (_chave_segmento(chave if isinstance(chave, tuple) else (chave,)), grupo)
+                for chave, grupo in lote.groupby(colunas_segmento, sort=False)
+            ]
+
+        for segmento, grupo in grupos:
+            sketches = indice.setdefault(segmento, {})
+            for metrica in presentes:
+                novo = criar_sketch(
+                    pd.to_numeric(grupo[metrica], errors='coerce').to_numpy(),
+                    compressao
+                )
+                sketches[metrica] = mesclar_sketches(sketches.get(metrica), novo)
+
+    return indice
+
+
+def salvar_indice(indice, caminho=ARQUIVO_INDICE_PARES):
+    """Grava o índice em JSON (apenas centróides e extremos)"""
+    serializavel = {
+        segmento: {
+            metrica: {
+                'medias': s['medias'].tolist(),
+                'pesos': s['pesos'].tolist(),
+                'minimo': s['minimo'],
+                'maximo': s['maximo'],
+                'compressao': s['compressao']
+            }
+            for metrica, s in sketches.items() if s is not None
+        }
+        for segmento, sketches in indice.items()
+    }
+
+    diretorio = os.path.dirname(caminho) or '.'
+    os.makedirs(diretorio, exist_ok=True)
+    # Nome único: a ingestão e o dashboard podem gravar ao mesmo tempo
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+            json.dump(serializavel, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def carregar_indice(caminho=ARQUIVO_INDICE_PARES):
+    """
+    Carrega o índice salvo
+
+    Returns:
+        Dict {segmento: {métrica: sketch}} (vazio se não existir)
+    """
+    if not os.path.exists(caminho):
+        return {}
+
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            bruto = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Erro ao ler índice de pares: {e}")
+        return {}
+
+    return {
+        segmento: {
+            metrica: _finalizar(
+                np.asarray(s['medias']), np.asarray(s['pesos']),
+                s['minimo'], s['maximo'], s['compressao']
+            )
+            for metrica, s in sketches.items()
+        }
+        for segmento, sketches in bruto.items()
+    }
@@ -1,6 +1,9 @@
 """
 Funções de cálculo reutilizáveis
 """
+import numpy as np
+import pandas as pd
+
 
 def calcular_comissao(valor_base, percentual):
     """Calcula comissão sobre um valor base"""
@@ -26,4 +29,90 @@ def avaliar_metrica(valor, benchmark):
         return 'alto', '🔴'
     elif benchmark['min'] <= valor <= benchmark['max']:
         return 'ideal', '🟢'
-    return 'fora_range', '⚪'
\ No newline at end of file
+    return 'fora_range', '⚪'
+
+
+# Códigos da matriz de status de benchmark
+STATUS_SEM_DADOS = -1
+STATUS_PIOR = 0
+STATUS_DENTRO = 1
+STATUS_MELHOR = 2
+
+ROTULOS_STATUS = {
+    STATUS_SEM_DADOS: '⚪ Sem dados',
+    STATUS_PIOR: '🔴 Fora do benchmark (pior)',
+    STATUS_DENTRO: '🟢 Dentro do benchmark',
+    STATUS_MELHOR: '🟢 Além do benchmark (melhor)'
+}
+
+
+def _coluna_numerica(serie):
+    """Converte colunas como CAC:LTV ('3.5:1') para número"""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype(float)
+    texto = serie.astype(str).str.split(':').str[0].str.replace(',', '.', regex=False)
+    return pd.to_numeric(texto, errors='coerce')
+
+
+def avaliar_benchmarks_matriz(df, benchmarks, metricas=None, coluna_periodo='Mês',
+                              ignorar_zeros=True):
+    """
+    Avalia todas as métricas de todos os períodos contra os benchmarks de uma vez
+
+    Args:
+        df: DataFrame com uma linha por período (ou por tenant e período)
+        benchmarks: Dict no formato de config.settings.BENCHMARKS
+        metricas: Métricas a avaliar (padrão: as do benchmark presentes no df)
+        coluna_periodo: Coluna usada como rótulo das colunas da matriz
+        ignorar_zeros: Trata zeros como período não apurado (sem dados)
+
+    Returns:
+        Dict com:
+        - 'metricas', 'periodos': rótulos das linhas e colunas
+        - 'valores': array (métricas x períodos)
+        - 'status': códigos STATUS_* (métricas x períodos)
+        - 'distancia': distância até a faixa, em larguras da faixa (0 dentro;
+          positiva acima do máximo, negativa abaixo do mínimo)
+        - 'score': distância orientada (positiva = melhor que o benchmark)
+    """
+    metricas = [m for m in (metricas or benchmarks) if m in df.columns and m in benchmarks]
+
+    valores = np.column_stack([_coluna_numerica(df[m]).to_numpy() for m in metricas]).T \
+        if metricas else np.empty((0, len(df)))
+    if ignorar_zeros:
+        valores = np.where(valores == 0, np.nan, valores)
+
+    minimo = np.array([benchmarks[m].get('min', np.nan) for m in metricas], dtype=float)[:, None]
+    maximo = np.array([
+        np.inf if benchmarks[m].get('max') is None else benchmarks[m]['max'] for m in metricas
+    ], dtype=float)[:, None]
+    sentido = np.array([
+        1.0 if benchmarks[m].get('maior_melhor', True) else -1.0 for m in metricas
+    ])[:, None]
+
+    largura = np.where(np.isfinite(maximo - minimo) & (maximo > minimo), maximo - minimo,
+                       np.where(minimo != 0, np.abs(minimo), 1.0))
+
+    abaixo = valores < minimo
+    acima = valores > maximo
+    distancia = np.where(abaixo, (valores - minimo) / largura,
+                         np.where(acima, (valores - maximo) / largura, 0.0))
+    score = distancia * sentido + 0.0  # evita -0.0 nas métricas de menor melhor
+
+    sem_dados = np.isnan(valores)
+    status = np.where(score > 0, STATUS_MELHOR, np.where(score < 0, STATUS_PIOR, STATUS_DENTRO))
+    status = np.where(sem_dados, STATUS_SEM_DADOS, status).astype(np.int8)
+    distancia = np.where(sem_dados, np.nan, distancia)
+    score = np.where(sem_dados, np.nan, score)
+
+    periodos = df[coluna_periodo].astype(str).tolist() if coluna_periodo in df.columns \
+        else [str(i) for i in df.index]
+
+    return {
+        'metricas': metricas,
+        'periodos': periodos,
+        'valores': valores,
+        'status': status,
+        'distancia': distancia,
+        'score': score
+    }
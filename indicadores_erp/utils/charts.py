@@ -1,10 +1,18 @@
 """
 Funções para criação de gráficos Plotly
 """
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 
+# Linhas máximas desenhadas em um mapa de calor de coortes
+MAX_LINHAS_HEATMAP = 400
+# Agrupamentos tentados, do mais fino ao mais grosso
+AGRUPAMENTOS_HEATMAP = {'W': 'Semana', 'M': 'Mês', 'Q': 'Trimestre', 'Y': 'Ano'}
+
+
 def criar_grafico_linha(df, x_col, y_cols, names, colors, title="", height=400):
     """
     Cria um gráfico de linha
@@ -372,4 +380,104 @@ def criar_grafico_linha_com_benchmark(df, x_col, y_col, color, benchmark_min,
         height=height
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+
+def _rotulo_bucket(periodo, frequencia):
+    """Rótulo curto de um bucket (semana pelo 1º dia; mês, trimestre e ano pelo período)"""
+    if frequencia == 'W':
+        return periodo.start_time.strftime('%Y-%m-%d')
+    return str(periodo)
+
+
+def agregar_coortes_heatmap(periodos, rotulos, valor, investimento, max_linhas=MAX_LINHAS_HEATMAP):
+    """
+    Agrupa coortes em buckets para caber no limite de linhas do mapa de calor
+
+    Usa o agrupamento mais fino (coorte, semana, mês, trimestre, ano) com no
+    máximo max_linhas linhas; se nem por ano couber, junta blocos de coortes
+    consecutivas. O ROI de cada bucket é ponderado pelo investimento
+    (soma dos retornos / soma dos investimentos), igual ao ROI consolidado.
+
+    Args:
+        periodos: Início de cada coorte, em ordem cronológica
+        rotulos: Rótulo de cada coorte (usado quando não há agrupamento)
+        valor: Matriz coortes x horizonte do retorno acumulado
+        investimento: Investimento de cada coorte
+        max_linhas: Limite de linhas do gráfico
+
+    Returns:
+        Dict com 'frequencia' (None sem agrupamento, chave de
+        AGRUPAMENTOS_HEATMAP ou 'bloco'), 'rotulos', 'pct' (buckets x horizonte)
+        e 'grupo' (índice do bucket de cada coorte, para o detalhamento)
+    """
+    periodos = pd.Series(pd.to_datetime(np.asarray(periodos)))
+    valor = np.asarray(valor, dtype=float)
+    investimento = np.asarray(investimento, dtype=float)
+    n = len(periodos)
+
+    frequencia, nomes = None, list(rotulos)
+    grupo = np.arange(n)
+    if n > max_linhas:
+        for candidata in AGRUPAMENTOS_HEATMAP:
+            buckets = periodos.dt.to_period(candidata)
+            codigos, unicos = pd.factorize(buckets, sort=True)
+            if len(unicos) <= max_linhas:
+                frequencia, grupo = candidata, codigos
+                nomes = [_rotulo_bucket(p, candidata) for p in unicos]
+                break
+        else:
+            tamanho = -(-n // max_linhas)
+            frequencia, grupo = 'bloco', np.arange(n) // tamanho
+            nomes = [f"{nomes[i]} (+{min(tamanho, n - i) - 1})" for i in range(0, n, tamanho)]
+
+    # Coortes em ordem cronológica: cada bucket é um trecho contíguo
+    inicios = np.flatnonzero(np.r_[True, grupo[1:] != grupo[:-1]]) if n else np.array([], dtype=int)
+    soma_valor = np.add.reduceat(valor, inicios, axis=0) if n else valor
+    soma_investimento = np.add.reduceat(investimento, inicios) if n else investimento
+
+    divisor = np.where(soma_investimento == 0, np.nan, soma_investimento)
+    return {
+        'frequencia': frequencia,
+        'rotulos': nomes,
+        'pct': soma_valor / divisor[:, None] * 100,
+        'grupo': grupo
+    }
+
+
+def criar_heatmap_coortes(rotulos, pct, horizontes, title="", height=500,
+                          titulo_y="Mês de investimento (coorte)"):
+    """
+    Cria o mapa de calor de ROI (%) por coorte x mês relativo
+
+    Os valores vão arredondados a 1 casa para reduzir o payload enviado ao navegador.
+
+    Args:
+        rotulos: Rótulos das linhas (coortes ou buckets)
+        pct: Matriz linhas x horizonte de ROI (%)
+        horizontes: Meses relativos (colunas)
+        title: Título do gráfico
+        height: Altura do gráfico
+        titulo_y: Título do eixo Y
+
+    Returns:
+        Figura Plotly
+    """
+    fig = go.Figure(go.Heatmap(
+        z=np.round(np.asarray(pct, dtype=float), 1),
+        x=list(horizontes),
+        y=list(rotulos),
+        colorscale='RdYlGn',
+        colorbar=dict(title='ROI (%)'),
+        hovertemplate='%{y}<br>Mês relativo %{x}<br>ROI: %{z:,.1f}%<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=title,
+        height=height,
+        xaxis_title='Mês relativo (1º, 2º, ...)',
+        yaxis_title=titulo_y,
+        yaxis=dict(type='category')
+    )
+
+    return fig
@@ -0,0 +1,167 @@
+"""
+Motor de coortes de ROI diluído (coorte x horizonte)
+
+Cada coorte é um período de investimento (dia, semana ou mês) com o
+investimento em Ads e a receita recorrente que ele gerou. O retorno
+acumulado de todas as coortes em todos os horizontes é calculado de uma
+vez, como uma matriz NumPy (coortes x horizontes), com um único cumsum:
+
+    ROI_1 = Receita - Investimento
+    ROI_n = ROI_{n-1} + Receita
+
+A matriz fica em um bloco 2-D; o DataFrame das coortes só recebe as
+colunas dos marcos usados na tela (3, 6, 12... meses) e o payback,
+também calculado para todas as coortes de uma vez sobre a matriz.
+"""
+import numpy as np
+
+
+HORIZONTES_COORTE = [12, 24, 36]
+FREQUENCIAS_COORTE = {'M': 'Mensal', 'W': 'Semanal', 'D': 'Diária'}
+MARCOS_ROI = (3, 6, 12, 24, 36)
+
+
+def agrupar_coortes(df, frequencia='M'):
+    """
+    Agrupa as linhas da planilha em coortes diárias, semanais ou mensais
+
+    Args:
+        df: DataFrame com periodo, receita_web e total_ads
+        frequencia: 'D', 'W' ou 'M'
+
+    Returns:
+        DataFrame em ordem cronológica com periodo (início da coorte),
+        mes_ano_str (rótulo da coorte), receita_web e total_ads somados
+    """
+    if frequencia not in FREQUENCIAS_COORTE:
+        raise ValueError(f"Frequência de coorte inválida: {frequencia}")
+
+    inicio = df['periodo'].dt.to_period(frequencia).dt.start_time.rename('periodo')
+    coortes = (
+        df.groupby(inicio, sort=True)[['receita_web', 'total_ads']]
+        .sum()
+        .reset_index()
+    )
+
+    datas = coortes['periodo'].to_numpy(dtype='datetime64[ns]')
+    unidade = 'M' if frequencia == 'M' else 'D'
+    coortes.insert(1, 'mes_ano_str', np.datetime_as_string(datas.astype(f'datetime64[{unidade}]'), unit=unidade))
+    return coortes
+
+
+def matriz_roi(receitas, investimento, horizonte):
+    """
+    Retorno acumulado e ROI (%) de cada coorte em cada horizonte
+
+    Args:
+        receitas: Receita por coorte; 1-D (mesma receita em todos os meses)
+                  ou 2-D coortes x horizonte (receita de cada mês relativo)
+        investimento: Investimento de cada coorte (1-D)
+        horizonte: Número de meses relativos
+
+    Returns:
+        Tuple (valor, pct) de arrays coortes x horizonte; pct é NaN onde
+        o investimento é zero
+    """
+    receitas = np.asarray(receitas, dtype=float)
+    investimento = np.asarray(investimento, dtype=float)
+
+    if receitas.ndim == 1:
+        receitas = np.broadcast_to(receitas[:, None], (receitas.size, horizonte))
+
+    valor = np.cumsum(receitas[:, :horizonte], axis=1)
+    valor -= investimento[:, None]
+
+    divisor = np.where(investimento == 0, np.nan, investimento)
+    pct = valor / divisor[:, None] * 100
+    return valor, pct
+
+
+def calcular_payback(valor, investimento=None, interpolado=False):
+    """
+    Payback de todas as coortes: primeiro mês relativo com retorno acumulado >= 0
+
+    O primeiro mês é o argmax da máscara booleana (valor >= 0); coortes em
+    que a máscara é toda falsa recebem NaN (sem payback no horizonte).
+
+    Args:
+        valor: Matriz coortes x horizonte do retorno acumulado
+        investimento: Investimento de cada coorte (retorno no mês 0 = -investimento);
+                      obrigatório no modo interpolado
+        interpolado: Se True, payback fracionário por interpolação linear entre
+                     o último mês negativo e o primeiro mês >= 0
+
+    Returns:
+        Array float por coorte (meses; NaN sem payback)
+    """
+    valor = np.asarray(valor, dtype=float)
+    mascara = valor >= 0
+    tem_payback = mascara.any(axis=1)
+    primeiro = mascara.argmax(axis=1)
+
+    if not interpolado:
+        return np.where(tem_payback, primeiro + 1, np.nan)
+
+    if investimento is None:
+        raise ValueError("O payback interpolado precisa do investimento de cada coorte")
+
+    linhas = np.arange(valor.shape[0])
+    atual = valor[linhas, primeiro]
+    anterior = np.where(
+        primeiro == 0,
+        -np.asarray(investimento, dtype=float),
+        valor[linhas, np.maximum(primeiro - 1, 0)]
+    )
+
+    # Fração do mês em que o acumulado cruza o zero
+    variacao = atual - anterior
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fracao = np.where(variacao > 0, -anterior / variacao, 1.0)
+
+    return np.where(tem_payback, primeiro + np.clip(fracao, 0.0, 1.0), np.nan)
+
+
+def calcular_coortes(df, horizonte=12, frequencia='M'):
+    """
+    Monta as coortes e a matriz de ROI diluído
+
+    Args:
+        df: DataFrame da planilha (periodo, receita_web, total_ads)
+        horizonte: Meses relativos da matriz (ex: 12, 24, 36)
+        frequencia: Granularidade das coortes ('D', 'W' ou 'M')
+
+    Returns:
+        Dict com:
+        - 'coortes': DataFrame por coorte com roi_simples_pct, as colunas
+          roi_{m}m_valor / roi_{m}m_pct dos marcos até o horizonte,
+          payback_meses e payback_meses_interpolado (NaN sem payback)
+        - 'horizontes': array 1..horizonte
+        - 'valor': matriz coortes x horizonte do retorno acumulado (R$)
+        - 'pct': matriz coortes x horizonte do ROI (%)
+    """
+    coortes = agrupar_coortes(df, frequencia)
+    receita = coortes['receita_web'].to_numpy(dtype=float)
+    investimento = coortes['total_ads'].to_numpy(dtype=float)
+
+    valor, pct = matriz_roi(receita, investimento, horizonte)
+
+    # Mesma regra de calcular_roi (investimento zero -> 0%)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coortes['roi_simples_pct'] = np.where(
+            investimento == 0, 0.0, (receita - investimento) / investimento * 100
+        )
+
+    for marco in MARCOS_ROI:
+        if marco <= horizonte:
+            coortes[f'roi_{marco}m_valor'] = valor[:, marco - 1]
+            coortes[f'roi_{marco}m_pct'] = pct[:, marco - 1]
+
+    coortes['payback_meses'] = calcular_payback(valor)
+    coortes['payback_meses_interpolado'] = calcular_payback(valor, investimento, interpolado=True)
+
+    return {
+        'coortes': coortes,
+        'horizontes': np.arange(1, horizonte + 1),
+        'valor': valor,
+        'pct': pct
+    }
@@ -0,0 +1,149 @@
+"""
+Importância por permutação e dependência parcial do modelo de ROI
+
+O cálculo roda em segundo plano (uma thread por processo) depois do
+treino e o resultado é gravado ao lado do artefato do modelo, em
+DIR_MODELOS/<chave>.explicacao.joblib. A tab apenas consulta o estado:
+nunca espera o cálculo terminar.
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.inspection import permutation_importance, partial_dependence
+
+from config.settings import N_JOBS_MODELOS
+from utils.modelos import DIR_MODELOS
+
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='explicacao')
+_pendentes = {}
+_falhas = set()
+_trava = threading.Lock()
+
+
+def caminho_explicacao(chave, diretorio=DIR_MODELOS):
+    """Caminho do arquivo de explicação de um modelo"""
+    return os.path.join(diretorio, f"{chave}.explicacao.joblib")
+
+
+def _dependencia_parcial(modelo, X, feat, pontos):
+    """Curva de dependência parcial de uma variável"""
+    resultado = partial_dependence(
+        modelo, X, [feat], grid_resolution=pontos, kind='average'
+    )
+    return feat, {
+        'valores': np.asarray(resultado['grid_values'][0]),
+        'media': np.asarray(resultado['average'][0])
+    }
+
+
+def calcular_explicacao(modelo, X, y, fracao_teste=0.25, n_repeticoes=10,
+                        pontos_dependencia=20, n_jobs=N_JOBS_MODELOS):
+    """
+    Importância por permutação e dependência parcial, paralelizadas por variável
+
+    A importância é medida nos meses mais recentes (mesmo recorte de teste
+    do treino), o que evita o viés da importância por impureza.
+
+    Args:
+        modelo: Estimador treinado
+        X: DataFrame de variáveis explicativas em ordem cronológica
+        y: Series com o alvo
+        fracao_teste: Fração final do histórico usada na permutação
+        n_repeticoes: Permutações por variável
+        pontos_dependencia: Pontos de cada curva de dependência parcial
+        n_jobs: Núcleos usados (as variáveis são distribuídas entre eles)
+
+    Returns:
+        Dict com:
+        - 'importancia': DataFrame (variavel, importancia, desvio) em ordem decrescente
+        - 'dependencia': {variável: {'valores': array, 'media': array}}
+    """
+    n_teste = max(int(round(len(X) * fracao_teste)), 1)
+    X_teste, y_teste = X.iloc[-n_teste:], y.iloc[-n_teste:]
+
+    permutacao = permutation_importance(
+        modelo, X_teste, y_teste,
+        scoring='neg_mean_absolute_error',
+        n_repeats=n_repeticoes,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+    importancia = pd.DataFrame({
+        'variavel': list(X.columns),
+        'importancia': permutacao.importances_mean,
+        'desvio': permutacao.importances_std
+    }).sort_values('importancia', ascending=False).reset_index(drop=True)
+
+    curvas = Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(_dependencia_parcial)(modelo, X, feat, pontos_dependencia)
+        for feat in X.columns
+    )
+
+    return {'importancia': importancia, 'dependencia': dict(curvas)}
+
+
+def _tarefa_explicacao(chave, modelo, X, y, diretorio):
+    """Executada na thread de segundo plano"""
+    try:
+        explicacao = calcular_explicacao(modelo, X, y)
+        os.makedirs(diretorio, exist_ok=True)
+        # Nome único: outra sessão pode estar gravando a mesma chave
+        descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+        os.close(descritor)
+        try:
+            joblib.dump(explicacao, temporario)
+            os.replace(temporario, caminho_explicacao(chave, diretorio))
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+    except Exception as e:
+        print(f"Erro ao calcular explicação do modelo {chave}: {e}")
+        with _trava:
+            _falhas.add(chave)
+    finally:
+        with _trava:
+            _pendentes.pop(chave, None)
+
+
+def obter_explicacao(artefato, X, y, diretorio=DIR_MODELOS):
+    """
+    Retorna a explicação do modelo se pronta; senão agenda o cálculo
+
+    Não bloqueia: na primeira chamada agenda o cálculo em segundo plano e
+    retorna o status 'calculando'.
+
+    Args:
+        artefato: Dict retornado por obter_modelo_roi
+        X: DataFrame usado no treino
+        y: Series usada no treino
+        diretorio: Diretório do store
+
+    Returns:
+        Dict com 'status' ('pronto', 'calculando' ou 'erro') e, quando pronto,
+        'importancia' e 'dependencia'
+    """
+    chave = artefato['chave']
+    caminho = caminho_explicacao(chave, diretorio)
+
+    if os.path.exists(caminho):
+        try:
+            return {'status': 'pronto', **joblib.load(caminho)}
+        except Exception as e:
+            print(f"Erro ao carregar explicação {chave}: {e}")
+
+    with _trava:
+        if chave in _falhas:
+            return {'status': 'erro'}
+        if chave not in _pendentes:
+            _pendentes[chave] = _executor.submit(
+                _tarefa_explicacao, chave, artefato['modelo'], X.copy(), y.copy(), diretorio
+            )
+
+    return {'status': 'calculando'}
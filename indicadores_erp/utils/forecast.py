@@ -7,8 +7,15 @@ from sklearn.linear_model import LinearRegression
 from scipy import stats
 import sklearn.metrics as metrics
 
+from utils.suavizacao import media_movel, mediana_movel, ewma
+from utils.tendencia import mann_kendall_lote
 
-def prever_cenarios(df, coluna, num_previsoes=3):
+
+METODOS_INTERVALO = ('gaussiano', 'bootstrap')
+
+
+def prever_cenarios(df, coluna, num_previsoes=3, metodo_intervalo='gaussiano',
+                    n_simulacoes=20000, quantis=None, seed=None):
     """
     Realiza previsão com intervalos de confiança
     
@@ -16,10 +23,20 @@ def prever_cenarios(df, coluna, num_previsoes=3):
         df: DataFrame com os dados históricos (apenas dados apurados)
         coluna: Nome da coluna a prever
         num_previsoes: Número de períodos para prever
+        metodo_intervalo: 'gaussiano' (±1,96σ) ou 'bootstrap' (resíduos reamostrados)
+        n_simulacoes: Número de trajetórias no modo bootstrap
+        quantis: Quantis adicionais a retornar no modo bootstrap
+        seed: Semente do gerador aleatório (para resultados reproduzíveis)
     
     Returns:
         Dict com previsões e métricas (como pandas Series)
+    
+    Raises:
+        ValueError: Se metodo_intervalo não for 'gaussiano' nem 'bootstrap'
     """
+    if metodo_intervalo not in METODOS_INTERVALO:
+        raise ValueError("Método de intervalo deve ser 'gaussiano' ou 'bootstrap'")
+    
     try:
         # Filtra apenas valores válidos (não zeros e não nulos)
         df_valido = df[df[coluna] > 0].copy()
@@ -49,12 +66,24 @@ def prever_cenarios(df, coluna, num_previsoes=3):
         erro_padrao = np.std(residuos)
         
         # Intervalo de confiança (95%)
-        z_score = 1.96
-        margem_erro = z_score * erro_padrao
-        
-        # Cenários
-        otimista = previsao_base + margem_erro
-        conservador = previsao_base - margem_erro
+        quantis_df = None
+        if metodo_intervalo == 'bootstrap':
+            niveis = sorted(set([0.025, 0.975] + list(quantis or [])))
+            quantis_df = simular_bootstrap_residuos(
+                y, num_previsoes,
+                n_simulacoes=n_simulacoes,
+                quantis=niveis,
+                seed=seed
+            )
+            otimista = quantis_df[0.975].values
+            conservador = quantis_df[0.025].values
+        else:
+            z_score = 1.96
+            margem_erro = z_score * erro_padrao
+            
+            # Cenários
+            otimista = previsao_base + margem_erro
+            conservador = previsao_base - margem_erro
         
         # Garantir valores não negativos
         conservador = np.maximum(conservador, 0)
@@ -63,9 +92,10 @@ def prever_cenarios(df, coluna, num_previsoes=3):
         metricas_calc = calcular_metricas_qualidade(y, y_pred)
         
         # Teste de tendência (Mann-Kendall)
-        tau, p_valor = stats.kendalltau(range(len(y)), y)
-        metricas_calc['Tendência (tau)'] = tau
-        metricas_calc['P-valor tendência'] = p_valor
+        teste = mann_kendall_lote(y)
+        metricas_calc['Tendência (tau)'] = teste['tau'][0]
+        metricas_calc['P-valor tendência'] = teste['p_valor'][0]
+        metricas_calc['Inclinação de Sen'] = teste['sen'][0]
         
         # Retorna como pandas Series para facilitar manipulação
         return {
@@ -74,7 +104,10 @@ def prever_cenarios(df, coluna, num_previsoes=3):
             'conservador': pd.Series(conservador),
             'metricas': metricas_calc,
             'modelo': modelo,
-            'erro_padrao': erro_padrao
+            'erro_padrao': erro_padrao,
+            'residuos': residuos,
+            'quantis': quantis_df,
+            'metodo_intervalo': metodo_intervalo
         }
     
     except Exception as e:
@@ -82,6 +115,55 @@ def prever_cenarios(df, coluna, num_previsoes=3):
         return None
 
 
+def simular_bootstrap_residuos(y, num_previsoes, n_simulacoes=20000,
+                               quantis=(0.025, 0.5, 0.975), seed=None):
+    """
+    Gera intervalos de previsão por bootstrap de resíduos da tendência linear
+    
+    Todas as trajetórias são sorteadas de uma vez em uma matriz
+    (n_simulacoes x períodos). Cada trajetória reajusta a tendência sobre uma
+    série reamostrada (incerteza dos parâmetros) e soma resíduos sorteados aos
+    períodos futuros (incerteza do ruído). Como os resíduos vêm da própria
+    série, assimetrias como o salto do CAC em Out/25 são preservadas.
+    
+    Args:
+        y: Array com os valores históricos válidos
+        num_previsoes: Número de períodos para prever
+        n_simulacoes: Número de trajetórias simuladas
+        quantis: Quantis a calcular para cada horizonte
+        seed: Semente do gerador aleatório (None = aleatório)
+    
+    Returns:
+        DataFrame (horizonte x quantil) com os valores simulados
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    
+    X = np.column_stack([np.ones(n), np.arange(n)])
+    X_pinv = np.linalg.pinv(X)
+    coef = X_pinv @ y
+    ajustado = X @ coef
+    
+    # Resíduos centrados e corrigidos pelos graus de liberdade do ajuste
+    residuos = y - ajustado
+    residuos = (residuos - residuos.mean()) * np.sqrt(n / max(n - 2, 1))
+    
+    rng = np.random.default_rng(seed)
+    sorteio = residuos[rng.integers(0, n, size=(n_simulacoes, n + num_previsoes))]
+    
+    # Reajuste da tendência em todas as séries reamostradas de uma só vez
+    coef_boot = (ajustado + sorteio[:, :n]) @ X_pinv.T
+    t_futuro = np.arange(n, n + num_previsoes)
+    trajetorias = (
+        coef_boot[:, [0]]
+        + coef_boot[:, [1]] * t_futuro
+        + sorteio[:, n:]
+    )
+    
+    valores = np.quantile(trajetorias, quantis, axis=0)
+    return pd.DataFrame(valores.T, columns=list(quantis))
+
+
 def calcular_metricas_qualidade(y_real, y_pred):
     """
     Calcula métricas de qualidade da previsão
@@ -362,36 +444,29 @@ def suavizar_serie(valores, janela=3, metodo='media'):
     Args:
         valores: Array de valores
         janela: Tamanho da janela de suavização
-        metodo: Método de suavização ('media' ou 'mediana')
+        metodo: Método de suavização ('media', 'mediana' ou 'ewma')
     
     Returns:
         Array com valores suavizados
     """
     try:
-        valores_array = np.array(valores)
+        valores_array = np.array(valores, dtype=float)
         n = len(valores_array)
         
         if n < janela:
             return valores
         
-        suavizados = np.zeros(n)
+        if metodo == 'media':
+            suavizados = media_movel(valores_array, janela)
+        elif metodo == 'mediana':
+            suavizados = mediana_movel(valores_array, janela)
+        elif metodo == 'ewma':
+            suavizados = ewma(valores_array, span=janela)
+        else:
+            return valores_array.tolist()
         
-        for i in range(n):
-            inicio = max(0, i - janela//2)
-            fim = min(n, i + janela//2 + 1)
-            
-            janela_valores = valores_array[inicio:fim]
-            janela_validos = janela_valores[janela_valores > 0]
-            
-            if len(janela_validos) > 0:
-                if metodo == 'media':
-                    suavizados[i] = np.mean(janela_validos)
-                elif metodo == 'mediana':
-                    suavizados[i] = np.median(janela_validos)
-                else:
-                    suavizados[i] = valores_array[i]
-            else:
-                suavizados[i] = valores_array[i]
+        # Janelas sem valores válidos mantêm o valor original
+        suavizados = np.where(np.isnan(suavizados), valores_array, suavizados)
         
         return suavizados.tolist()
     except Exception as e:
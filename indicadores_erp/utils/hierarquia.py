@@ -0,0 +1,160 @@
+"""
+Reconciliação hierárquica de previsões (ex: Total Ads = Custo Meta + Custo Google)
+"""
+import numpy as np
+
+
+METODOS_RECONCILIACAO = ['bottom_up', 'top_down', 'ols', 'wls', 'mint']
+
+
+def matriz_agregacao(hierarquia):
+    """
+    Monta a matriz de agregação S a partir de um dict pai -> filhos
+
+    Hierarquias com vários níveis são aceitas (um filho pode ser pai de
+    outros). As folhas são os nós que não aparecem como chave.
+
+    Args:
+        hierarquia: Dict {serie_agregada: [series_filhas]}
+
+    Returns:
+        Tuple (S, nomes, folhas): S tem uma linha por série (agregadas
+        primeiro, folhas por último) e uma coluna por folha
+    """
+    filhos = {pai: list(lista) for pai, lista in hierarquia.items()}
+    todos_filhos = [f for lista in filhos.values() for f in lista]
+    raizes = [pai for pai in filhos if pai not in todos_filhos]
+
+    agregadas = []
+    folhas = []
+
+    def _visitar(no):
+        if no in filhos:
+            agregadas.append(no)
+            for filho in filhos[no]:
+                _visitar(filho)
+        elif no not in folhas:
+            folhas.append(no)
+
+    for raiz in raizes:
+        _visitar(raiz)
+
+    indice_folha = {folha: j for j, folha in enumerate(folhas)}
+
+    def _folhas_de(no):
+        if no not in filhos:
+            return [no]
+        return [f for filho in filhos[no] for f in _folhas_de(filho)]
+
+    S = np.zeros((len(agregadas) + len(folhas), len(folhas)))
+    for i, no in enumerate(agregadas):
+        S[i, [indice_folha[f] for f in _folhas_de(no)]] = 1
+    S[len(agregadas):] = np.eye(len(folhas))
+
+    return S, agregadas + folhas, folhas
+
+
+def _covariancia_encolhida(residuos):
+    """
+    Covariância dos resíduos encolhida em direção à diagonal (Schäfer-Strimmer)
+
+    Com poucos meses de histórico a covariância amostral é singular; o
+    encolhimento garante uma matriz invertível para o MinT.
+    """
+    T = residuos.shape[0]
+    centrados = residuos - residuos.mean(axis=0)
+    cov = centrados.T @ centrados / T
+    desvio = np.sqrt(np.diag(cov))
+    desvio = np.where(desvio > 0, desvio, 1.0)
+
+    padronizados = centrados / desvio
+    corr = padronizados.T @ padronizados / T
+    fora_diag = ~np.eye(len(corr), dtype=bool)
+
+    if not fora_diag.any():
+        return cov
+
+    # Variância de cada correlação sem materializar o tensor (T x n x n)
+    quadrados = padronizados ** 2
+    var_corr = (quadrados.T @ quadrados - T * corr ** 2) * T / (T - 1) ** 3
+    lam = var_corr[fora_diag].sum() / max((corr[fora_diag] ** 2).sum(), 1e-12)
+    lam = float(np.clip(lam, 0, 1))
+
+    corr_encolhida = corr * (1 - lam)
+    np.fill_diagonal(corr_encolhida, 1.0)
+    return corr_encolhida * np.outer(desvio, desvio)
+
+
+def matriz_projecao(S, metodo='mint', residuos=None, proporcoes=None):
+    """
+    Calcula a matriz G que leva previsões de todos os níveis às folhas
+
+    As previsões reconciliadas são S @ G @ previsões_base.
+
+    Args:
+        S: Matriz de agregação (séries x folhas)
+        metodo: 'bottom_up', 'top_down', 'ols', 'wls' ou 'mint'
+        residuos: Array (períodos x séries) de resíduos in-sample
+            (obrigatório para 'wls' e 'mint')
+        proporcoes: Array com a participação histórica de cada folha no
+            total (obrigatório para 'top_down', que desagrega a primeira
+            série de S, ou seja, a raiz)
+
+    Returns:
+        np.ndarray (folhas x séries)
+    """
+    n, m = S.shape
+
+    if metodo == 'bottom_up':
+        G = np.zeros((m, n))
+        G[:, n - m:] = np.eye(m)
+        return G
+
+    if metodo == 'top_down':
+        if proporcoes is None:
+            raise ValueError("Top-down requer as proporções históricas das folhas")
+        G = np.zeros((m, n))
+        G[:, 0] = np.asarray(proporcoes, dtype=float)
+        return G
+
+    if metodo == 'ols':
+        W_inv_S = S
+    elif metodo == 'wls':
+        variancias = np.var(residuos, axis=0)
+        positivas = variancias[variancias > 0]
+        if positivas.size == 0:
+            # Sem variância observável em nenhuma série: pesos iguais (OLS)
+            W_inv_S = S
+        else:
+            variancias = np.where(variancias > 0, variancias, positivas.min())
+            W_inv_S = S / variancias[:, None]
+    elif metodo == 'mint':
+        W = _covariancia_encolhida(residuos)
+        W_inv_S = np.linalg.solve(W, S)
+    else:
+        raise ValueError(f"Método deve ser um de {METODOS_RECONCILIACAO}")
+
+    # G = (S' W⁻¹ S)⁻¹ S' W⁻¹  (W simétrica)
+    return np.linalg.solve(S.T @ W_inv_S, W_inv_S.T)
+
+
+def reconciliar_previsoes(previsoes, S, metodo='mint', residuos=None, proporcoes=None):
+    """
+    Reconcilia previsões de todos os níveis com uma única projeção matricial
+
+    Args:
+        previsoes: Array (séries x ...) na ordem de matriz_agregacao; as
+            demais dimensões (horizonte, cenários) são reconciliadas juntas
+        S: Matriz de agregação
+        metodo: Método de reconciliação
+        residuos: Resíduos in-sample (períodos x séries)
+        proporcoes: Participação histórica das folhas (top-down)
+
+    Returns:
+        np.ndarray com o mesmo formato de previsoes, coerente com a hierarquia
+    """
+    previsoes = np.asarray(previsoes, dtype=float)
+    G = matriz_projecao(S, metodo, residuos=residuos, proporcoes=proporcoes)
+
+    planas = previsoes.reshape(previsoes.shape[0], -1)
+    return (S @ (G @ planas)).reshape(previsoes.shape)
@@ -0,0 +1,283 @@
+"""
+Modelos de previsão com atualização incremental (RLS e Holt)
+
+Cada série guarda seu estado ajustado em disco. Quando um novo mês é
+apurado, só os pontos novos são incorporados ao estado, em O(1) por ponto,
+sem reler nem reajustar o histórico.
+"""
+import os
+import re
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+
+from config.settings import DIR_ARTEFATOS
+
+
+DIR_ESTADOS = os.path.join(DIR_ARTEFATOS, 'estados_forecast')
+
+# Parâmetros de suavização do modelo de Holt (nível e tendência)
+ALPHA_HOLT = 0.5
+BETA_HOLT = 0.3
+
+
+# ============================================================================
+# TENDÊNCIA LINEAR POR MÍNIMOS QUADRADOS RECURSIVOS (RLS)
+# ============================================================================
+
+def inicializar_tendencia(y):
+    """
+    Ajusta a tendência linear em lote para iniciar o estado do RLS
+
+    Equivale ao LinearRegression usado em prever_cenarios (t = 0, 1, ...).
+
+    Args:
+        y: Array com os valores válidos (mínimo 2)
+
+    Returns:
+        Dict com coeficientes, matriz P e soma dos resíduos ao quadrado
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    X = np.column_stack([np.ones(n), np.arange(n)])
+    P = np.linalg.inv(X.T @ X)
+    theta = P @ X.T @ y
+    residuos = y - X @ theta
+
+    return {
+        'theta': theta.tolist(),
+        'P': P.tolist(),
+        'n': n,
+        'sqr': float(residuos @ residuos)
+    }
+
+
+def atualizar_tendencia(estado, y_novo):
+    """
+    Incorpora um novo ponto à tendência em O(1)
+
+    Args:
+        estado: Dict retornado por inicializar_tendencia
+        y_novo: Valor do novo período
+
+    Returns:
+        Dict com o estado atualizado
+    """
+    theta = np.array(estado['theta'])
+    P = np.array(estado['P'])
+    x = np.array([1.0, estado['n']])
+
+    Px = P @ x
+    denominador = 1.0 + x @ Px
+    erro = y_novo - x @ theta
+    ganho = Px / denominador
+
+    return {
+        'theta': (theta + ganho * erro).tolist(),
+        'P': (P - np.outer(ganho, Px)).tolist(),
+        'n': estado['n'] + 1,
+        # Identidade do RLS: a soma dos resíduos cresce erro² / (1 + x'Px)
+        'sqr': estado['sqr'] + erro ** 2 / denominador
+    }
+
+
+def prever_tendencia(estado, num_previsoes):
+    """Projeta a tendência para os próximos períodos"""
+    theta = np.array(estado['theta'])
+    t_futuro = np.arange(estado['n'], estado['n'] + num_previsoes)
+    return theta[0] + theta[1] * t_futuro
+
+
+# ============================================================================
+# SUAVIZAÇÃO EXPONENCIAL DE HOLT
+# ============================================================================
+
+def inicializar_holt(y, alpha=ALPHA_HOLT, beta=BETA_HOLT):
+    """
+    Inicia o estado de Holt com os dois primeiros pontos e percorre o restante
+
+    Args:
+        y: Array com os valores válidos (mínimo 2)
+        alpha: Suavização do nível
+        beta: Suavização da tendência
+
+    Returns:
+        Dict com nível, tendência e erro quadrático acumulado
+    """
+    estado = {
+        'nivel': float(y[0]),
+        'tendencia': float(y[1] - y[0]),
+        'alpha': alpha,
+        'beta': beta,
+        'n': 1,
+        'sqe': 0.0
+    }
+    for valor in y[1:]:
+        estado = atualizar_holt(estado, valor)
+    return estado
+
+
+def atualizar_holt(estado, y_novo):
+    """
+    Incorpora um novo ponto ao estado de Holt em O(1)
+
+    Args:
+        estado: Dict com nível, tendência e parâmetros
+        y_novo: Valor do novo período
+
+    Returns:
+        Dict com o estado atualizado
+    """
+    alpha = estado['alpha']
+    beta = estado['beta']
+    previsto = estado['nivel'] + estado['tendencia']
+
+    nivel = alpha * y_novo + (1 - alpha) * previsto
+    tendencia = beta * (nivel - estado['nivel']) + (1 - beta) * estado['tendencia']
+
+    return {
+        **estado,
+        'nivel': float(nivel),
+        'tendencia': float(tendencia),
+        'n': estado['n'] + 1,
+        'sqe': estado['sqe'] + float(y_novo - previsto) ** 2
+    }
+
+
+def prever_holt(estado, num_previsoes):
+    """Projeta nível + h * tendência para os próximos períodos"""
+    passos = np.arange(1, num_previsoes + 1)
+    return estado['nivel'] + estado['tendencia'] * passos
+
+
+# ============================================================================
+# ESTADO POR SÉRIE E PERSISTÊNCIA
+# ============================================================================
+
+def _caminho_estado(serie, diretorio):
+    """Arquivo JSON do estado de uma série"""
+    nome = re.sub(r'[^0-9A-Za-z]+', '_', serie).strip('_').lower()
+    return os.path.join(diretorio, f"{nome}.json")
+
+
+def carregar_estado(serie, diretorio=DIR_ESTADOS):
+    """
+    Carrega o estado salvo de uma série
+
+    Returns:
+        Dict com o estado ou None se ainda não existir / estiver corrompido
+    """
+    caminho = _caminho_estado(serie, diretorio)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except ValueError as e:
+        # json.JSONDecodeError é subclasse de ValueError
+        print(f"Estado da série {serie} ilegível, será recriado: {e}")
+        return None
+
+
+def salvar_estado(estado, diretorio=DIR_ESTADOS):
+    """
+    Grava o estado de uma série de forma atômica (arquivo temporário + rename)
+
+    Evita que outra sessão leia um arquivo pela metade.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+            json.dump(estado, arquivo, ensure_ascii=False, indent=2)
+        os.replace(temporario, _caminho_estado(estado['serie'], diretorio))
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def atualizar_estado_serie(df, coluna, serie=None, coluna_periodo='Mês',
+                           diretorio=DIR_ESTADOS):
+    """
+    Sincroniza o estado salvo de uma série com os períodos apurados
+
+    Se já existe estado, apenas os períodos após 'ultimo_periodo' são
+    incorporados. Sem estado (ou se o último período não estiver mais no
+    DataFrame), o estado é criado com um ajuste em lote.
+
+    Args:
+        df: DataFrame com os períodos apurados, em ordem cronológica
+        coluna: Coluna a modelar
+        serie: Identificador da série no store (padrão: nome da coluna)
+        coluna_periodo: Coluna com o rótulo do período
+        diretorio: Diretório do store de estados
+
+    Returns:
+        Dict com o estado atualizado ou None se houver poucos dados
+    """
+    serie = serie or coluna
+    estado = carregar_estado(serie, diretorio)
+    periodos = df[coluna_periodo].tolist()
+
+    if estado is not None and estado['ultimo_periodo'] in periodos:
+        inicio = periodos.index(estado['ultimo_periodo']) + 1
+        novos = df.iloc[inicio:]
+        if novos.empty:
+            return estado
+
+        # Zeros/nulos são ignorados, como em prever_cenarios
+        for valor in novos[coluna].values:
+            if valor > 0:
+                estado['tendencia'] = atualizar_tendencia(estado['tendencia'], valor)
+                estado['holt'] = atualizar_holt(estado['holt'], valor)
+        estado['ultimo_periodo'] = periodos[-1]
+    else:
+        valores = df[coluna].values
+        validos = valores[valores > 0].astype(float)
+        if len(validos) < 3:
+            return None
+
+        estado = {
+            'serie': serie,
+            'coluna': coluna,
+            'ultimo_periodo': periodos[-1],
+            'tendencia': inicializar_tendencia(validos),
+            'holt': inicializar_holt(validos)
+        }
+
+    salvar_estado(estado, diretorio)
+    return estado
+
+
+def prever_com_estado(estado, num_previsoes=3, modelo='tendencia', z_score=1.96):
+    """
+    Gera previsões a partir do estado salvo, sem acessar o histórico
+
+    Args:
+        estado: Dict retornado por atualizar_estado_serie
+        num_previsoes: Número de períodos para prever
+        modelo: 'tendencia' (RLS) ou 'holt'
+        z_score: Multiplicador do erro padrão para os cenários
+
+    Returns:
+        Dict com previsões no mesmo formato de prever_cenarios
+    """
+    if modelo == 'tendencia':
+        previsao = prever_tendencia(estado['tendencia'], num_previsoes)
+        erro_padrao = np.sqrt(estado['tendencia']['sqr'] / estado['tendencia']['n'])
+    elif modelo == 'holt':
+        previsao = prever_holt(estado['holt'], num_previsoes)
+        erro_padrao = np.sqrt(estado['holt']['sqe'] / max(estado['holt']['n'] - 1, 1))
+    else:
+        raise ValueError("Modelo deve ser 'tendencia' ou 'holt'")
+
+    margem_erro = z_score * erro_padrao
+
+    return {
+        'previsao': pd.Series(previsao),
+        'otimista': pd.Series(previsao + margem_erro),
+        'conservador': pd.Series(np.maximum(previsao - margem_erro, 0)),
+        'erro_padrao': erro_padrao,
+        'ultimo_periodo': estado['ultimo_periodo']
+    }
@@ -0,0 +1,281 @@
+"""
+Análise de intervenção: estimativa do efeito de campanhas a partir do histórico
+"""
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from utils.ajustes import mes_para_ordinal
+
+
+# KPIs que podem ser zero ou negativos: modelados em nível, não em log
+KPIS_ESCALA_NIVEL = ('ROI (%)',)
+
+
+def _regressores_eventos(eventos, ordinais):
+    """
+    Monta as colunas de intervenção para os meses observados
+
+    - Campanhas geram um pulso por mês do período (efeito só naquele mês)
+    - Ajustes de preço geram um degrau a partir do início (efeito permanente)
+
+    Returns:
+        Lista de dicts com metadados e a coluna de cada regressor
+    """
+    pulsos = []
+    degraus = []
+
+    for evento in eventos:
+        inicio = mes_para_ordinal(evento['inicio'])
+
+        if evento['tipo'] == 'campanha':
+            fim = mes_para_ordinal(evento['fim']) if evento.get('fim') else inicio
+            for ordinal in range(inicio, fim + 1):
+                coluna = (ordinais == ordinal).astype(float)
+                if coluna.any():
+                    pulsos.append({
+                        'evento': evento['nome'],
+                        'regressor': 'pulso',
+                        'posicao': ordinal - inicio,
+                        'ordinal': ordinal,
+                        'coluna': coluna
+                    })
+        elif evento['tipo'] == 'preco':
+            coluna = (ordinais >= inicio).astype(float)
+            if coluna.any():
+                degraus.append({
+                    'evento': evento['nome'],
+                    'regressor': 'degrau',
+                    'posicao': 0,
+                    'ordinal': inicio,
+                    'coluna': coluna
+                })
+
+    # Pulsos primeiro: se um degrau coincidir com os pulsos observados,
+    # é ele que fica como não identificável
+    return pulsos + degraus
+
+
+def _ajustar_eventos(ordinais, Y, eventos, confianca):
+    """
+    Ajusta nível + tendência + eventos para um bloco de séries com os mesmos meses
+
+    Args:
+        ordinais: Ordinais dos meses observados
+        Y: Array (meses x séries) na escala do modelo
+        eventos: Lista de eventos do calendário
+        confianca: Nível de confiança do intervalo
+
+    Returns:
+        Dict com 'X', 'coef', 'erro_padrao', 'gl', 't_critico', 'regressores'
+        e 'identificaveis' (com a coluna de cada um em X) ou None se não
+        houver eventos observados ou meses suficientes
+    """
+    regressores = _regressores_eventos(eventos, ordinais)
+    n = len(ordinais)
+    if not regressores or n < 3:
+        return None
+
+    base = [np.ones(n), (ordinais - ordinais[0]).astype(float)]
+
+    # Mantém apenas regressores linearmente independentes dos anteriores
+    X = np.column_stack(base)
+    identificaveis = []
+    for reg in regressores:
+        candidata = np.column_stack([X, reg['coluna']])
+        if np.linalg.matrix_rank(candidata) > X.shape[1]:
+            reg['identificavel'] = True
+            identificaveis.append((X.shape[1], reg))
+            X = candidata
+        else:
+            reg['identificavel'] = False
+
+    XtX_inv = np.linalg.pinv(X.T @ X)
+    coef = XtX_inv @ X.T @ Y
+
+    gl = n - X.shape[1]
+    if gl > 0:
+        residuos = Y - X @ coef
+        sigma2 = (residuos ** 2).sum(axis=0) / gl
+        erro_padrao = np.sqrt(np.outer(np.diag(XtX_inv), sigma2))
+        t_critico = stats.t.ppf(0.5 + confianca / 2, gl)
+    else:
+        erro_padrao = np.full_like(coef, np.nan)
+        t_critico = np.nan
+
+    return {
+        'X': X,
+        'coef': coef,
+        'erro_padrao': erro_padrao,
+        'gl': gl,
+        't_critico': t_critico,
+        'regressores': regressores,
+        'identificaveis': identificaveis
+    }
+
+
+def _linhas_efeitos(ajuste, kpis, nivel):
+    """Linhas do resultado (evento, mês, KPI) de um ajuste de _ajustar_eventos"""
+    X, coef, erro_padrao = ajuste['X'], ajuste['coef'], ajuste['erro_padrao']
+    gl, t_critico = ajuste['gl'], ajuste['t_critico']
+
+    linhas = []
+    for j, reg in ajuste['identificaveis']:
+        # Primeiro mês em que o regressor está ativo
+        i = int(np.argmax(reg['coluna']))
+        for k, kpi in enumerate(kpis):
+            efeito = coef[j, k]
+            ep = erro_padrao[j, k]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                p_valor = 2 * stats.t.sf(abs(efeito / ep), gl) if gl > 0 else np.nan
+
+            limites = np.array([efeito, efeito - t_critico * ep, efeito + t_critico * ep])
+            if nivel:
+                # Uplift sobre o valor esperado sem o evento (indefinido se <= 0)
+                sem_evento = X[i] @ coef[:, k] - efeito
+                uplift = limites / sem_evento * 100 if sem_evento > 0 else np.full(3, np.nan)
+            else:
+                uplift = (np.exp(limites) - 1) * 100
+
+            linhas.append({
+                'Evento': reg['evento'],
+                'Regressor': reg['regressor'],
+                'Posição': reg['posicao'],
+                'KPI': kpi,
+                'Escala': 'nível' if nivel else 'log',
+                'Efeito': efeito,
+                'Erro padrão': ep,
+                'Uplift (%)': uplift[0],
+                'IC inferior (%)': uplift[1],
+                'IC superior (%)': uplift[2],
+                'P-valor': p_valor,
+                'Identificável': True
+            })
+
+    for reg in ajuste['regressores']:
+        if not reg['identificavel']:
+            for kpi in kpis:
+                linhas.append({
+                    'Evento': reg['evento'],
+                    'Regressor': reg['regressor'],
+                    'Posição': reg['posicao'],
+                    'KPI': kpi,
+                    'Escala': 'nível' if nivel else 'log',
+                    'Efeito': np.nan,
+                    'Erro padrão': np.nan,
+                    'Uplift (%)': np.nan,
+                    'IC inferior (%)': np.nan,
+                    'IC superior (%)': np.nan,
+                    'P-valor': np.nan,
+                    'Identificável': False
+                })
+
+    return linhas
+
+
+def estimar_efeitos_eventos(df, kpis, eventos, coluna_mes='Mês', confianca=0.95):
+    """
+    Estima o efeito de cada evento sobre todos os KPIs
+
+    Ajusta KPI = nível + tendência + Σ efeitos dos eventos. KPIs positivos
+    são modelados em escala log, em que cada coeficiente é um efeito
+    multiplicativo, diretamente comparável aos multiplicadores de
+    config/calendario.py. KPIs que podem ser zero ou negativos
+    (KPIS_ESCALA_NIVEL, ex: ROI) são modelados em nível e o efeito é
+    convertido em uplift sobre o valor esperado sem o evento naquele mês.
+
+    Cada KPI usa os próprios meses válidos (positivos na escala log, não
+    nulos em nível); KPIs com os mesmos meses válidos são ajustados juntos,
+    com a mesma matriz de regressores (mínimos quadrados em lote).
+
+    Args:
+        df: DataFrame com os meses apurados
+        kpis: Lista de KPIs a analisar
+        eventos: Lista de eventos do calendário
+        coluna_mes: Nome da coluna de mês
+        confianca: Nível de confiança do intervalo
+
+    Returns:
+        DataFrame com uma linha por (evento, mês, KPI) ou None se não houver
+        eventos observados no histórico
+    """
+    kpis = [k for k in kpis if k in df.columns]
+    valores = df[kpis].astype(float)
+
+    # KPIs com os mesmos meses válidos compartilham um único ajuste
+    blocos = {}
+    for kpi in kpis:
+        nivel = kpi in KPIS_ESCALA_NIVEL
+        validos = valores[kpi].notna() if nivel else valores[kpi] > 0
+        blocos.setdefault((nivel, tuple(validos)), []).append(kpi)
+
+    linhas = []
+    for (nivel, validos), kpis_bloco in blocos.items():
+        df_valido = df[list(validos)]
+        ordinais = np.array([mes_para_ordinal(m) for m in df_valido[coluna_mes]])
+        Y = valores.loc[df_valido.index, kpis_bloco].values
+        if not nivel:
+            Y = np.log(Y)
+
+        ajuste = _ajustar_eventos(ordinais, Y, eventos, confianca)
+        if ajuste is not None:
+            linhas.extend(_linhas_efeitos(ajuste, kpis_bloco, nivel))
+
+    if not linhas:
+        return None
+    return pd.DataFrame(linhas).sort_values('Identificável', ascending=False, kind='stable')
+
+
+def calendario_com_estimativas(eventos, estimativas):
+    """
+    Substitui os multiplicadores das campanhas pelos efeitos estimados
+
+    Para cada campanha, usa as estimativas do próprio evento ou, se houver
+    a chave 'base_estimativa', as de um evento anterior (ex: a Black Friday
+    do ano seguinte reaproveita os efeitos medidos na do ano anterior).
+    Meses e KPIs sem estimativa mantêm o valor configurado.
+
+    Args:
+        eventos: Lista de eventos do calendário
+        estimativas: DataFrame retornado por estimar_efeitos_eventos
+
+    Returns:
+        list: Nova lista de eventos (a original não é alterada)
+    """
+    if estimativas is None or estimativas.empty:
+        return eventos
+
+    validas = estimativas[
+        estimativas['Identificável']
+        & (estimativas['Regressor'] == 'pulso')
+        & estimativas['Uplift (%)'].notna()
+    ]
+    multiplicador = {
+        (linha['Evento'], linha['Posição'], linha['KPI']): max(1 + linha['Uplift (%)'] / 100, 0.0)
+        for _, linha in validas.iterrows()
+    }
+
+    novos = []
+    for evento in eventos:
+        if evento['tipo'] != 'campanha':
+            novos.append(evento)
+            continue
+
+        origem = evento.get('base_estimativa', evento['nome'])
+        n_meses = 1
+        if evento.get('fim'):
+            n_meses = mes_para_ordinal(evento['fim']) - mes_para_ordinal(evento['inicio']) + 1
+
+        efeitos = []
+        for efeito in evento['efeitos']:
+            config = efeito.get('multiplicadores', [efeito.get('multiplicador')] * n_meses)
+            for kpi in efeito['kpis']:
+                mult = [
+                    multiplicador.get((origem, pos, kpi), valor)
+                    for pos, valor in enumerate(config)
+                ]
+                efeitos.append({'kpis': [kpi], 'multiplicadores': mult})
+
+        novos.append({**evento, 'efeitos': efeitos})
+
+    return novos
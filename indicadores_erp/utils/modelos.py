@@ -0,0 +1,323 @@
+"""
+Store persistente de modelos preditivos
+
+Cada modelo treinado é identificado por uma chave derivada de (conjunto de
+variáveis, impressão digital dos dados, hiperparâmetros) e gravado com
+joblib em DIR_ARTEFATOS/modelos. Com os mesmos dados e parâmetros o modelo
+é carregado do disco em vez de ser treinado de novo.
+
+O registro melhores_configuracoes.json guarda, por escopo dos dados (base
+do dashboard ou tenant) e conjunto de variáveis, a configuração vencedora
+do tuning (tuning_roi.py).
+"""
+import os
+import json
+import math
+import hashlib
+import tempfile
+from datetime import datetime
+
+import joblib
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import r2_score, mean_absolute_error
+
+from config.settings import DIR_ARTEFATOS, N_JOBS_MODELOS
+
+
+DIR_MODELOS = os.path.join(DIR_ARTEFATOS, 'modelos')
+ARQUIVO_MELHORES = 'melhores_configuracoes.json'
+ESCOPO_PADRAO = 'principal'
+
+TIPOS_MODELO = ['random_forest', 'hist_gradient_boosting', 'ridge']
+
+PARAMETROS_PADRAO_ROI = {
+    'n_estimators': 200,
+    'max_depth': 6,
+    'random_state': 42
+}
+
+
+def impressao_dados(X, y):
+    """
+    Impressão digital (sha256) dos dados de treino
+
+    Considera nomes de colunas, ordem das linhas e valores; qualquer
+    alteração nos dados gera uma impressão diferente.
+
+    Args:
+        X: DataFrame de variáveis explicativas
+        y: Series com a variável alvo
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    dados = pd.concat([X, y], axis=1)
+    hash_linhas = pd.util.hash_pandas_object(dados, index=False).values
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in dados.columns]).encode())
+    digest.update(hash_linhas.tobytes())
+    return digest.hexdigest()
+
+
+def chave_modelo(features, impressao, parametros, tipo='random_forest'):
+    """
+    Chave única do modelo no store
+
+    Args:
+        features: Lista de variáveis explicativas (a ordem importa)
+        impressao: Retorno de impressao_dados
+        parametros: Dict de hiperparâmetros
+        tipo: Família do modelo
+
+    Returns:
+        str: Chave com 20 caracteres hexadecimais
+    """
+    conteudo = json.dumps(
+        {'tipo': tipo, 'features': list(features), 'dados': impressao, 'parametros': parametros},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(conteudo.encode()).hexdigest()[:20]
+
+
+def caminho_modelo(chave, diretorio=DIR_MODELOS):
+    """Caminho do arquivo joblib de um modelo"""
+    return os.path.join(diretorio, f"{chave}.joblib")
+
+
+def salvar_modelo(artefato, chave, diretorio=DIR_MODELOS):
+    """
+    Grava o artefato de forma atômica (arquivo temporário + rename)
+
+    Evita que outro processo leia um arquivo pela metade.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    os.close(descritor)
+    try:
+        joblib.dump(artefato, temporario, compress=3)
+        os.replace(temporario, caminho_modelo(chave, diretorio))
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def carregar_modelo(chave, diretorio=DIR_MODELOS):
+    """
+    Carrega um artefato do store
+
+    Returns:
+        Dict do artefato ou None se não existir / estiver corrompido
+    """
+    caminho = caminho_modelo(chave, diretorio)
+    if not os.path.exists(caminho):
+        return None
+
+    try:
+        return joblib.load(caminho)
+    except Exception as e:
+        print(f"Erro ao carregar modelo {chave}: {e}")
+        return None
+
+
+def construir_estimador(tipo, parametros, n_jobs=N_JOBS_MODELOS):
+    """
+    Instancia o estimador de uma família de modelos
+
+    Args:
+        tipo: Um de TIPOS_MODELO
+        parametros: Hiperparâmetros do estimador
+        n_jobs: Núcleos usados no treino (quando o estimador aceita)
+
+    Returns:
+        Estimador scikit-learn não treinado
+    """
+    if tipo == 'random_forest':
+        return RandomForestRegressor(**parametros, n_jobs=n_jobs)
+    if tipo == 'hist_gradient_boosting':
+        return HistGradientBoostingRegressor(**parametros)
+    if tipo == 'ridge':
+        return make_pipeline(StandardScaler(), Ridge(**parametros))
+    raise ValueError(f"Tipo de modelo desconhecido: {tipo}")
+
+
+def treinar_modelo_roi(X, y, parametros=None, tipo='random_forest',
+                       n_jobs=N_JOBS_MODELOS, fracao_teste=0.25):
+    """
+    Treina o modelo de ROI e mede o desempenho nos meses mais recentes
+
+    A divisão respeita a ordem temporal: o teste são as últimas linhas.
+
+    Args:
+        X: DataFrame de variáveis explicativas em ordem cronológica
+        y: Series com o ROI (%)
+        parametros: Hiperparâmetros do estimador
+        tipo: Família do modelo (ver TIPOS_MODELO)
+        n_jobs: Núcleos usados no treino
+        fracao_teste: Fração final do histórico usada como teste
+
+    Returns:
+        Dict com 'modelo' e 'metricas' (R², MAE)
+    """
+    if parametros is None:
+        parametros = PARAMETROS_PADRAO_ROI if tipo == 'random_forest' else {}
+
+    n_teste = max(int(round(len(X) * fracao_teste)), 1)
+    X_train, X_test = X.iloc[:-n_teste], X.iloc[-n_teste:]
+    y_train, y_test = y.iloc[:-n_teste], y.iloc[-n_teste:]
+
+    modelo = construir_estimador(tipo, parametros, n_jobs)
+    modelo.fit(X_train, y_train)
+    y_pred = modelo.predict(X_test)
+
+    return {
+        'modelo': modelo,
+        'metricas': {
+            'R²': r2_score(y_test, y_pred),
+            'MAE': mean_absolute_error(y_test, y_pred)
+        }
+    }
+
+
+def _caminho_melhores(diretorio):
+    return os.path.join(diretorio, ARQUIVO_MELHORES)
+
+
+def carregar_melhores_configuracoes(diretorio=DIR_MODELOS):
+    """
+    Lê o registro de melhores configurações gerado pelo tuning
+
+    Returns:
+        Dict {'escopo:features separadas por |': configuração}
+    """
+    caminho = _caminho_melhores(diretorio)
+    if not os.path.exists(caminho):
+        return {}
+
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Erro ao ler {caminho}: {e}")
+        return {}
+
+
+def _chave_registro(features, escopo):
+    """Chave do registro: escopo dos dados + conjunto de variáveis"""
+    return f"{escopo}:{'|'.join(features)}"
+
+
+def _sem_nan(valor):
+    """Troca NaN/inf por None (null no JSON), recursivamente"""
+    if isinstance(valor, dict):
+        return {k: _sem_nan(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_sem_nan(v) for v in valor]
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+def melhor_configuracao(features, escopo=ESCOPO_PADRAO, diretorio=DIR_MODELOS):
+    """
+    Melhor configuração registrada para um conjunto de variáveis
+
+    Args:
+        features: Lista de variáveis explicativas
+        escopo: Escopo dos dados (ESCOPO_PADRAO = base do dashboard)
+        diretorio: Diretório do store
+
+    Returns:
+        Dict com 'tipo', 'parametros', 'metricas', ... ou None
+    """
+    return carregar_melhores_configuracoes(diretorio).get(_chave_registro(features, escopo))
+
+
+def registrar_melhor_configuracao(features, configuracao, escopo=ESCOPO_PADRAO, diretorio=DIR_MODELOS):
+    """
+    Registra a configuração vencedora do tuning para um conjunto de variáveis
+
+    Args:
+        features: Lista de variáveis explicativas
+        configuracao: Dict com pelo menos 'tipo' e 'parametros'
+        escopo: Escopo dos dados em que o tuning rodou (ex: tenant); um
+                tuning de outro escopo não substitui o do dashboard
+        diretorio: Diretório do store
+    """
+    registro = carregar_melhores_configuracoes(diretorio)
+    registro[_chave_registro(features, escopo)] = _sem_nan({
+        **configuracao,
+        'registrado_em': datetime.now().isoformat(timespec='seconds')
+    })
+
+    os.makedirs(diretorio, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+            json.dump(registro, f, ensure_ascii=False, indent=2, default=str, allow_nan=False)
+        os.replace(temporario, _caminho_melhores(diretorio))
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def obter_modelo_roi(X, y, tipo=None, parametros=None, escopo=ESCOPO_PADRAO, diretorio=DIR_MODELOS):
+    """
+    Retorna o modelo de ROI do store, treinando apenas se ainda não existir
+
+    Sem tipo/parâmetros explícitos, usa a melhor configuração registrada
+    pelo tuning (tuning_roi.py) ou, na falta dela, o RandomForest padrão.
+
+    Args:
+        X: DataFrame de variáveis explicativas em ordem cronológica
+        y: Series com o ROI (%)
+        tipo: Família do modelo (ver TIPOS_MODELO)
+        parametros: Hiperparâmetros do estimador
+        escopo: Escopo da melhor configuração registrada
+        diretorio: Diretório do store
+
+    Returns:
+        Dict com 'modelo', 'metricas', 'features', 'tipo', 'parametros',
+        'chave', 'impressao', 'treinado_em' e 'origem' ('disco' ou 'treino')
+    """
+    features = list(X.columns)
+
+    if tipo is None:
+        melhor = melhor_configuracao(features, escopo, diretorio)
+        if melhor is not None:
+            tipo, parametros = melhor['tipo'], melhor['parametros']
+        else:
+            tipo = 'random_forest'
+    if parametros is None:
+        parametros = PARAMETROS_PADRAO_ROI if tipo == 'random_forest' else {}
+
+    impressao = impressao_dados(X, y)
+    chave = chave_modelo(features, impressao, parametros, tipo)
+
+    artefato = carregar_modelo(chave, diretorio)
+    if artefato is not None:
+        return {**artefato, 'origem': 'disco'}
+
+    treino = treinar_modelo_roi(X, y, parametros, tipo)
+    artefato = {
+        'modelo': treino['modelo'],
+        'metricas': treino['metricas'],
+        'features': features,
+        'tipo': tipo,
+        'parametros': parametros,
+        'chave': chave,
+        'impressao': impressao,
+        'treinado_em': datetime.now().isoformat(timespec='seconds')
+    }
+
+    try:
+        salvar_modelo(artefato, chave, diretorio)
+    except OSError as e:
+        print(f"Erro ao salvar modelo {chave}: {e}")
+
+    return {**artefato, 'origem': 'treino'}
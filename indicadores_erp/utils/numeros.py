@@ -0,0 +1,76 @@
+"""
+Conversão vetorizada de números em formato brasileiro / misto
+
+Usada na leitura de planilhas exportadas (Excel/CSV), onde a mesma coluna
+pode trazer 'R$ 56.308,18', '56,308.18', '2114,56' ou '2114.56'. A coluna
+inteira é tratada com kernels do Arrow (pyarrow.compute): classificação
+por regex, normalização dos separadores e uma única conversão para float.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# Símbolo de moeda e qualquer espaço (inclui o espaço não separável do Excel)
+_REGEX_REMOVER = r"[R$\s\p{Z}]+"
+# Número válido após a normalização (o que float() aceitaria nesses formatos)
+_REGEX_NUMERO = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+
+def _para_float(textos):
+    """Converte textos já normalizados; inválidos viram nulo"""
+    validos = pc.match_substring_regex(textos, _REGEX_NUMERO)
+    return pc.cast(pc.if_else(validos, textos, pa.scalar(None, pa.string())), pa.float64())
+
+
+def converter_numero_br(series: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna de textos numéricos (BR, US ou híbridos) para float.
+
+    Regras, na ordem (mesmas do antigo parser célula a célula):
+    1. Vírgula e ponto, com 1 ou 2 caracteres após o último ponto
+       ('56,308.18'): vírgula é milhar, ponto é decimal.
+    2. Vírgula depois do último ponto ('56.308,18', '2114,56'):
+       pontos são milhar, vírgula é decimal. Também usada quando a regra 1
+       não produz um número válido.
+    3. Só ponto ('2114.56'): formato US.
+    4. Só dígitos ('2114').
+    Qualquer outro caso, vazios, 'nan' e 'none' resultam em NaN.
+
+    Args:
+        series: Coluna com textos e/ou números
+
+    Returns:
+        pd.Series float64 com o mesmo índice
+    """
+    # Números que já vêm como float/int passam pela mesma regra do texto
+    ausente = series.isna().to_numpy()
+    textos = pa.array(series.astype(str))
+    textos = pc.replace_substring_regex(pc.utf8_trim_whitespace(textos), _REGEX_REMOVER, "")
+
+    tem_virgula = pc.match_substring(textos, ",")
+    tem_ponto = pc.match_substring(textos, ".")
+
+    caso_hibrido = pc.and_(tem_virgula, pc.match_substring_regex(textos, r"\.[^.]{1,2}$"))
+    caso_br = pc.match_substring_regex(textos, r",[^.]*$")
+    caso_us = pc.and_(tem_ponto, pc.invert(tem_virgula))
+    caso_inteiro = pc.utf8_is_digit(textos)
+
+    sem_virgula = pc.replace_substring(textos, ",", "")
+    formato_br = pc.replace_substring(pc.replace_substring(textos, ".", ""), ",", ".")
+
+    normalizado = pc.if_else(caso_hibrido, sem_virgula, pc.if_else(caso_br, formato_br, textos))
+    valores = _para_float(normalizado)
+
+    # Híbridos inválidos caem na regra BR
+    refazer = pc.and_(pc.and_(caso_hibrido, caso_br), pc.is_null(valores))
+    if pc.any(refazer).as_py():
+        valores = pc.if_else(refazer, _para_float(formato_br), valores)
+
+    valido = pc.or_(pc.or_(caso_hibrido, caso_br), pc.or_(caso_us, caso_inteiro))
+    resultado = pc.if_else(valido, valores, pa.scalar(None, pa.float64()))
+
+    resultado = resultado.to_numpy(zero_copy_only=False).astype(float, copy=True)
+    resultado[ausente] = np.nan
+    return pd.Series(resultado, index=series.index, dtype="float64")
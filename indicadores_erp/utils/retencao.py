@@ -0,0 +1,149 @@
+"""
+Curvas de retenção e economia de coortes ajustada por churn
+
+O ROI diluído clássico supõe que a receita do 1º mês de cada coorte se
+repete em todos os meses. Aqui a receita do mês relativo n é a receita do
+1º mês multiplicada pela sobrevivência S(n-1) da carteira, com uma curva
+Weibull discreta por plano:
+
+    S(t) = exp(-lambda * t ** forma),  lambda = -ln(1 - churn_mensal)
+
+(forma = 1 é o churn constante, S(t) = (1 - churn) ** t). As curvas de
+todos os planos e horizontes saem de uma única expressão NumPy, a mistura
+de planos é um produto matricial e receita, LTV, ROI e payback de todas
+as coortes são calculados de uma vez, o que permite recalcular a cada
+movimento de slider.
+"""
+import numpy as np
+
+from utils.coortes import matriz_roi, calcular_payback
+
+
+def curvas_retencao(churn_mensal, forma, horizonte):
+    """
+    Curvas de sobrevivência de vários planos
+
+    Args:
+        churn_mensal: Churn mensal de cada plano (escalar ou array P)
+        forma: Parâmetro de forma da Weibull (escalar ou array P)
+        horizonte: Número de meses relativos
+
+    Returns:
+        Array P x horizonte com S no mês relativo 1..horizonte (S = 1 no 1º mês)
+    """
+    churn = np.clip(np.atleast_1d(np.asarray(churn_mensal, dtype=float)), 0.0, 0.999999)
+    forma = np.atleast_1d(np.asarray(forma, dtype=float))
+    lambdas = -np.log1p(-churn)
+
+    t = np.arange(horizonte, dtype=float)
+    return np.exp(-lambdas[:, None] * t[None, :] ** forma[:, None])
+
+
+def mistura_retencao(curvas, participacao):
+    """
+    Retenção da receita de uma coorte com vários planos
+
+    Args:
+        curvas: Array P x horizonte (curvas_retencao)
+        participacao: Fatias da receita nova por plano; array P (mesma
+                      mistura em todas as coortes) ou C x P (por coorte)
+
+    Returns:
+        Array horizonte ou C x horizonte com a receita relativa ao 1º mês
+    """
+    participacao = np.asarray(participacao, dtype=float)
+    total = participacao.sum(axis=-1, keepdims=True)
+    participacao = np.divide(participacao, total, out=np.zeros_like(participacao), where=total > 0)
+    return participacao @ curvas
+
+
+def ajustar_retencao(tabela):
+    """
+    Ajusta a curva Weibull a uma tabela de retenção observada
+
+    A sobrevivência empírica de cada mês é o total ainda ativo dividido
+    pelo total do 1º mês, somando só as coortes que já chegaram àquele mês.
+    O ajuste é uma regressão ponderada de log(-log S) em log(t).
+
+    Args:
+        tabela: Array-like coortes x meses relativos com clientes ativos
+                (ou receita); NaN onde o mês ainda não foi observado
+
+    Returns:
+        Dict com 'churn_mensal', 'forma' e 'observado' (sobrevivência empírica
+        por mês) ou None se houver menos de dois meses utilizáveis
+    """
+    tabela = np.asarray(tabela, dtype=float)
+    if tabela.ndim != 2 or tabela.shape[1] < 3:
+        return None
+
+    base = tabela[:, [0]]
+    observado = ~np.isnan(tabela) & ~np.isnan(base) & (base > 0)
+    ativos = np.where(observado, tabela, 0.0).sum(axis=0)
+    expostos = np.where(observado, base, 0.0).sum(axis=0)
+    sobrevivencia = np.divide(ativos, expostos, out=np.full(ativos.shape, np.nan), where=expostos > 0)
+
+    t = np.arange(tabela.shape[1], dtype=float)
+    validos = (t > 0) & (sobrevivencia > 0) & (sobrevivencia < 1)
+    if validos.sum() < 2:
+        return None
+
+    x = np.log(t[validos])
+    y = np.log(-np.log(sobrevivencia[validos]))
+    forma, intercepto = np.polyfit(x, y, 1, w=np.sqrt(expostos[validos]))
+
+    return {
+        'churn_mensal': float(-np.expm1(-np.exp(intercepto))),
+        'forma': float(forma),
+        'observado': sobrevivencia
+    }
+
+
+def economia_coortes(receita, investimento, retencao, horizonte):
+    """
+    Receita, LTV, ROI e payback das coortes ajustados pela retenção
+
+    Args:
+        receita: Receita do 1º mês de cada coorte (array C)
+        investimento: Investimento de cada coorte (array C)
+        retencao: Receita relativa por mês; array horizonte ou C x horizonte
+                  (mistura_retencao)
+        horizonte: Número de meses relativos
+
+    Returns:
+        Dict com matrizes C x horizonte:
+        - 'receita': receita de cada mês relativo
+        - 'ltv': receita acumulada (LTV da coorte até o mês)
+        - 'valor' / 'pct': retorno acumulado e ROI (%)
+        e arrays por coorte 'payback' e 'payback_interpolado' (NaN sem payback)
+    """
+    receita = np.asarray(receita, dtype=float)
+    investimento = np.asarray(investimento, dtype=float)
+    retencao = np.asarray(retencao, dtype=float)[..., :horizonte]
+
+    receitas = receita[:, None] * retencao
+    valor, pct = matriz_roi(receitas, investimento, horizonte)
+
+    return {
+        'receita': receitas,
+        'ltv': valor + investimento[:, None],
+        'valor': valor,
+        'pct': pct,
+        'payback': calcular_payback(valor),
+        'payback_interpolado': calcular_payback(valor, investimento, interpolado=True)
+    }
+
+
+def ltv_planos(mensalidades, curvas):
+    """
+    LTV por cliente de cada plano no horizonte das curvas
+
+    Args:
+        mensalidades: Mensalidade de cada plano (array P)
+        curvas: Array P x horizonte (curvas_retencao)
+
+    Returns:
+        Tuple (LTV por plano, vida média esperada em meses por plano)
+    """
+    vida = curvas.sum(axis=1)
+    return np.asarray(mensalidades, dtype=float) * vida, vida
@@ -0,0 +1,136 @@
+"""
+Análise de sensibilidade do modelo de ROI por varredura em grade
+
+A grade cobre todas as combinações de valores das variáveis explicativas
+(10^4 a 10^6 pontos) e é pontuada em lotes de predict, sem montar a grade
+inteira em memória de uma vez. Depois de pontuada, fatias 2-D e o gráfico
+de tornado saem por indexação, sem novas chamadas ao modelo.
+"""
+import numpy as np
+import pandas as pd
+
+
+TAMANHO_LOTE_PADRAO = 131072
+
+
+def construir_eixos(limites, pontos_por_eixo=16):
+    """
+    Valores de cada eixo da grade
+
+    Args:
+        limites: Dict {variável: (mínimo, máximo)}
+        pontos_por_eixo: Pontos por variável (int) ou dict por variável
+
+    Returns:
+        Dict {variável: np.ndarray com os valores do eixo}
+    """
+    eixos = {}
+    for feat, (minimo, maximo) in limites.items():
+        n = pontos_por_eixo[feat] if isinstance(pontos_por_eixo, dict) else pontos_por_eixo
+        eixos[feat] = np.linspace(float(minimo), float(maximo), int(n))
+    return eixos
+
+
+def prever_grade(modelo, eixos, features=None, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """
+    Pontua todas as combinações dos eixos
+
+    Cada lote monta só as suas linhas a partir do índice linear
+    (np.unravel_index), então a memória fica limitada ao tamanho do lote.
+
+    Args:
+        modelo: Estimador treinado (com predict)
+        eixos: Retorno de construir_eixos
+        features: Ordem das variáveis esperada pelo modelo (padrão: ordem dos eixos)
+        tamanho_lote: Linhas por chamada de predict
+
+    Returns:
+        np.ndarray com uma dimensão por variável (na ordem de features)
+    """
+    features = list(features or eixos)
+    valores_eixos = [eixos[f] for f in features]
+    formato = tuple(len(v) for v in valores_eixos)
+    total = int(np.prod(formato))
+
+    previsto = np.empty(total)
+    for inicio in range(0, total, tamanho_lote):
+        fim = min(inicio + tamanho_lote, total)
+        indices = np.unravel_index(np.arange(inicio, fim), formato)
+        lote = pd.DataFrame({
+            f: valores[idx] for f, valores, idx in zip(features, valores_eixos, indices)
+        })
+        previsto[inicio:fim] = modelo.predict(lote)
+
+    return previsto.reshape(formato)
+
+
+def _indice_mais_proximo(valores, alvo):
+    return int(np.abs(valores - alvo).argmin())
+
+
+def fatia_2d(grade, eixos, features, eixo_x, eixo_y, fixos=None):
+    """
+    Fatia 2-D da grade pontuada, com as demais variáveis fixas
+
+    Args:
+        grade: Retorno de prever_grade
+        eixos: Eixos usados na grade
+        features: Ordem das dimensões da grade
+        eixo_x: Variável no eixo horizontal
+        eixo_y: Variável no eixo vertical
+        fixos: Dict {variável: valor} para as demais (valor mais próximo da
+            grade; padrão: ponto central)
+
+    Returns:
+        np.ndarray (len(eixo_y) x len(eixo_x))
+    """
+    fixos = fixos or {}
+    seletor = []
+    for f in features:
+        if f in (eixo_x, eixo_y):
+            seletor.append(slice(None))
+        elif f in fixos:
+            seletor.append(_indice_mais_proximo(eixos[f], fixos[f]))
+        else:
+            seletor.append(len(eixos[f]) // 2)
+
+    fatia = grade[tuple(seletor)]
+    # Após a seleção restam as duas dimensões livres, na ordem de features
+    if features.index(eixo_x) < features.index(eixo_y):
+        fatia = fatia.T
+    return fatia
+
+
+def tornado(grade, eixos, features, base):
+    """
+    Efeito de levar cada variável do mínimo ao máximo da grade
+
+    As demais variáveis ficam no ponto da grade mais próximo de 'base'.
+
+    Args:
+        grade: Retorno de prever_grade
+        eixos: Eixos usados na grade
+        features: Ordem das dimensões da grade
+        base: Dict {variável: valor} do cenário de referência
+
+    Returns:
+        DataFrame com variável, ROI no mínimo, no máximo, amplitude e o ROI
+        do cenário base, ordenado pela amplitude
+    """
+    indices_base = [_indice_mais_proximo(eixos[f], base[f]) for f in features]
+    valor_base = float(grade[tuple(indices_base)])
+
+    linhas = []
+    for d, f in enumerate(features):
+        seletor = list(indices_base)
+        seletor[d] = slice(None)
+        curva = grade[tuple(seletor)]
+        linhas.append({
+            'variavel': f,
+            'roi_minimo': float(curva[0]),
+            'roi_maximo': float(curva[-1]),
+            'amplitude': float(np.ptp(curva)),
+            'roi_base': valor_base
+        })
+
+    return pd.DataFrame(linhas).sort_values('amplitude').reset_index(drop=True)
@@ -0,0 +1,156 @@
+"""
+Simulação Monte Carlo do funil de aquisição (Sessões → Leads → Clientes → Receita)
+"""
+import numpy as np
+import pandas as pd
+
+
+# Quantis padrão exibidos no painel de cenários
+QUANTIS_PADRAO = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def _ajustar_lognormal(valores):
+    """Parâmetros (mu, sigma) de uma lognormal a partir de valores positivos"""
+    logs = np.log(valores)
+    sigma = np.std(logs, ddof=1) if len(logs) > 1 else 0.0
+    return {'mu': float(np.mean(logs)), 'sigma': float(sigma)}
+
+
+def _ajustar_beta(taxas):
+    """
+    Parâmetros (a, b) de uma Beta pelo método dos momentos
+
+    Se a variância observada for incompatível com uma Beta (muito alta ou
+    nula), usa uma concentração de 200, equivalente a ~200 observações.
+    """
+    media = float(np.mean(taxas))
+    var = float(np.var(taxas, ddof=1)) if len(taxas) > 1 else 0.0
+
+    if 0 < var < media * (1 - media):
+        concentracao = media * (1 - media) / var - 1
+    else:
+        concentracao = 200.0
+
+    return {'a': media * concentracao, 'b': (1 - media) * concentracao}
+
+
+def ajustar_distribuicoes_funil(df):
+    """
+    Ajusta as distribuições de cada etapa do funil a partir do histórico
+
+    Args:
+        df: DataFrame com os meses apurados
+
+    Returns:
+        Dict com os parâmetros de cada etapa
+    """
+    df_valido = df[(df['Sessões'] > 0) & (df['Clientes Web'] > 0)]
+
+    if len(df_valido) < 3:
+        return None
+
+    return {
+        'sessoes': _ajustar_lognormal(df_valido['Sessões'].values),
+        'primeira_visita': _ajustar_beta(
+            (df_valido['Primeira Visita'] / df_valido['Sessões']).values
+        ),
+        'tc_usuarios': _ajustar_beta(df_valido['TC Usuários (%)'].values / 100),
+        'tc_leads': _ajustar_beta(df_valido['TC Leads (%)'].values / 100),
+        'ticket': _ajustar_lognormal(df_valido['Ticket Médio'].values),
+        'investimento': _ajustar_lognormal(df_valido['Total Ads'].values),
+        # No loader, LTV é um múltiplo fixo do ticket (12 meses)
+        'meses_ltv': float(np.median(df_valido['LTV'] / df_valido['Ticket Médio'])),
+        'n_meses': len(df_valido)
+    }
+
+
+def simular_funil(parametros, n_simulacoes=1_000_000, variacoes=None,
+                  quantis=QUANTIS_PADRAO, seed=None):
+    """
+    Simula o funil completo de forma vetorizada
+
+    Cada trajetória sorteia sessões, taxas de conversão, ticket e investimento
+    e propaga os volumes pelo funil, de modo que Leads, Clientes, Receita, CAC
+    e ROI de uma mesma trajetória são sempre coerentes entre si.
+
+    Args:
+        parametros: Dict retornado por ajustar_distribuicoes_funil
+        n_simulacoes: Número de trajetórias
+        variacoes: Dict com multiplicadores de cenário
+            ('sessoes', 'investimento', 'ticket', 'tc_usuarios', 'tc_leads')
+        quantis: Quantis a calcular para cada métrica
+        seed: Semente do gerador aleatório
+
+    Returns:
+        Dict com tabela de quantis e probabilidades conjuntas
+    """
+    variacoes = variacoes or {}
+    rng = np.random.default_rng(seed)
+
+    def _lognormal(chave):
+        p = parametros[chave]
+        return rng.lognormal(p['mu'], p['sigma'], n_simulacoes) * variacoes.get(chave, 1.0)
+
+    def _beta(chave):
+        p = parametros[chave]
+        taxa = rng.beta(p['a'], p['b'], n_simulacoes) * variacoes.get(chave, 1.0)
+        return np.clip(taxa, 0, 1)
+
+    sessoes = np.rint(_lognormal('sessoes')).astype(np.int64)
+    primeira_visita = rng.binomial(sessoes, _beta('primeira_visita'))
+    leads = rng.binomial(primeira_visita, _beta('tc_usuarios'))
+    clientes = rng.binomial(leads, _beta('tc_leads'))
+    ticket = _lognormal('ticket')
+    investimento = _lognormal('investimento')
+
+    receita = clientes * ticket
+    ltv = ticket * parametros['meses_ltv']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cac = np.where(clientes > 0, investimento / clientes, np.nan)
+    roi = (clientes * ltv - investimento) / investimento * 100
+
+    amostras = {
+        'Sessões': sessoes,
+        'Leads': leads,
+        'Clientes Web': clientes,
+        'Receita Web': receita,
+        'Total Ads': investimento,
+        'CAC': cac,
+        'ROI (%)': roi
+    }
+
+    tabela = pd.DataFrame(
+        {nome: np.nanquantile(valores, quantis) for nome, valores in amostras.items()},
+        index=list(quantis)
+    ).T
+
+    return {
+        'quantis': tabela,
+        'prob_roi_negativo': float(np.mean(roi < 0)),
+        'prob_sem_clientes': float(np.mean(clientes == 0)),
+        'amostras': amostras
+    }
+
+
+def probabilidade_conjunta(resultado, cac_max=None, roi_min=None):
+    """
+    Probabilidade de CAC e ROI atenderem simultaneamente aos limites
+
+    Args:
+        resultado: Dict retornado por simular_funil
+        cac_max: CAC máximo aceitável (None = sem restrição)
+        roi_min: ROI mínimo aceitável em % (None = sem restrição)
+
+    Returns:
+        Float entre 0 e 1
+    """
+    amostras = resultado['amostras']
+    ok = np.ones(len(amostras['ROI (%)']), dtype=bool)
+
+    if cac_max is not None:
+        ok &= amostras['CAC'] <= cac_max
+    if roi_min is not None:
+        ok &= amostras['ROI (%)'] >= roi_min
+
+    return float(np.mean(ok))
@@ -0,0 +1,159 @@
+"""
+Suavização vetorizada de séries temporais
+
+Todas as funções aceitam um array 1-D (uma série) ou 2-D (séries x
+períodos) e operam sobre todas as séries de uma vez. Com
+ignorar_zeros=True, zeros e nulos são tratados como ausentes (meses ainda
+não apurados), como no restante do módulo de forecast.
+"""
+import warnings
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+
+# Limite de elementos (séries x períodos x janela) por bloco da mediana
+# móvel; nanmedian copia o bloco, então o pico é cerca de 2 x 8 B por elemento
+MAX_ELEMENTOS_BLOCO = 4_000_000
+
+def _como_matriz(valores, ignorar_zeros):
+    """
+    Converte para matriz float e devolve a máscara de valores válidos
+
+    Returns:
+        Tuple (matriz, mascara, era_1d)
+    """
+    matriz = np.asarray(valores, dtype=float)
+    era_1d = matriz.ndim == 1
+    matriz = np.atleast_2d(matriz)
+
+    mascara = ~np.isnan(matriz)
+    if ignorar_zeros:
+        mascara &= matriz > 0
+
+    return matriz, mascara, era_1d
+
+
+def _limites_janela(janela, centrada):
+    """Quantidade de pontos antes e depois do ponto central"""
+    if centrada:
+        return janela // 2, janela // 2
+    return janela - 1, 0
+
+
+def media_movel(valores, janela=3, centrada=True, ignorar_zeros=True):
+    """
+    Média móvel por somas acumuladas, O(n) por série
+
+    Nas bordas a janela é truncada (usa apenas os pontos disponíveis).
+
+    Args:
+        valores: Array 1-D ou 2-D (séries x períodos)
+        janela: Tamanho da janela
+        centrada: Janela centrada (True) ou só com pontos passados (False)
+        ignorar_zeros: Desconsidera zeros e nulos na média
+
+    Returns:
+        Array no mesmo formato; NaN onde a janela não tem pontos válidos
+    """
+    matriz, mascara, era_1d = _como_matriz(valores, ignorar_zeros)
+    n = matriz.shape[1]
+    antes, depois = _limites_janela(janela, centrada)
+
+    zeros = np.zeros((matriz.shape[0], 1))
+    soma = np.concatenate([zeros, np.cumsum(np.where(mascara, matriz, 0), axis=1)], axis=1)
+    conta = np.concatenate([zeros, np.cumsum(mascara, axis=1)], axis=1)
+
+    posicoes = np.arange(n)
+    inicio = np.maximum(posicoes - antes, 0)
+    fim = np.minimum(posicoes + depois + 1, n)
+
+    total = soma[:, fim] - soma[:, inicio]
+    quantidade = conta[:, fim] - conta[:, inicio]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resultado = np.where(quantidade > 0, total / quantidade, np.nan)
+
+    return resultado[0] if era_1d else resultado
+
+
+def mediana_movel(valores, janela=3, centrada=True, ignorar_zeros=True,
+                  max_elementos=MAX_ELEMENTOS_BLOCO):
+    """
+    Mediana móvel sobre janelas deslizantes
+
+    As janelas são vistas (sem cópia) do array com bordas preenchidas por
+    NaN; o cálculo é feito em blocos de séries e períodos com no máximo
+    max_elementos valores de janela cada, então a memória não cresce com o
+    número de séries nem com o comprimento delas.
+
+    Args:
+        valores: Array 1-D ou 2-D (séries x períodos)
+        janela: Tamanho da janela
+        centrada: Janela centrada (True) ou só com pontos passados (False)
+        ignorar_zeros: Desconsidera zeros e nulos na mediana
+        max_elementos: Valores de janela (séries x períodos x janela) por bloco
+
+    Returns:
+        Array no mesmo formato; NaN onde a janela não tem pontos válidos
+    """
+    matriz, mascara, era_1d = _como_matriz(valores, ignorar_zeros)
+    n = matriz.shape[1]
+    antes, depois = _limites_janela(janela, centrada)
+    largura = antes + depois + 1
+
+    # Bordas em NaN; pontos inválidos viram NaN direto na cópia preenchida
+    preenchida = np.full((matriz.shape[0], n + antes + depois), np.nan)
+    centro = preenchida[:, antes:antes + n]
+    np.copyto(centro, matriz, where=mascara)
+    janelas = sliding_window_view(preenchida, largura, axis=1)
+
+    k = matriz.shape[0]
+    series_bloco = min(max(max_elementos // largura, 1), k)
+    periodos_bloco = max(max_elementos // (series_bloco * largura), 1)
+
+    resultado = np.empty_like(matriz)
+    with warnings.catch_warnings():
+        # Janelas sem nenhum ponto válido resultam em NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for linha in range(0, k, series_bloco):
+            series = slice(linha, linha + series_bloco)
+            for inicio in range(0, n, periodos_bloco):
+                periodos = slice(inicio, inicio + periodos_bloco)
+                resultado[series, periodos] = np.nanmedian(janelas[series, periodos], axis=-1)
+
+    return resultado[0] if era_1d else resultado
+
+
+def ewma(valores, alpha=None, span=None, ignorar_zeros=True):
+    """
+    Média móvel exponencial com pesos normalizados
+
+    Pontos ausentes não entram na média: numerador e soma dos pesos são
+    filtrados separadamente (filtro IIR vetorizado) e divididos no final.
+
+    Args:
+        valores: Array 1-D ou 2-D (séries x períodos)
+        alpha: Fator de suavização (0 < alpha <= 1)
+        span: Alternativa ao alpha, alpha = 2 / (span + 1)
+        ignorar_zeros: Desconsidera zeros e nulos
+
+    Returns:
+        Array no mesmo formato; NaN antes do primeiro ponto válido
+    """
+    if alpha is None:
+        if span is None:
+            raise ValueError("Informe alpha ou span")
+        alpha = 2 / (span + 1)
+
+    matriz, mascara, era_1d = _como_matriz(valores, ignorar_zeros)
+
+    coef_b = [alpha]
+    coef_a = [1, -(1 - alpha)]
+    numerador = lfilter(coef_b, coef_a, np.where(mascara, matriz, 0), axis=1)
+    pesos = lfilter(coef_b, coef_a, mascara.astype(float), axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resultado = np.where(pesos > 0, numerador / pesos, np.nan)
+
+    return resultado[0] if era_1d else resultado
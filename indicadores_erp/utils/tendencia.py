@@ -0,0 +1,118 @@
+"""
+Teste de tendência de Mann-Kendall e inclinação de Sen em lote
+
+Calcula o teste para uma matriz de séries (séries x períodos) de uma vez,
+sem laços em Python por série. Valores ausentes devem vir como NaN.
+"""
+import numpy as np
+from scipy.special import ndtr
+
+
+# Limite de elementos (séries x pares) por bloco, para limitar a memória
+MAX_ELEMENTOS_BLOCO = 5_000_000
+
+
+def _termos_empates(Y):
+    """
+    Soma dos termos de empate de cada série
+
+    Returns:
+        Tuple (Σ t(t-1)(2t+5), Σ t(t-1)/2) por série, onde t é o tamanho
+        de cada grupo de valores iguais
+    """
+    k, n = Y.shape
+    ordenado = np.sort(Y, axis=1)
+    # NaN nunca é igual a nada, então cada NaN forma um grupo de tamanho 1
+    novo_grupo = np.ones((k, n), dtype=bool)
+    novo_grupo[:, 1:] = ordenado[:, 1:] != ordenado[:, :-1]
+
+    grupo = np.cumsum(novo_grupo, axis=1) + (np.arange(k) * (n + 1))[:, None]
+    t = np.bincount(grupo.ravel(), minlength=k * (n + 1)).reshape(k, n + 1)
+
+    return (t * (t - 1) * (2 * t + 5)).sum(axis=1), (t * (t - 1) / 2).sum(axis=1)
+
+
+def _mann_kendall_bloco(Y):
+    """Calcula o teste para um bloco de séries"""
+    k, n = Y.shape
+    i, j = np.triu_indices(n, k=1)
+
+    diferencas = Y[:, j] - Y[:, i]
+    S = np.nansum(np.sign(diferencas), axis=1)
+
+    with np.errstate(all='ignore'):
+        sen = np.nanmedian(diferencas / (j - i), axis=1) if len(i) else np.full(k, np.nan)
+
+    m = (~np.isnan(Y)).sum(axis=1).astype(float)
+    termo_empates, pares_empatados = _termos_empates(Y)
+    var_s = (m * (m - 1) * (2 * m + 5) - termo_empates) / 18
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(var_s > 0, (S - np.sign(S)) / np.sqrt(var_s), 0.0)
+        pares = m * (m - 1) / 2
+        tau = S / np.sqrt(pares * (pares - pares_empatados))
+
+    return S, tau, var_s, z, sen, m
+
+
+def mann_kendall_lote(Y, alpha=0.05):
+    """
+    Teste de Mann-Kendall com correção de empates para várias séries
+
+    Args:
+        Y: Array (séries x períodos) ou 1-D para uma única série
+        alpha: Nível de significância para classificar a tendência
+
+    Returns:
+        Dict de arrays (um valor por série):
+        - 'S': estatística S
+        - 'tau': tau-b de Kendall (tempo x valor)
+        - 'var_s': variância de S corrigida por empates
+        - 'z': estatística Z com correção de continuidade
+        - 'p_valor': p-valor bicaudal (aproximação normal)
+        - 'sen': inclinação de Sen (variação mediana por período)
+        - 'tendencia': 1 (crescente), -1 (decrescente) ou 0 (sem tendência significativa)
+        - 'n': pontos válidos por série
+    """
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    k, n = Y.shape
+    n_pares = max(n * (n - 1) // 2, 1)
+    tamanho_bloco = max(MAX_ELEMENTOS_BLOCO // n_pares, 1)
+
+    partes = [
+        _mann_kendall_bloco(Y[inicio:inicio + tamanho_bloco])
+        for inicio in range(0, k, tamanho_bloco)
+    ]
+    S, tau, var_s, z, sen, m = (np.concatenate(p) for p in zip(*partes))
+
+    p_valor = 2 * ndtr(-np.abs(z))
+    significante = (p_valor < alpha) & (m >= 3)
+
+    return {
+        'S': S,
+        'tau': tau,
+        'var_s': var_s,
+        'z': z,
+        'p_valor': p_valor,
+        'sen': sen,
+        'tendencia': np.where(significante, np.sign(S), 0).astype(int),
+        'n': m.astype(int)
+    }
+
+
+def matriz_series(df, colunas, ignorar_zeros=True):
+    """
+    Monta a matriz (séries x períodos) a partir de colunas de um DataFrame
+
+    Args:
+        df: DataFrame em ordem cronológica
+        colunas: Colunas a incluir
+        ignorar_zeros: Converte zeros e negativos em NaN (meses não apurados)
+
+    Returns:
+        np.ndarray (colunas x linhas do DataFrame)
+    """
+    Y = df[colunas].to_numpy(dtype=float).T
+    if ignorar_zeros:
+        Y = np.where(Y > 0, Y, np.nan)
+    return Y